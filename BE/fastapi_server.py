@@ -7,9 +7,11 @@ import json
 import os
 import random
 import httpx
+import time
 from datetime import datetime
 from google.api_core.retry import Retry
 from firebase_config import get_firestore_db
+from utils.search_index import InvertedIndex
 
 <<<<<<< HEAD
 =======
@@ -56,6 +58,9 @@ os.environ.setdefault("FIRESTORE_USE_GRPC", "false")
 RETRY = Retry(initial=0.2, maximum=2.0, multiplier=2.0, deadline=5.0)
 RPC_TIMEOUT = 3.0
 
+# Basic keyword search index rebuild interval (seconds)
+BASIC_SEARCH_INDEX_TTL = 300
+
 # ---------------------- Pydantic Models ----------------------
 class UserEvent(BaseModel):
     user_id: str
@@ -93,20 +98,38 @@ def load_products_from_json():
         print(f"Error loading products from JSON: {e}")
         return get_sample_products()
 
-def get_all_products_from_firestore(limit: int = 200):
-    """Read products with retry + timeout; fall back to JSON then sample data."""
+def page_local_products(products: List[Dict[str, Any]], limit: int, after_id: Optional[int] = None,
+                        fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Apply the same ID cursor, limit and projection as the Firestore query to an in-memory list"""
+    if after_id is not None:
+        products = [p for p in products if isinstance(p.get("id"), int) and p["id"] > after_id]
+    products = products[:limit]
+    if fields is not None:
+        products = [{f: p[f] for f in fields if f in p} for p in products]
+    return products
+
+def get_all_products_from_firestore(limit: int = 200, after_id: Optional[int] = None,
+                                    fields: Optional[List[str]] = None):
+    """Read one page of products (ID > after_id, ordered by ID) with retry + timeout; fall back to JSON then sample data."""
+    if fields is not None and "id" not in fields:
+        fields = ["id"] + list(fields)
+
     if not USE_FIREBASE:
         # Try loading from products.json first, then fall back to sample data
-        products = load_products_from_json()
-        return products[:limit] if len(products) > limit else products
+        return page_local_products(load_products_from_json(), limit, after_id, fields)
 
     try:
         db = get_firestore_db()
         if db is None:
-            return load_products_from_json()
+            return page_local_products(load_products_from_json(), limit, after_id, fields)
 
         print("Attempting to fetch products from Firestore…")
-        q = db.collection("products").order_by("id").limit(limit)
+        q = db.collection("products").order_by("id")
+        if after_id is not None:
+            q = q.start_after({"id": after_id})
+        if fields is not None:
+            q = q.select(fields)
+        q = q.limit(limit)
         docs = q.stream(retry=RETRY, timeout=RPC_TIMEOUT)
 
         products = []
@@ -116,14 +139,14 @@ def get_all_products_from_firestore(limit: int = 200):
             p["id"] = p.get("id", d.id)
             products.append(p)
 
-        if not products:
+        if not products and after_id is None:
             print("No products found in Firestore, loading from JSON")
-            return load_products_from_json()
+            return page_local_products(load_products_from_json(), limit, after_id, fields)
         print(f"Fetched {len(products)} products from Firestore")
         return products
     except Exception as e:
         print(f"Error fetching products from Firestore: {e}")
-        return load_products_from_json()
+        return page_local_products(load_products_from_json(), limit, after_id, fields)
 
 def get_product_by_id_from_firestore(product_id):
     if not USE_FIREBASE:
@@ -151,6 +174,17 @@ def get_product_by_id_from_firestore(product_id):
         products = load_products_from_json()
         return next((p for p in products if str(p["id"]) == str(product_id)), None)
 
+_basic_search = {"index": None, "products": {}, "built_at": 0.0}
+
+def get_basic_search_index():
+    """Inverted index over the catalog for the basic /search fallback, rebuilt every few minutes"""
+    if _basic_search["index"] is None or time.time() - _basic_search["built_at"] > BASIC_SEARCH_INDEX_TTL:
+        products = get_all_products_from_firestore()
+        index = InvertedIndex()
+        index.build(products)
+        _basic_search.update(index=index, products={p["id"]: p for p in products}, built_at=time.time())
+    return _basic_search["index"], _basic_search["products"]
+
 # ---------------------- Recommendation System Integration ----------------------
 
 async def send_user_event_to_recommendation_system(user_id, event_type, product_data):
@@ -248,11 +282,17 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now().isoformat()}
 
 @app.get("/products")
-async def get_products(limit: int = Query(100, ge=1, le=500)):
-    """Get all products"""
+async def get_products(
+    limit: int = Query(100, ge=1, le=500),
+    after_id: Optional[int] = Query(None, description="Return products with ID greater than this cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return")
+):
+    """Get one page of products ordered by ID"""
     try:
-        products = get_all_products_from_firestore(limit)
-        return {"products": products, "count": len(products)}
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+        products = get_all_products_from_firestore(limit, after_id, field_list)
+        next_after_id = products[-1].get("id") if len(products) == limit else None
+        return {"products": products, "count": len(products), "next_after_id": next_after_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching products: {str(e)}")
 
@@ -310,19 +350,11 @@ async def search_products(q: str = Query(..., min_length=1), limit: int = Query(
         if semantic_results:
             return {"products": semantic_results, "search_type": "semantic"}
         
-        # Fallback to basic search
-        products = get_all_products_from_firestore()
-        query_lower = q.lower()
-        
-        filtered = [
-            p for p in products
-            if query_lower in p.get("name", "").lower() or
-               query_lower in p.get("description", "").lower() or
-               query_lower in p.get("category", "").lower() or
-               query_lower in p.get("brand", "").lower()
-        ]
+        # Fallback to basic search: BM25-ranked inverted index lookup
+        index, products_by_id = get_basic_search_index()
+        filtered = [products_by_id[pid] for pid, _score in index.search(q, limit=limit) if pid in products_by_id]
         
-        return {"products": filtered[:limit], "search_type": "basic"}
+        return {"products": filtered, "search_type": "basic"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
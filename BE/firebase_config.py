@@ -3,7 +3,7 @@ import json
 from typing import Optional
 from dotenv import load_dotenv
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
 
 # Load environment variables
 load_dotenv()
@@ -11,6 +11,7 @@ load_dotenv()
 class FirebaseConfig:
     def __init__(self):
         self.db = None
+        self.async_db = None
         self.init_firebase()
     
     def init_firebase(self):
@@ -72,6 +73,12 @@ class FirebaseConfig:
         if self.db is None:
             self.init_firebase()
         return self.db
+    
+    def get_async_db(self):
+        """Get Firestore AsyncClient for the same app (None when Firebase is unavailable)"""
+        if self.async_db is None and self.get_db() is not None:
+            self.async_db = firestore_async.client()
+        return self.async_db
 
 # Global Firebase instance
 firebase_config = FirebaseConfig()
@@ -79,3 +86,7 @@ firebase_config = FirebaseConfig()
 def get_firestore_db():
     """Get Firestore database instance"""
     return firebase_config.get_db()
+
+def get_firestore_async_db():
+    """Get Firestore AsyncClient for use inside async handlers"""
+    return firebase_config.get_async_db()
@@ -1,11 +1,12 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
+from starlette.concurrency import run_in_threadpool
+from typing import Optional, List, Union
 from models import (Product, ProductCreate, ProductUpdate, SearchFilters, ApiResponse, 
                    ChatbotRequest, ChatbotResponse, SmartSearchRequest, SmartSearchResponse, 
                    Wishlist, WishlistCreate, WishlistAddProduct, Cart, CartAddItem, CartUpdateItem, CartRemoveItem,
-                   UserEvent, UserEventCreate, RecommendationRequest, RecommendationResponse)
-from product_service import product_service
+                   UserEvent, UserEventCreate, RecommendationRequest, RecommendationResponse, ProductPage)
+from product_service import product_service, parse_fields
 from services.wishlist_service import wishlist_service
 from services.cart_service import cart_service
 from services.recommendation_service import recommendation_service
@@ -65,13 +66,32 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "API is running"}
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get catalog cache hit/miss counters"""
+    return {"products": product_service.get_cache_stats()}
+
 # Product endpoints
-@app.get("/products", response_model=List[dict])
-async def get_products():
-    """Get all products"""
+@app.get("/products", response_model=Union[List[dict], ProductPage])
+async def get_products(
+    ids: Optional[str] = Query(None, description="Comma-separated product IDs to fetch in one batch"),
+    after_id: Optional[int] = Query(None, description="Return products with ID greater than this cursor"),
+    page_size: Optional[int] = Query(None, ge=1, le=500, description="Number of products per page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or 'listing' for card fields")
+):
+    """Get all products, only the given IDs, or one keyset page when after_id/page_size/fields is set"""
     try:
-        products = product_service.get_all_products()
+        if ids:
+            product_ids = [int(pid) for pid in ids.split(',') if pid.strip()]
+            return await product_service.get_products_by_ids_async(product_ids)
+        
+        if after_id is not None or page_size is not None or fields:
+            return await product_service.list_products_async(after_id, page_size or 50, parse_fields(fields))
+        
+        products = await product_service.get_all_products_async()
         return products
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving products: {str(e)}")
 
@@ -80,43 +100,10 @@ async def get_products():
 async def get_featured_products(limit: int = Query(6, ge=1, le=50, description="Number of featured products to return")):
     """Get featured products"""
     try:
-        print(f"DEBUG: get_featured_products called with limit={limit}")
-        all_products = product_service.get_all_products()
-        print(f"DEBUG: Retrieved {len(all_products)} products from service")
-        
-        if not all_products:
-            print("DEBUG: No products found, returning empty list")
-            return []
-        
-        # Simple featured products selection - first N products or those marked as featured
-        featured_products = []
-        for product in all_products:
-            if product.get('featured', False):
-                featured_products.append(product)
-        
-        print(f"DEBUG: Found {len(featured_products)} featured products")
-        
-        if not featured_products:
-            # If no featured products, return first few products
-            featured_products = all_products[:limit]
-            print(f"DEBUG: No featured products found, using first {len(featured_products)} products")
-        else:
-            # Sort by rating for best featured products first
-            try:
-                featured_products.sort(key=lambda x: float(x.get('rating', 0)), reverse=True)
-                print("DEBUG: Successfully sorted featured products by rating")
-            except Exception as sort_error:
-                print(f"DEBUG: Error sorting products: {sort_error}")
-                # Just return unsorted if sorting fails
-        
-        result = featured_products[:limit]
-        print(f"DEBUG: Returning {len(result)} featured products")
-        return result
-        
+        # Served from the precomputed featured leaderboard
+        return await product_service.get_featured_products_async(limit)
     except Exception as e:
         print(f"ERROR in get_featured_products: {e}")
-        import traceback
-        traceback.print_exc()
         # Return a simple error response instead of raising HTTPException
         return {"error": f"Error retrieving featured products: {str(e)}"}
 
@@ -124,59 +111,10 @@ async def get_featured_products(limit: int = Query(6, ge=1, le=50, description="
 async def get_top_products_this_week(limit: int = Query(6, ge=1, le=50, description="Number of top products to return")):
     """Get top products this week based on views and sales"""
     try:
-        print(f"DEBUG: get_top_products_this_week called with limit={limit}")
-        all_products = product_service.get_all_products()
-        print(f"DEBUG: Retrieved {len(all_products)} products from service")
-        
-        if not all_products:
-            print("DEBUG: No products found, returning empty list")
-            return []
-        
-        # Simple popularity calculation with safe defaults
-        products_with_score = []
-        
-        for i, product in enumerate(all_products):
-            try:
-                weekly_sales = int(product.get('weeklySales', 0))
-                weekly_views = int(product.get('weeklyViews', 0))
-                rating = float(product.get('rating', 0))
-                
-                # Simple popularity score: sales + views + rating
-                popularity_score = weekly_sales + weekly_views + (rating * 10)
-                
-                # Create a clean copy of the product
-                product_copy = dict(product)
-                product_copy['popularity_score'] = popularity_score
-                products_with_score.append(product_copy)
-                
-            except (ValueError, TypeError) as e:
-                # Skip products with invalid data
-                print(f"DEBUG: Skipping product {i} due to data error: {e}")
-                continue
-        
-        print(f"DEBUG: Processed {len(products_with_score)} products with scores")
-        
-        # Sort by popularity score and return top products
-        if products_with_score:
-            try:
-                products_with_score.sort(key=lambda x: x.get('popularity_score', 0), reverse=True)
-                result = products_with_score[:limit]
-                print(f"DEBUG: Returning {len(result)} top products")
-                return result
-            except Exception as sort_error:
-                print(f"DEBUG: Error sorting products: {sort_error}")
-                # Return unsorted if sorting fails
-                return products_with_score[:limit]
-        else:
-            # Fallback: return first N products
-            result = all_products[:limit]
-            print(f"DEBUG: Fallback - returning first {len(result)} products")
-            return result
-            
+        # Served from the precomputed weekly popularity leaderboard
+        return await product_service.get_top_products_this_week_async(limit)
     except Exception as e:
         print(f"ERROR in get_top_products_this_week: {e}")
-        import traceback
-        traceback.print_exc()
         # Return a simple error response instead of raising HTTPException
         return {"error": f"Error retrieving top products: {str(e)}"}
 
@@ -184,7 +122,7 @@ async def get_top_products_this_week(limit: int = Query(6, ge=1, le=50, descript
 async def get_product(product_id: int):
     """Get product by ID"""
     try:
-        product = product_service.get_product_by_id(product_id)
+        product = await product_service.get_product_by_id_async(product_id)
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
         return product
@@ -197,7 +135,7 @@ async def get_product(product_id: int):
 async def create_product(product: ProductCreate):
     """Create a new product"""
     try:
-        result = product_service.create_product(product)
+        result = await product_service.create_product_async(product)
         if not result.get("success"):
             raise HTTPException(status_code=400, detail=result.get("error", "Failed to create product"))
         return result
@@ -210,7 +148,7 @@ async def create_product(product: ProductCreate):
 async def update_product(product_id: int, product: ProductUpdate):
     """Update a product"""
     try:
-        result = product_service.update_product(product_id, product)
+        result = await product_service.update_product_async(product_id, product)
         if not result.get("success"):
             raise HTTPException(status_code=400, detail=result.get("error", "Failed to update product"))
         return result
@@ -223,7 +161,7 @@ async def update_product(product_id: int, product: ProductUpdate):
 async def delete_product(product_id: int):
     """Delete a product"""
     try:
-        result = product_service.delete_product(product_id)
+        result = await product_service.delete_product_async(product_id)
         if not result.get("success"):
             raise HTTPException(status_code=400, detail=result.get("error", "Failed to delete product"))
         return result
@@ -250,7 +188,7 @@ async def search_products(
             max_price=max_price,
             keywords=keywords
         )
-        products = product_service.search_products(filters)
+        products = await product_service.search_products_async(filters)
         return products
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching products: {str(e)}")
@@ -266,7 +204,7 @@ async def test_endpoint():
 async def get_categories():
     """Get all product categories"""
     try:
-        categories = product_service.get_categories()
+        categories = await product_service.get_categories_async()
         return {"categories": ["All"] + categories}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving categories: {str(e)}")
@@ -275,11 +213,19 @@ async def get_categories():
 async def get_brands():
     """Get all product brands"""
     try:
-        brands = product_service.get_brands()
+        brands = await product_service.get_brands_async()
         return {"brands": ["All"] + brands}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving brands: {str(e)}")
 
+@app.get("/facets")
+async def get_facets():
+    """Get category, brand and price-bucket counts in one call"""
+    try:
+        return await product_service.get_facets_async()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving facets: {str(e)}")
+
 # Chatbot endpoint
 @app.post("/chatbot", response_model=ChatbotResponse)
 async def chatbot_endpoint(request: ChatbotRequest):
@@ -296,17 +242,17 @@ async def chatbot_endpoint(request: ChatbotRequest):
         
         # Basic product search logic
         if any(keyword in message for keyword in ["laptop", "computer", "pc"]):
-            products = product_service.search_products(SearchFilters(category="Electronics"))
+            products = await product_service.search_products_async(SearchFilters(category="Electronics"))
             search_params = {"category": "Electronics", "keywords": "laptop"}
             response_text = "I found some laptops for you!"
             page_code = "products"
         elif any(keyword in message for keyword in ["phone", "smartphone", "mobile"]):
-            products = product_service.search_products(SearchFilters(category="Electronics"))
+            products = await product_service.search_products_async(SearchFilters(category="Electronics"))
             search_params = {"category": "Electronics", "keywords": "phone"}
             response_text = "Here are some smartphones I found!"
             page_code = "products"
         elif any(keyword in message for keyword in ["headphones", "headset", "earphones"]):
-            products = product_service.search_products(SearchFilters(category="Electronics"))
+            products = await product_service.search_products_async(SearchFilters(category="Electronics"))
             search_params = {"category": "Electronics", "keywords": "headphones"}
             response_text = "Check out these headphones!"
             page_code = "products"
@@ -354,7 +300,7 @@ async def smart_search_endpoint(request: SmartSearchRequest):
             # Simple keyword extraction
             keywords = request.query.lower()
             filters = SearchFilters(keywords=keywords)
-            products = product_service.search_products(filters)
+            products = await product_service.search_products_async(filters)
             
             return SmartSearchResponse(
                 query=request.query,
@@ -369,7 +315,7 @@ async def smart_search_endpoint(request: SmartSearchRequest):
         # Fallback to regular search if recommendation service is unavailable
         keywords = request.query.lower()
         filters = SearchFilters(keywords=keywords)
-        products = product_service.search_products(filters)
+        products = await product_service.search_products_async(filters)
         
         return SmartSearchResponse(
             query=request.query,
@@ -387,7 +333,7 @@ async def smart_search_endpoint(request: SmartSearchRequest):
 async def get_wishlist(user_id: str = Query(...)):
     """Get wishlist for a user"""
     try:
-        wishlists = wishlist_service.get_user_wishlists(user_id)
+        wishlists = await run_in_threadpool(wishlist_service.get_user_wishlists, user_id)
         return wishlists
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching wishlist: {str(e)}")
@@ -396,7 +342,7 @@ async def get_wishlist(user_id: str = Query(...)):
 async def create_wishlist(wishlist_data: WishlistCreate):
     """Create a new wishlist"""
     try:
-        wishlist = wishlist_service.create_wishlist(wishlist_data)
+        wishlist = await run_in_threadpool(wishlist_service.create_wishlist, wishlist_data)
         return wishlist
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating wishlist: {str(e)}")
@@ -405,7 +351,7 @@ async def create_wishlist(wishlist_data: WishlistCreate):
 async def get_wishlist_by_id(wishlist_id: str, user_id: str = Query(...)):
     """Get a specific wishlist by ID"""
     try:
-        wishlist = wishlist_service.get_wishlist(wishlist_id, user_id)
+        wishlist = await run_in_threadpool(wishlist_service.get_wishlist, wishlist_id, user_id)
         if not wishlist:
             raise HTTPException(status_code=404, detail="Wishlist not found")
         return wishlist
@@ -418,7 +364,7 @@ async def get_wishlist_by_id(wishlist_id: str, user_id: str = Query(...)):
 async def add_product_to_wishlist(wishlist_id: str, product_data: WishlistAddProduct, user_id: str = Query(...)):
     """Add product to wishlist"""
     try:
-        wishlist = wishlist_service.add_product_to_wishlist(wishlist_id, user_id, product_data.product_id)
+        wishlist = await run_in_threadpool(wishlist_service.add_product_to_wishlist, wishlist_id, user_id, product_data.product_id)
         if not wishlist:
             raise HTTPException(status_code=404, detail="Wishlist not found")
         return wishlist
@@ -431,7 +377,7 @@ async def add_product_to_wishlist(wishlist_id: str, product_data: WishlistAddPro
 async def remove_product_from_wishlist(wishlist_id: str, product_id: int, user_id: str = Query(...)):
     """Remove product from wishlist"""
     try:
-        wishlist = wishlist_service.remove_product_from_wishlist(wishlist_id, user_id, product_id)
+        wishlist = await run_in_threadpool(wishlist_service.remove_product_from_wishlist, wishlist_id, user_id, product_id)
         if not wishlist:
             raise HTTPException(status_code=404, detail="Wishlist not found")
         return wishlist
@@ -444,7 +390,7 @@ async def remove_product_from_wishlist(wishlist_id: str, product_id: int, user_i
 async def delete_wishlist(wishlist_id: str, user_id: str = Query(...)):
     """Delete a wishlist"""
     try:
-        success = wishlist_service.delete_wishlist(wishlist_id, user_id)
+        success = await run_in_threadpool(wishlist_service.delete_wishlist, wishlist_id, user_id)
         if not success:
             raise HTTPException(status_code=404, detail="Wishlist not found")
         return {"success": True, "message": "Wishlist deleted successfully"}
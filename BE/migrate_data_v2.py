@@ -16,6 +16,8 @@ from firebase_config import get_firestore_db
 from models import ProductCreate, Product
 from product_service import ProductService
 from utils.product_keywords import get_product_keywords_from_dict
+from utils.embedding_batcher import EmbeddingBatcher
+from utils.collection_alias import CollectionAliases
 
 # Load environment variables
 load_dotenv()
@@ -620,7 +622,9 @@ class ChromaDBEmbedder:
         self.embedding_model = "text-embedding-3-small"
         
         if self.api_key:
+            # OPENAI_BASE_URL (read by the client) can point this at a local fake server
             self.openai_client = openai.OpenAI(api_key=self.api_key)
+            self.batcher = EmbeddingBatcher(self.openai_client, self.embedding_model)
             print(f"[SUCCESS] OpenAI client initialized")
         else:
             print("[ERROR] OpenAI API key not found in environment variables")
@@ -663,6 +667,11 @@ class ChromaDBEmbedder:
             )
             print("[SUCCESS] Created new ChromaDB collection 'products_embeddings'")
             
+            # Point the service alias back at this collection; versioned ones are retired
+            CollectionAliases(os.path.join("./chroma_db", "collection_aliases.json")).switch(
+                "products_embeddings", "products_embeddings"
+            )
+            
         except Exception as e:
             print(f"[ERROR] Collection initialization failed: {e}")
             raise e
@@ -750,10 +759,8 @@ async def generate_and_store_embeddings():
     docs = products_ref.stream()
     
     products_data = []
-    product_ids = []
     for doc in docs:
         products_data.append(doc.to_dict())
-        product_ids.append(doc.id)
     
     if not products_data:
         print("[WARNING] No products found in Firebase")
@@ -761,46 +768,24 @@ async def generate_and_store_embeddings():
     
     print(f"[INFO] Found {len(products_data)} products to embed")
     
-    # Process products for embeddings
-    successful_embeddings = 0
+    # Prepare texts and metadata - use the id field from product_data
+    ids, texts, metadatas = [], [], []
     failed_embeddings = 0
-    
-    for i, (product_data, product_id) in enumerate(zip(products_data, product_ids), 1):
+    for product_data in products_data:
         try:
-            print(f"[INFO] Processing product {i}/{len(products_data)}: {product_data['name']}")
-            
-            # Prepare text for embedding
-            text = embedder.prepare_product_text(product_data)
-            
-            # Get embedding
-            embedding = embedder.get_embedding(text)
-            
-            if not embedding:
-                print(f"[ERROR] Failed to get embedding for {product_data['name']}")
-                failed_embeddings += 1
-                continue
-            
-            # Prepare metadata - use the id field from product_data
-            metadata = embedder.prepare_product_metadata(product_data, str(product_data['id']))
-            
-            # Add to ChromaDB
-            embedder.collection.add(
-                embeddings=[embedding],
-                documents=[text],
-                metadatas=[metadata],
-                ids=[f"product_{product_data['id']}"]
-            )
-            
-            successful_embeddings += 1
-            print(f"[SUCCESS] Added {product_data['name']} to ChromaDB")
-            
-            # Small delay to respect rate limits
-            await asyncio.sleep(0.3)
-            
+            texts.append(embedder.prepare_product_text(product_data))
+            metadatas.append(embedder.prepare_product_metadata(product_data, str(product_data['id'])))
+            ids.append(f"product_{product_data['id']}")
         except Exception as e:
-            print(f"[ERROR] Failed to process {product_data.get('name', 'Unknown')}: {e}")
+            print(f"[ERROR] Failed to prepare {product_data.get('name', 'Unknown')}: {e}")
             failed_embeddings += 1
-            continue
+    
+    # Batched, concurrent embedding requests (with 429 backoff); one collection.upsert per batch
+    print(f"[INFO] Embedding {len(texts)} products in batches of {embedder.batcher.batch_size}...")
+    successful_embeddings, failed_batches = await asyncio.to_thread(
+        embedder.batcher.embed_into_collection, embedder.collection, ids, texts, metadatas
+    )
+    failed_embeddings += failed_batches
     
     # Print results
     print("\n" + "=" * 50)
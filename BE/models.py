@@ -256,3 +256,15 @@ class RecommendationResponse(BaseModel):
     context: Optional[str] = None
     total_count: int
     timestamp: datetime
+
+# Bulk product write models
+class ProductBulkUpdateItem(ProductUpdate):
+    id: int
+
+class ProductBulkDelete(BaseModel):
+    ids: List[int]
+
+class ProductPage(BaseModel):
+    products: List[Dict[str, Any]]  # full products, or only the requested fields
+    next_after_id: Optional[int] = None  # cursor for the next page; None on the last page
+    page_size: int
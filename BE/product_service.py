@@ -1,55 +1,203 @@
-from typing import List, Optional, Dict, Any
-from firebase_config import get_firestore_db
+from typing import List, Optional, Dict, Any, Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from firebase_config import get_firestore_db, get_firestore_async_db
 from models import Product, ProductCreate, ProductUpdate, SearchFilters
-from google.cloud.firestore_v1.base_query import FieldFilter
+from utils.ttl_cache import TTLCache
+from utils.single_flight import SingleFlight
+from utils.product_index import ProductIndex, id_sort_key
+from utils.search_index import InvertedIndex
+from utils.facets import CatalogFacets
+from utils.id_allocator import IdAllocator
+from utils.catalog_replica import CatalogReplica
+from utils.rankings import Leaderboard, featured_score, popularity_score
+from utils.columnar_catalog import ColumnarCatalog
+from google.cloud import firestore
+import asyncio
+import os
 import time
-import threading
-from datetime import datetime, timedelta
+
+# Firestore caps a write batch at 500 operations
+BULK_BATCH_SIZE = 500
+
+# Fields needed to render a product card; listing pages can project to these
+LISTING_FIELDS = ['id', 'name', 'price', 'original_price', 'imageUrl', 'category', 'brand', 'rating', 'discount']
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated `fields` query value; 'listing' expands to LISTING_FIELDS"""
+    if not fields:
+        return None
+    if fields.strip() == 'listing':
+        return list(LISTING_FIELDS)
+    return [f.strip() for f in fields.split(',') if f.strip()]
 
 class ProductService:
     def __init__(self):
         self.db = get_firestore_db()
         self.collection_name = 'products'
         
-        # Cache management
-        self._cache = {}
-        self._cache_expiry = {}
-        self._cache_lock = threading.Lock()
+        # Catalog cache (TTL + LRU); every key is prefixed with "products_"
         self.cache_duration = 300  # 5 minutes
+        self.cache_max_entries = 256
+        self._cache = TTLCache(max_entries=self.cache_max_entries, ttl=self.cache_duration)
+        self._single_flight = SingleFlight()
+        
+        # Secondary indexes answering SearchFilters in memory; rebuilt on each full load
+        # and patched in place on product writes
+        self._index = ProductIndex()
+        self._search_index = InvertedIndex()
+        self._facets = CatalogFacets()
+        
+        # Homepage leaderboards; only rescored when their ranking fields change
+        self._featured = Leaderboard(featured_score, ('featured', 'rating'))
+        self._top_this_week = Leaderboard(popularity_score, ('weeklySales', 'weeklyViews', 'rating'))
+        
+        # Columnar snapshot for vectorized ranking; rebuilt lazily after any catalog change
+        self._columnar: Optional[ColumnarCatalog] = None
+        self._catalog_version = 0
+        
+        # Callbacks (action, product_ids) fired after product writes, e.g. embedding refresh;
+        # they run inline on the write path and must only enqueue work
+        self._write_listeners: List[Callable[[str, List[int]], None]] = []
         
         if self.db is None:
             raise ConnectionError("Firebase connection failed. Please check your configuration.")
+        
+        # Bulk writes commit up to this many 500-op batches concurrently
+        self.bulk_max_workers = int(os.getenv("PRODUCT_BULK_MAX_WORKERS", "4"))
+        
+        # AsyncClient for the *_async methods used by async route handlers
+        self.async_db = get_firestore_async_db()
+        
+        # Product IDs come from a transactional counter doc, reserved in blocks per process
+        self._id_allocator = IdAllocator(
+            self.db,
+            counter_doc=self.collection_name,
+            block_size=int(os.getenv("PRODUCT_ID_BLOCK_SIZE", "20")),
+            seed_fn=self._get_max_product_id,
+        )
+        
+        # Optional live replica: a snapshot listener keeps the indexes current, so reads
+        # never fall back to TTL reloads while it is synced
+        self._replica: Optional[CatalogReplica] = None
+        if os.getenv("PRODUCT_REPLICA_ENABLED", "false").lower() == "true":
+            self.start_replica()
+    
+    def start_replica(self, collection_ref=None) -> CatalogReplica:
+        """Start the snapshot-listener replica (collection_ref defaults to the products collection)"""
+        if self._replica is None:
+            self._replica = CatalogReplica(
+                collection_ref or self.db.collection(self.collection_name),
+                on_reset=self._rebuild_indexes,
+                # Writes made through this service already notified their listeners
+                on_upsert=lambda product: self._index_product(product, notify=False),
+                on_remove=lambda product_id: self._unindex_product(product_id, notify=False),
+            )
+            self._replica.start()
+        return self._replica
     
-    def _is_cache_valid(self, key: str) -> bool:
-        """Check if cache is still valid"""
-        return (key in self._cache and 
-                key in self._cache_expiry and 
-                datetime.now() < self._cache_expiry[key])
+    def stop_replica(self) -> None:
+        """Stop the replica; reads go back to TTL-based reloads"""
+        if self._replica is not None:
+            self._replica.stop()
+            self._replica = None
+    
+    def _index_is_fresh(self) -> bool:
+        """Whether reads can be answered from the in-memory indexes"""
+        if self._replica is not None and self._replica.synced:
+            return True
+        return self._index.is_fresh(self.cache_duration)
+    
+    def _rebuild_indexes(self, products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace the indexes and cached list with a full catalog snapshot"""
+        products = sorted(products, key=lambda x: id_sort_key(x.get('id', 0)))
+        self._search_index.build(products)
+        self._facets.build(products)
+        self._featured.build(products)
+        self._top_this_week.build(products)
+        self._index.build(products)
+        self._clear_products_cache()
+        self._set_cache('products_all', products)
+        return products
     
     def _set_cache(self, key: str, data: Any) -> None:
         """Set cache with expiry"""
-        with self._cache_lock:
-            self._cache[key] = data
-            self._cache_expiry[key] = datetime.now() + timedelta(seconds=self.cache_duration)
+        self._cache.set(key, data)
     
     def _get_cache(self, key: str) -> Optional[Any]:
         """Get from cache if valid"""
-        with self._cache_lock:
-            if self._is_cache_valid(key):
-                return self._cache[key]
-            # Clean expired cache
-            if key in self._cache:
-                del self._cache[key]
-                del self._cache_expiry[key]
-            return None
+        return self._cache.get(key)
     
     def _clear_products_cache(self) -> None:
         """Clear products-related cache"""
-        with self._cache_lock:
-            keys_to_remove = [k for k in self._cache.keys() if k.startswith('products_')]
-            for key in keys_to_remove:
-                del self._cache[key]
-                del self._cache_expiry[key]
+        self._cache.invalidate_prefix('products_')
+        self._catalog_version += 1
+        self._columnar = None
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get catalog cache hit/miss counters"""
+        stats = self._cache.stats()
+        stats['single_flight'] = self._single_flight.stats()
+        stats['index'] = self._index.stats()
+        stats['search_index'] = self._search_index.stats()
+        stats['rankings'] = {"featured": self._featured.stats(), "top_this_week": self._top_this_week.stats()}
+        if self._replica is not None:
+            replica_stats = self._replica.stats()
+            # Non-zero drift means the replica and the indexes disagree on the catalog size
+            replica_stats['drift'] = replica_stats['doc_count'] - stats['index']['products']
+            stats['replica'] = replica_stats
+        return stats
+    
+    def _ensure_index(self) -> bool:
+        """Make sure the in-memory indexes reflect a recent full load"""
+        if not self._index_is_fresh():
+            self._single_flight.do('products_all', self._load_all_products)
+        return self._index.ready
+    
+    async def _ensure_index_async(self) -> bool:
+        """Awaitable _ensure_index that loads the catalog off the event loop"""
+        if not self._index_is_fresh():
+            await self._single_flight.do_async('products_all', self._load_all_products)
+        return self._index.ready
+    
+    def add_write_listener(self, listener: Callable[[str, List[int]], None]) -> None:
+        """Register a callback receiving ('upsert' | 'delete', product_ids) after writes"""
+        self._write_listeners.append(listener)
+    
+    def _notify_write(self, action: str, product_ids: List[int]) -> None:
+        for listener in self._write_listeners:
+            try:
+                listener(action, product_ids)
+            except Exception as e:
+                print(f"Error in product write listener: {e}")
+    
+    def _index_product(self, product: Dict[str, Any], clear_cache: bool = True, notify: bool = True) -> None:
+        """Apply a created/updated product to the indexes and drop derived cache entries"""
+        if self._index.ready and product:
+            previous = self._index.upsert(product)
+            self._search_index.upsert(product)
+            if previous is not None:
+                self._facets.remove(previous)
+            self._facets.add(product)
+            self._featured.upsert(product)
+            self._top_this_week.upsert(product)
+        if notify and product and product.get('id') is not None:
+            self._notify_write('upsert', [product['id']])
+        if clear_cache:
+            self._clear_products_cache()
+    
+    def _unindex_product(self, product_id: int, clear_cache: bool = True, notify: bool = True) -> None:
+        """Remove a deleted product from the indexes and drop derived cache entries"""
+        if self._index.ready:
+            previous = self._index.remove(product_id)
+            self._search_index.remove(product_id)
+            self._featured.remove(product_id)
+            self._top_this_week.remove(product_id)
+            if previous is not None:
+                self._facets.remove(previous)
+        if notify:
+            self._notify_write('delete', [product_id])
+        if clear_cache:
+            self._clear_products_cache()
     
     def create_product(self, product_data: ProductCreate) -> Dict[str, Any]:
         """Create a new product"""
@@ -64,8 +212,29 @@ class ProductService:
             product_dict['updated_at'] = time.time()
             
             # Add to Firestore
+            # create() fails instead of overwriting if the ID is somehow already taken
             doc_ref = self.db.collection(self.collection_name).document(str(next_id))
-            doc_ref.set(product_dict)
+            doc_ref.create(product_dict)
+            self._index_product(product_dict)
+            
+            return {"success": True, "product_id": next_id, "data": product_dict}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    async def create_product_async(self, product_data: ProductCreate) -> Dict[str, Any]:
+        """Create a new product without blocking the event loop"""
+        try:
+            # Block reservations are a sync transaction; run them off the loop
+            next_id = (await asyncio.to_thread(self._id_allocator.allocate, 1))[0]
+            
+            product_dict = product_data.dict()
+            product_dict['id'] = next_id
+            product_dict['created_at'] = time.time()
+            product_dict['updated_at'] = time.time()
+            
+            doc_ref = self.async_db.collection(self.collection_name).document(str(next_id))
+            await doc_ref.create(product_dict)
+            self._index_product(product_dict)
             
             return {"success": True, "product_id": next_id, "data": product_dict}
         except Exception as e:
@@ -74,6 +243,11 @@ class ProductService:
     def get_product_by_id(self, product_id: int) -> Optional[Dict[str, Any]]:
         """Get product by ID"""
         try:
+            if self._index_is_fresh():
+                product = self._index.get(product_id)
+                if product is not None:
+                    return product
+            
             doc_ref = self.db.collection(self.collection_name).document(str(product_id))
             doc = doc_ref.get()
             
@@ -84,8 +258,103 @@ class ProductService:
             print(f"Error getting product {product_id}: {e}")
             return None
     
+    async def get_product_by_id_async(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Get product by ID using the async client on index misses"""
+        try:
+            if self._index_is_fresh():
+                product = self._index.get(product_id)
+                if product is not None:
+                    return product
+            
+            doc = await self.async_db.collection(self.collection_name).document(str(product_id)).get()
+            if doc.exists:
+                return doc.to_dict()
+            return None
+        except Exception as e:
+            print(f"Error getting product {product_id}: {e}")
+            return None
+    
+    def get_products_by_ids(self, product_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get several products in at most one round-trip, in request order (unknown IDs are skipped)"""
+        try:
+            requested = list(dict.fromkeys(product_ids))
+            
+            # Serve what we can from the in-memory catalog
+            found = {}
+            if self._index_is_fresh():
+                for product_id in requested:
+                    product = self._index.get(product_id)
+                    if product is not None:
+                        found[product_id] = product
+            
+            # Fetch the rest with a single batched get_all
+            missing = {str(pid): pid for pid in requested if pid not in found}
+            if missing:
+                collection = self.db.collection(self.collection_name)
+                doc_refs = [collection.document(doc_id) for doc_id in missing]
+                for doc in self.db.get_all(doc_refs):
+                    if doc.exists:
+                        found[missing[doc.id]] = doc.to_dict()
+            
+            return [found[pid] for pid in requested if pid in found]
+        except Exception as e:
+            print(f"Error getting products {product_ids}: {e}")
+            return []
+    
+    async def get_products_by_ids_async(self, product_ids: List[int]) -> List[Dict[str, Any]]:
+        """Awaitable get_products_by_ids; misses are fetched with one async get_all"""
+        try:
+            requested = list(dict.fromkeys(product_ids))
+            
+            found = {}
+            if self._index_is_fresh():
+                for product_id in requested:
+                    product = self._index.get(product_id)
+                    if product is not None:
+                        found[product_id] = product
+            
+            missing = {str(pid): pid for pid in requested if pid not in found}
+            if missing:
+                collection = self.async_db.collection(self.collection_name)
+                doc_refs = [collection.document(doc_id) for doc_id in missing]
+                async for doc in self.async_db.get_all(doc_refs):
+                    if doc.exists:
+                        found[missing[doc.id]] = doc.to_dict()
+            
+            return [found[pid] for pid in requested if pid in found]
+        except Exception as e:
+            print(f"Error getting products {product_ids}: {e}")
+            return []
+    
     def get_all_products(self) -> List[Dict[str, Any]]:
         """Get all products"""
+        cached = self._get_cache('products_all')
+        if cached is None:
+            # Concurrent cold-cache callers share a single Firestore scan
+            cached = self._single_flight.do('products_all', self._load_all_products)
+        # Hand out a fresh list so callers can sort/slice without touching the cache
+        return list(cached)
+    
+    async def get_all_products_async(self) -> List[Dict[str, Any]]:
+        """Get all products without blocking the event loop on a cold cache"""
+        cached = self._get_cache('products_all')
+        if cached is None:
+            cached = await self._single_flight.do_async('products_all', self._load_all_products)
+        return list(cached)
+    
+    def _load_all_products(self) -> List[Dict[str, Any]]:
+        """Stream the full products collection and populate the cache"""
+        # Writes only invalidate the cached list; while the indexes are fresh,
+        # rebuild it from memory instead of rescanning Firestore
+        if self._index_is_fresh():
+            products = self._index.all_products()
+            if self._replica is not None and self._replica.synced:
+                ttl = self.cache_duration
+            else:
+                ttl = max(self.cache_duration - self._index.age(), 1)
+            self._cache.set('products_all', products, ttl=ttl)
+            return products
+        
         try:
             docs = self.db.collection(self.collection_name).get()
             products = []
@@ -94,13 +363,58 @@ class ProductService:
                 product_data = doc.to_dict()
                 products.append(product_data)
             
-            # Sort by ID
-            products.sort(key=lambda x: x.get('id', 0))
-            return products
+            return self._rebuild_indexes(products)
         except Exception as e:
             print(f"Error getting all products: {e}")
             return []
     
+    def list_products(self, after_id: Optional[int] = None, page_size: int = 50,
+                      fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get one keyset page of products ordered by ID, optionally projected to `fields`"""
+        try:
+            if fields is not None and 'id' not in fields:
+                fields = ['id'] + list(fields)
+            
+            if self._index_is_fresh():
+                products = self._index.page(after_id, page_size)
+                if fields is not None:
+                    products = [{f: p[f] for f in fields if f in p} for p in products]
+            else:
+                query = self.db.collection(self.collection_name).order_by('id')
+                if after_id is not None:
+                    query = query.start_after({'id': after_id})
+                if fields is not None:
+                    query = query.select(fields)
+                products = [doc.to_dict() for doc in query.limit(page_size).get()]
+            
+            next_after_id = products[-1].get('id') if len(products) == page_size else None
+            return {"products": products, "next_after_id": next_after_id, "page_size": page_size}
+        except Exception as e:
+            print(f"Error listing products: {e}")
+            return {"products": [], "next_after_id": None, "page_size": page_size}
+    
+    async def list_products_async(self, after_id: Optional[int] = None, page_size: int = 50,
+                                  fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Awaitable list_products; falls back to an async Firestore query when the index is stale"""
+        if self._index_is_fresh():
+            return self.list_products(after_id, page_size, fields)
+        try:
+            if fields is not None and 'id' not in fields:
+                fields = ['id'] + list(fields)
+            
+            query = self.async_db.collection(self.collection_name).order_by('id')
+            if after_id is not None:
+                query = query.start_after({'id': after_id})
+            if fields is not None:
+                query = query.select(fields)
+            products = [doc.to_dict() for doc in await query.limit(page_size).get()]
+            
+            next_after_id = products[-1].get('id') if len(products) == page_size else None
+            return {"products": products, "next_after_id": next_after_id, "page_size": page_size}
+        except Exception as e:
+            print(f"Error listing products: {e}")
+            return {"products": [], "next_after_id": None, "page_size": page_size}
+    
     def update_product(self, product_id: int, product_data: ProductUpdate) -> Dict[str, Any]:
         """Update product"""
         try:
@@ -118,6 +432,26 @@ class ProductService:
             
             # Get updated product
             updated_product = doc_ref.get().to_dict()
+            self._index_product(updated_product)
+            return {"success": True, "data": updated_product}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    async def update_product_async(self, product_id: int, product_data: ProductUpdate) -> Dict[str, Any]:
+        """Update product through the async client"""
+        try:
+            doc_ref = self.async_db.collection(self.collection_name).document(str(product_id))
+            
+            if not (await doc_ref.get()).exists:
+                return {"success": False, "error": "Product not found"}
+            
+            update_data = {k: v for k, v in product_data.dict().items() if v is not None}
+            update_data['updated_at'] = time.time()
+            
+            await doc_ref.update(update_data)
+            
+            updated_product = (await doc_ref.get()).to_dict()
+            self._index_product(updated_product)
             return {"success": True, "data": updated_product}
         except Exception as e:
             return {"success": False, "error": str(e)}
@@ -132,76 +466,296 @@ class ProductService:
                 return {"success": False, "error": "Product not found"}
             
             doc_ref.delete()
+            self._unindex_product(product_id)
             return {"success": True, "message": "Product deleted successfully"}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def search_products(self, filters: SearchFilters) -> List[Dict[str, Any]]:
-        """Search products with filters"""
+    async def delete_product_async(self, product_id: int) -> Dict[str, Any]:
+        """Delete product through the async client"""
         try:
-            query = self.db.collection(self.collection_name)
+            doc_ref = self.async_db.collection(self.collection_name).document(str(product_id))
             
-            # Apply filters
-            if filters.category and filters.category.lower() != 'all':
-                query = query.where(filter=FieldFilter("category", "==", filters.category))
+            if not (await doc_ref.get()).exists:
+                return {"success": False, "error": "Product not found"}
             
-            if filters.brand and filters.brand.lower() != 'all':
-                query = query.where(filter=FieldFilter("brand", "==", filters.brand))
+            await doc_ref.delete()
+            self._unindex_product(product_id)
+            return {"success": True, "message": "Product deleted successfully"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def _run_bulk(self, chunks: List[List[Any]],
+                  process_chunk: Callable[[List[Any]], Tuple[List[Dict[str, Any]], List[Any]]],
+                  apply_write: Callable[[Any], None]) -> Dict[str, Any]:
+        """Commit chunks on a bounded pool, then apply the committed writes to the indexes
+        and invalidate caches once, all on the calling thread"""
+        results: List[Dict[str, Any]] = []
+        if chunks:
+            writes: List[Any] = []
+            with ThreadPoolExecutor(max_workers=max(1, min(self.bulk_max_workers, len(chunks)))) as pool:
+                for chunk_results, chunk_writes in pool.map(process_chunk, chunks):
+                    results.extend(chunk_results)
+                    writes.extend(chunk_writes)
+            # Index/facet patches are applied in input order, never concurrently for one ID
+            for write in writes:
+                apply_write(write)
+            self._clear_products_cache()
+        
+        results.sort(key=lambda r: r['index'])
+        succeeded = sum(1 for r in results if r['success'])
+        return {
+            "success": succeeded == len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results,
+        }
+    
+    @staticmethod
+    def _chunked(items: List[Any]) -> List[List[Any]]:
+        return [items[i:i + BULK_BATCH_SIZE] for i in range(0, len(items), BULK_BATCH_SIZE)]
+    
+    def _get_existing(self, product_ids: List[int]) -> Dict[str, Dict[str, Any]]:
+        """Current documents for the given IDs keyed by document ID (one get_all round-trip)"""
+        collection = self.db.collection(self.collection_name)
+        existing = {}
+        for doc in self.db.get_all([collection.document(str(pid)) for pid in product_ids]):
+            if doc.exists:
+                # Raw doc.id: imported documents may have non-numeric IDs
+                existing[doc.id] = doc.to_dict()
+        return existing
+    
+    def bulk_create_products(self, products: List[ProductCreate]) -> Dict[str, Any]:
+        """Create many products with batched commits; returns per-item status in input order"""
+        try:
+            ids = self.reserve_product_ids(len(products))
+        except Exception as e:
+            return {"success": False, "error": f"Could not reserve product IDs: {e}"}
+        
+        collection = self.db.collection(self.collection_name)
+        now = time.time()
+        
+        def process_chunk(chunk: List[Tuple[int, int, ProductCreate]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+            batch = self.db.batch()
+            docs = []
+            for index, product_id, product_data in chunk:
+                product_dict = product_data.dict()
+                product_dict['id'] = product_id
+                product_dict['created_at'] = now
+                product_dict['updated_at'] = now
+                batch.create(collection.document(str(product_id)), product_dict)
+                docs.append((index, product_dict))
+            try:
+                batch.commit()
+            except Exception as e:
+                # A batch is atomic: none of its items were written
+                return [{"index": i, "product_id": d['id'], "success": False, "error": str(e)} for i, d in docs], []
+            return [{"index": i, "product_id": d['id'], "success": True} for i, d in docs], [d for _, d in docs]
+        
+        items = [(i, ids[i], product) for i, product in enumerate(products)]
+        return self._run_bulk(self._chunked(items), process_chunk,
+                              lambda product: self._index_product(product, clear_cache=False))
+    
+    def bulk_update_products(self, updates: List[Tuple[int, ProductUpdate]]) -> Dict[str, Any]:
+        """Apply many (product_id, ProductUpdate) pairs with batched commits; unknown IDs are reported, not written"""
+        collection = self.db.collection(self.collection_name)
+        
+        def process_chunk(chunk: List[Tuple[int, int, ProductUpdate]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+            results, written = [], []
+            try:
+                existing = self._get_existing([product_id for _, product_id, _ in chunk])
+            except Exception as e:
+                return [{"index": i, "product_id": pid, "success": False, "error": str(e)} for i, pid, _ in chunk], []
             
-            if filters.min_price:
-                query = query.where(filter=FieldFilter("price", ">=", filters.min_price))
+            batch = self.db.batch()
+            now = time.time()
+            for index, product_id, product_data in chunk:
+                current = existing.get(str(product_id))
+                if current is None:
+                    results.append({"index": index, "product_id": product_id, "success": False, "error": "Product not found"})
+                    continue
+                update_data = {k: v for k, v in product_data.dict().items() if v is not None}
+                update_data['updated_at'] = now
+                batch.update(collection.document(str(product_id)), update_data)
+                written.append((index, product_id, {**current, **update_data}))
             
-            if filters.max_price:
-                query = query.where(filter=FieldFilter("price", "<=", filters.max_price))
+            if written:
+                try:
+                    batch.commit()
+                except Exception as e:
+                    return results + [{"index": i, "product_id": pid, "success": False, "error": str(e)} for i, pid, _ in written], []
+            results.extend({"index": index, "product_id": product_id, "success": True} for index, product_id, _ in written)
+            return results, [updated_product for _, _, updated_product in written]
+        
+        items = [(i, product_id, product_data) for i, (product_id, product_data) in enumerate(updates)]
+        return self._run_bulk(self._chunked(items), process_chunk,
+                              lambda product: self._index_product(product, clear_cache=False))
+    
+    def bulk_delete_products(self, product_ids: List[int]) -> Dict[str, Any]:
+        """Delete many products with batched commits; unknown IDs are reported as not found"""
+        collection = self.db.collection(self.collection_name)
+        
+        def process_chunk(chunk: List[Tuple[int, int]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+            results, deleted = [], []
+            try:
+                existing = self._get_existing([product_id for _, product_id in chunk])
+            except Exception as e:
+                return [{"index": i, "product_id": pid, "success": False, "error": str(e)} for i, pid in chunk], []
             
-            # Get results
-            docs = query.get()
-            products = []
+            batch = self.db.batch()
+            for index, product_id in chunk:
+                if str(product_id) not in existing:
+                    results.append({"index": index, "product_id": product_id, "success": False, "error": "Product not found"})
+                    continue
+                batch.delete(collection.document(str(product_id)))
+                deleted.append((index, product_id))
             
-            for doc in docs:
-                product_data = doc.to_dict()
-                
-                # Apply keyword search on client side (Firestore doesn't support full-text search)
-                if filters.keywords:
-                    keywords = filters.keywords.lower().split(',')
-                    keywords = [kw.strip() for kw in keywords if kw.strip()]
-                    
-                    # Check if any keyword matches name, description, or tags
-                    product_text = f"{product_data.get('name', '')} {product_data.get('description', '')}".lower()
-                    product_tags = [tag.lower() for tag in product_data.get('tags', [])]
-                    
-                    keyword_match = False
-                    for keyword in keywords:
-                        if (keyword in product_text or 
-                            any(keyword in tag for tag in product_tags)):
-                            keyword_match = True
-                            break
-                    
-                    if not keyword_match:
-                        continue
-                
+            if deleted:
+                try:
+                    batch.commit()
+                except Exception as e:
+                    return results + [{"index": i, "product_id": pid, "success": False, "error": str(e)} for i, pid in deleted], []
+            results.extend({"index": index, "product_id": product_id, "success": True} for index, product_id in deleted)
+            return results, [product_id for _, product_id in deleted]
+        
+        items = list(enumerate(product_ids))
+        return self._run_bulk(self._chunked(items), process_chunk,
+                              lambda product_id: self._unindex_product(product_id, clear_cache=False))
+    
+    def _search_indexed(self, filters: SearchFilters) -> List[Dict[str, Any]]:
+        """Answer a search from the in-memory indexes only (never loads the catalog)"""
+        # Category/brand/price are answered by the in-memory indexes
+        category = filters.category if filters.category and filters.category.lower() != 'all' else None
+        brand = filters.brand if filters.brand and filters.brand.lower() != 'all' else None
+        min_price = filters.min_price or None
+        max_price = filters.max_price or None
+        
+        if not filters.keywords:
+            return self._index.query(category=category, brand=brand, min_price=min_price, max_price=max_price)
+        
+        # Keywords go through the inverted index, restricted to the filtered IDs and ranked by BM25
+        candidate_ids = self._index.query_ids(category=category, brand=brand, min_price=min_price, max_price=max_price)
+        keywords = filters.keywords.replace(',', ' ')
+        products = []
+        for product_id, _score in self._search_index.search(keywords, candidate_ids):
+            product_data = self._index.get(product_id)
+            if product_data is not None:
                 products.append(product_data)
-            
-            # Sort by ID
-            products.sort(key=lambda x: x.get('id', 0))
-            return products
+        
+        return products
+    
+    def search_products(self, filters: SearchFilters) -> List[Dict[str, Any]]:
+        """Search products with filters"""
+        try:
+            if not self._ensure_index():
+                return []
+            return self._search_indexed(filters)
+        except Exception as e:
+            print(f"Error searching products: {e}")
+            return []
+    
+    async def search_products_async(self, filters: SearchFilters) -> List[Dict[str, Any]]:
+        """Search products, loading a stale catalog off the event loop first"""
+        try:
+            if not await self._ensure_index_async():
+                return []
+            return self._search_indexed(filters)
         except Exception as e:
             print(f"Error searching products: {e}")
             return []
     
+    def _featured_indexed(self, limit: int) -> List[Dict[str, Any]]:
+        ranked = self._featured.top(limit)
+        if not ranked:
+            return self._index.page(None, limit)
+        products = (self._index.get(product_id) for product_id, _score in ranked)
+        return [product for product in products if product is not None]
+    
+    def get_featured_products(self, limit: int = 6) -> List[Dict[str, Any]]:
+        """Featured products by rating, or the first products when none are flagged"""
+        try:
+            if not self._ensure_index():
+                return []
+            return self._featured_indexed(limit)
+        except Exception as e:
+            print(f"Error getting featured products: {e}")
+            return []
+    
+    async def get_featured_products_async(self, limit: int = 6) -> List[Dict[str, Any]]:
+        try:
+            if not await self._ensure_index_async():
+                return []
+            return self._featured_indexed(limit)
+        except Exception as e:
+            print(f"Error getting featured products: {e}")
+            return []
+    
+    def _top_this_week_indexed(self, limit: int) -> List[Dict[str, Any]]:
+        ranked = self._top_this_week.top(limit)
+        if not ranked:
+            return self._index.page(None, limit)
+        # Only the returned products are copied to attach the score
+        products = []
+        for product_id, score in ranked:
+            product = self._index.get(product_id)
+            if product is not None:
+                products.append(dict(product, popularity_score=score))
+        return products
+    
+    def get_top_products_this_week(self, limit: int = 6) -> List[Dict[str, Any]]:
+        """Top products by weekly sales, views and rating, with their popularity_score"""
+        try:
+            if not self._ensure_index():
+                return []
+            return self._top_this_week_indexed(limit)
+        except Exception as e:
+            print(f"Error getting top products this week: {e}")
+            return []
+    
+    async def get_top_products_this_week_async(self, limit: int = 6) -> List[Dict[str, Any]]:
+        try:
+            if not await self._ensure_index_async():
+                return []
+            return self._top_this_week_indexed(limit)
+        except Exception as e:
+            print(f"Error getting top products this week: {e}")
+            return []
+    
+    def get_columnar_catalog(self) -> ColumnarCatalog:
+        """NumPy column snapshot of the catalog (rows in ID order)"""
+        catalog = self._columnar
+        if catalog is None:
+            version = self._catalog_version
+            catalog = ColumnarCatalog(self.get_all_products())
+            # Don't publish a snapshot that a concurrent write already made stale
+            if version == self._catalog_version:
+                self._columnar = catalog
+        return catalog
+    
+    async def get_columnar_catalog_async(self) -> ColumnarCatalog:
+        catalog = self._columnar
+        if catalog is None:
+            version = self._catalog_version
+            products = await self.get_all_products_async()
+            catalog = await asyncio.to_thread(ColumnarCatalog, products)
+            if version == self._catalog_version:
+                self._columnar = catalog
+        return catalog
+    
     def get_categories(self) -> List[str]:
         """Get all unique categories"""
         try:
-            docs = self.db.collection(self.collection_name).get()
-            categories = set()
-            
-            for doc in docs:
-                product_data = doc.to_dict()
-                category = product_data.get('category')
-                if category:
-                    categories.add(category)
-            
-            return sorted(list(categories))
+            self._ensure_index()
+            return list(self._facets.categories())
+        except Exception as e:
+            print(f"Error getting categories: {e}")
+            return []
+    
+    async def get_categories_async(self) -> List[str]:
+        """Get all unique categories, loading the catalog off the event loop if needed"""
+        try:
+            await self._ensure_index_async()
+            return list(self._facets.categories())
         except Exception as e:
             print(f"Error getting categories: {e}")
             return []
@@ -209,36 +763,49 @@ class ProductService:
     def get_brands(self) -> List[str]:
         """Get all unique brands"""
         try:
-            docs = self.db.collection(self.collection_name).get()
-            brands = set()
-            
-            for doc in docs:
-                product_data = doc.to_dict()
-                brand = product_data.get('brand')
-                if brand:
-                    brands.add(brand)
-            
-            return sorted(list(brands))
+            self._ensure_index()
+            return list(self._facets.brands())
         except Exception as e:
             print(f"Error getting brands: {e}")
             return []
     
-    def _get_next_product_id(self) -> int:
-        """Get next available product ID"""
+    async def get_brands_async(self) -> List[str]:
+        """Get all unique brands, loading the catalog off the event loop if needed"""
         try:
-            docs = self.db.collection(self.collection_name).get()
-            max_id = 0
-            
-            for doc in docs:
-                product_data = doc.to_dict()
-                product_id = product_data.get('id', 0)
-                if product_id > max_id:
-                    max_id = product_id
-            
-            return max_id + 1
+            await self._ensure_index_async()
+            return list(self._facets.brands())
+        except Exception as e:
+            print(f"Error getting brands: {e}")
+            return []
+    
+    async def get_facets_async(self) -> Dict[str, Any]:
+        """Get category, brand and price-bucket counts"""
+        try:
+            await self._ensure_index_async()
+            return self._facets.snapshot()
         except Exception as e:
-            print(f"Error getting next product ID: {e}")
-            return 1
+            print(f"Error getting facets: {e}")
+            return {"categories": {}, "brands": {}, "price_buckets": [], "total_products": 0}
+    
+    def _get_next_product_id(self) -> int:
+        """Get next available product ID"""
+        return self._id_allocator.allocate(1)[0]
+    
+    def reserve_product_ids(self, count: int) -> List[int]:
+        """Reserve a range of product IDs for bulk inserts"""
+        return self._id_allocator.allocate(count)
+    
+    def _get_max_product_id(self) -> int:
+        """Seed for the ID counter: highest existing product ID + 1 (one indexed read)"""
+        # The range filter only matches numeric IDs, so imported string IDs can't win the sort
+        docs = (self.db.collection(self.collection_name)
+                .where('id', '>=', 0)
+                .order_by('id', direction=firestore.Query.DESCENDING)
+                .limit(1)
+                .get())
+        for doc in docs:
+            return int(doc.to_dict().get('id', 0)) + 1
+        return 1
 
 # Global service instance
 product_service = ProductService()
@@ -3,7 +3,10 @@ from fastapi import APIRouter, HTTPException, Query, UploadFile, File
 from typing import Dict, Any, Optional
 =======
 from typing import Dict, Any, Optional, List
+import json
+from fastapi.responses import StreamingResponse
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 from services.ai_service import AIService
@@ -25,8 +28,13 @@ class ConversationMessage(BaseModel):
 class SearchRequest(BaseModel):
     limit: Optional[int] = 10
     messages: List[Dict[str, str]]
+    llm_copy: Optional[bool] = False  # LLM-written intro/header instead of the localized templates
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
 
+class IntentCacheWarmRequest(BaseModel):
+    queries: List[str]
+    max_workers: Optional[int] = 4
+
 class EmbedProductsResponse(BaseModel):
     status: str
     message: str
@@ -49,6 +57,7 @@ class SearchResponse(BaseModel):
     products: Optional[list] = None
     total_results: Optional[int] = None
     messages: Optional[List[Dict[str, str]]] = None  # Added messages for conversation
+    debug: Optional[Dict[str, Any]] = None  # Per-stage pipeline timings
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
 
 class VoiceSearchResponse(BaseModel):
@@ -73,6 +82,7 @@ class VoiceSearchResponse(BaseModel):
     products: Optional[list] = None
     total_results: Optional[int] = None
     messages: Optional[List[Dict[str, str]]] = None  # Added messages for conversation
+    debug: Optional[Dict[str, Any]] = None  # Per-stage pipeline timings
 
 @router.get("/ai/embed-products", response_model=EmbedProductsResponse)
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
@@ -87,6 +97,18 @@ async def embed_all_products():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to embed products: {str(e)}")
 
+@router.post("/ai/embed-products/rebuild", response_model=EmbedProductsResponse)
+async def rebuild_product_embeddings():
+    """
+    Rebuild all embeddings into a new versioned collection and switch search to it once validated.
+    Use after changing the embedding model, the product text template or HNSW settings.
+    """
+    try:
+        result = await ai_service.rebuild_embeddings()
+        return EmbedProductsResponse(**result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild embeddings: {str(e)}")
+
 @router.post("/ai/search", response_model=SearchResponse)
 async def semantic_search(search_request: SearchRequest):
     """
@@ -105,8 +127,9 @@ async def semantic_search(search_request: SearchRequest):
     """
     try:
         result = await ai_service.semantic_search_middleware(
-            messages=search_request.messages
-            #update limit later
+            messages=search_request.messages,
+            limit=search_request.limit or 10,
+            llm_copy=bool(search_request.llm_copy)
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
         )
         return SearchResponse(**result)
@@ -131,7 +154,8 @@ async def semantic_search_get(
     """
     try:
         result = await ai_service.semantic_search_middleware(
-            messages=[{"role": "user", "content": q}]
+            messages=[{"role": "user", "content": q}],
+            limit=limit
         )
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
         return result
@@ -155,6 +179,31 @@ async def legacy_semantic_search(search_request: SearchRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@router.post("/ai/search/stream")
+async def semantic_search_stream(search_request: SearchRequest):
+    """
+    Same search as POST /ai/search, streamed as server-sent events.
+    Events in order: language, intent, products, copy (repeated, {"field", "delta"}) and done
+    (the full /ai/search response); error replaces the remaining events if the search fails.
+    """
+    async def event_stream():
+        try:
+            async for event, data in ai_service.semantic_search_stream(
+                messages=search_request.messages,
+                limit=search_request.limit or 10,
+                llm_copy=bool(search_request.llm_copy)
+            ):
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            error = {"status": "error", "message": f"Search failed: {str(e)}"}
+            yield f"event: error\ndata: {json.dumps(error)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
 @router.post("/ai/search-by-voice", response_model=VoiceSearchResponse)
 async def voice_search(
@@ -257,6 +306,18 @@ async def get_collection_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
+@router.post("/ai/intent-cache/warm")
+async def warm_intent_cache(warm_request: IntentCacheWarmRequest):
+    """
+    Pre-populate the search-intent cache with the given queries (see warm_intent_cache.py).
+    """
+    try:
+        return await run_in_threadpool(
+            ai_service.warm_intent_cache, warm_request.queries, max(1, min(warm_request.max_workers or 4, 16))
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to warm intent cache: {str(e)}")
+
 @router.get("/ai/health")
 async def health_check():
     """
@@ -1,16 +1,34 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from models import Product, ProductCreate, ProductUpdate, SearchFilters, ApiResponse
-from product_service import product_service
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from models import Product, ProductCreate, ProductUpdate, SearchFilters, ApiResponse, ProductBulkUpdateItem, ProductBulkDelete, ProductPage
+from product_service import product_service, parse_fields
 
 router = APIRouter(prefix="/products", tags=["products"])
 
 @router.get("/", response_model=List[Product])
-def get_all_products():
-    """Get all products"""
+def get_all_products(ids: Optional[str] = Query(None, description="Comma-separated product IDs to fetch in one batch")):
+    """Get all products, or only the given IDs"""
     try:
+        if ids:
+            product_ids = [int(pid) for pid in ids.split(',') if pid.strip()]
+            return product_service.get_products_by_ids(product_ids)
+        
         products = product_service.get_all_products()
         return products
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving products: {str(e)}")
+
+@router.get("/page", response_model=ProductPage)
+def get_products_page(
+    after_id: Optional[int] = Query(None, description="Return products with ID greater than this cursor"),
+    page_size: int = Query(50, ge=1, le=500, description="Number of products per page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or 'listing' for card fields")
+):
+    """Get one page of products ordered by ID, optionally projected to some fields"""
+    try:
+        return product_service.list_products(after_id, page_size, parse_fields(fields))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving products: {str(e)}")
 
@@ -42,10 +60,7 @@ def search_products(
 def get_featured_products(limit: int = 6):
     """Get featured products"""
     try:
-        # For now, return first 'limit' products from all products
-        # You can implement proper featured logic later
-        products = product_service.get_all_products()
-        return products[:limit]
+        return product_service.get_featured_products(limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving featured products: {str(e)}")
 
@@ -53,14 +68,37 @@ def get_featured_products(limit: int = 6):
 def get_top_products_this_week(limit: int = 6):
     """Get top products this week"""
     try:
-        # For now, return first 'limit' products from all products
-        # You can implement proper top products logic later (e.g., based on sales, ratings)
-        products = product_service.get_all_products()
-        return products[:limit]
+        return product_service.get_top_products_this_week(limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving top products: {str(e)}")
 
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
+# Bulk endpoints - MUST come before /{product_id}
+@router.post("/bulk")
+def bulk_create_products(products: List[ProductCreate]):
+    """Create many products in batched commits; returns per-item status"""
+    try:
+        return product_service.bulk_create_products(products)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating products: {str(e)}")
+
+@router.patch("/bulk")
+def bulk_update_products(updates: List[ProductBulkUpdateItem]):
+    """Update many products in batched commits; returns per-item status"""
+    try:
+        pairs = [(item.id, ProductUpdate(**item.dict(exclude={'id'}))) for item in updates]
+        return product_service.bulk_update_products(pairs)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating products: {str(e)}")
+
+@router.delete("/bulk")
+def bulk_delete_products(request: ProductBulkDelete):
+    """Delete many products in batched commits; returns per-item status"""
+    try:
+        return product_service.bulk_delete_products(request.ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting products: {str(e)}")
+
 @router.get("/{product_id}")
 def get_product(product_id: int):
     """Get product by ID"""
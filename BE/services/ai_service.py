@@ -1,13 +1,19 @@
 import os
 import json
 import asyncio
+import hashlib
 <<<<<<< HEAD
 =======
 import string
+from contextlib import aclosing
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
 import sys
 import tempfile
 import io
+import time
+import copy
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 <<<<<<< HEAD
 import openai
@@ -21,9 +27,19 @@ from langchain_core.tools import tool
 from pydantic import BaseModel, Field
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 from dotenv import load_dotenv
 from utils.product_keywords import get_product_keywords_from_dict
+from utils.embedding_refresher import EmbeddingRefresher
+from utils.embedding_batcher import EmbeddingBatcher
+from utils.collection_alias import CollectionAliases
+from utils.embedding_cache import EmbeddingCache, normalize_text
+from utils.ttl_cache import TTLCache
+from utils.search_context import SearchContext
+from utils.language_detector import detect_language as detect_language_locally
+from utils.intent_router import route_search, RouteStats, FAST_PATH, AGENT_PATH
+from utils.response_templates import ResponseTemplates
 
 # Handle OpenAI import with proper error handling
 try:
@@ -39,7 +55,6 @@ try:
     from langchain.agents import Tool as LC_Tool, create_openai_tools_agent, AgentExecutor
     from langchain.prompts import ChatPromptTemplate
     from langchain.schema import HumanMessage, SystemMessage
-    from langchain_core.messages import ToolMessage
     try:
         from langchain_openai import ChatOpenAI
     except ImportError:
@@ -73,7 +88,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from models import Product
-from product_service import ProductService
+from product_service import product_service
 <<<<<<< HEAD
 =======
 from services.middleware_service import MiddlewareService
@@ -110,8 +125,8 @@ class AIService:
         # Initialize or get collection
         self._initialize_collection()
         
-        # Initialize ProductService
-        self.product_service = ProductService()
+        # Shared instance, so its write listeners see every product write in this process
+        self.product_service = product_service
     
     def _initialize_collection(self):
         """Initialize or get the ChromaDB collection"""
@@ -137,6 +152,11 @@ class AIService:
                 model=self.embedding_model,
                 input=text,
                 encoding_format="float"
+            )
+            return response.data[0].embedding
+        except Exception as e:
+            print(f"Error getting embedding: {str(e)}")
+            return []
 =======
 # System instructions for the AI agent
 SYSTEM_INSTRUCTIONS = """
@@ -200,6 +220,8 @@ class AIService:
         
         if api_key and api_key != "None" and OPENAI_AVAILABLE:
             self.openai_client = openai.OpenAI(api_key=api_key)
+            # Used by the search pipeline so independent stages can overlap
+            self.async_openai_client = openai.AsyncOpenAI(api_key=api_key)
             self.openai_available = True
         else:
             if not OPENAI_AVAILABLE:
@@ -208,6 +230,7 @@ class AIService:
                 print("Warning: OpenAI API key not found.")
             print("AI features will be limited.")
             self.openai_client = None
+            self.async_openai_client = None
             self.openai_available = False
         
         try:
@@ -221,12 +244,64 @@ class AIService:
         
         self.collection_name = "products_embeddings"
         self.embedding_model = "text-embedding-3-small"
+        # Bump whenever _prepare_product_text changes, so the next embed run rebuilds side by side
+        self.product_text_version = 1
+        # Optional HNSW tuning; changing any of these also triggers a side-by-side rebuild
+        self.hnsw_params = {
+            key: int(os.getenv(env))
+            for key, env in (("hnsw:M", "CHROMA_HNSW_M"),
+                             ("hnsw:construction_ef", "CHROMA_HNSW_CONSTRUCTION_EF"),
+                             ("hnsw:search_ef", "CHROMA_HNSW_SEARCH_EF"))
+            if os.getenv(env)
+        }
+        # "products_embeddings" is an alias for the live versioned collection (products_embeddings_v{n})
+        self.collection_aliases = CollectionAliases(os.path.join("./chroma_db", "collection_aliases.json"))
+        self.retired_collection_ttl = float(os.getenv("CHROMA_RETIRED_COLLECTION_TTL", "3600"))
+        self.embedding_batcher = EmbeddingBatcher(self.openai_client, self.embedding_model) if self.openai_available else None
+        self.embedding_cache = EmbeddingCache(
+            os.getenv("EMBEDDING_CACHE_PATH", os.path.join("./chroma_db", "query_embeddings.sqlite3")),
+            max_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "5000")),
+        )
+        # Parsed search intents by (model, normalized input); only successful parses are stored
+        self.intent_cache = TTLCache(
+            max_entries=int(os.getenv("INTENT_CACHE_SIZE", "2000")),
+            ttl=float(os.getenv("INTENT_CACHE_TTL", "86400")),
+        )
+        # Optional JSONL log of intent-extraction inputs, read by warm_intent_cache.py
+        self.intent_query_log = os.getenv("INTENT_QUERY_LOG")
+        self._intent_log_lock = threading.Lock()
         self._initialize_collection()
-        self.product_service = ProductService()
+        # Shared instance, so its write listeners see every product write in this process
+        self.product_service = product_service
         self.middleware_service = MiddlewareService()
 
-        # ---- App state
-        self.USER_LANG_CODE = "en"
+        # ---- Keep Chroma in step with product writes (no full rebuilds)
+        self.embedding_refresher = EmbeddingRefresher(
+            self._reembed_products,
+            self._delete_product_embeddings,
+            batch_window=float(os.getenv("EMBEDDING_REFRESH_WINDOW", "2.0")),
+        )
+        self.product_service.add_write_listener(self.embedding_refresher.enqueue)
+        self.embedding_refresher.start()
+
+        # ---- Language (per-request state lives in SearchContext, not on this shared instance)
+        # Local detection answers most queries; the LLM is asked only below this confidence
+        self.language_min_confidence = float(os.getenv("LANGUAGE_DETECT_MIN_CONFIDENCE", "0.6"))
+        self.language_detections = {"local": 0, "llm": 0}
+
+        # ---- Routing: plain product queries skip the agent and go straight to search
+        self.fast_path_enabled = os.getenv("AI_FAST_PATH_ENABLED", "true").lower() == "true"
+        self.route_stats = RouteStats()
+
+        # ---- Response copy: localized templates by default, LLM copy only when a request asks for it
+        # or once generated in the background (RESPONSE_COPY_LLM_ENRICH) and cached per query
+        self.response_templates = ResponseTemplates()
+        self.copy_cache = TTLCache(
+            max_entries=int(os.getenv("RESPONSE_COPY_CACHE_SIZE", "2000")),
+            ttl=float(os.getenv("RESPONSE_COPY_CACHE_TTL", "86400")),
+        )
+        self.copy_enrichment_enabled = os.getenv("RESPONSE_COPY_LLM_ENRICH", "false").lower() == "true"
+        self._copy_enrichment_tasks: Dict[tuple, asyncio.Task] = {}
 
         # ---- LLM
         self.llm = ChatOpenAI(
@@ -241,11 +316,13 @@ class AIService:
             query: str = Field(..., description="Free-text product search.")
 
         @tool("find_products", args_schema=FindProductsInput, return_direct=True)
-        def find_products(query: str) -> str:
+        async def find_products(query: str, config: RunnableConfig) -> str:
             """Find and recommend products based on user's shopping needs. Only searches in: phone, camera, laptop, watch, camping gear categories."""
             
+            context = SearchContext.from_config(config)
+            context.tool_source = "find_products"
+            result = await context.timings.timed("search", self.semantic_search_async(query, context))
             # Return JSON-encoded string for consistent downstream parsing
-            result = self.semantic_search(query, 10, self.USER_LANG_CODE, searchFromTool="find_products")
             return json.dumps(result, ensure_ascii=False)
 
         class FindGiftsInput(BaseModel):
@@ -255,7 +332,7 @@ class AIService:
             occasion: Optional[str] = Field(default="general", description="e.g., 'birthday'")
 
         @tool("find_gifts", args_schema=FindGiftsInput, return_direct=True)
-        def find_gifts(recipient: str, user_input: str, category: Optional[str] = None, occasion: Optional[str] = "general") -> str:
+        async def find_gifts(recipient: str, user_input: str, config: RunnableConfig, category: Optional[str] = None, occasion: Optional[str] = "general") -> str:
             """
             Recommend gifts for a recipient. Category must be one of: phone/camera/laptop/watch/camping gear.
             If category is not provided or invalid, return a clarification message.
@@ -275,11 +352,15 @@ class AIService:
             
             print(f"DEBUG find_gifts - search_query: {category}")
 
-            # Get external gift products with labels
-            external_products = self._get_external_gift_products()
+            # Get external gift products with labels while the response copy is generated
+            context = SearchContext.from_config(config)
+            context.tool_source = "find_gifts"
+            (copy_template, lang_code), external_products = await asyncio.gather(
+                context.timings.timed("response_copy", self._make_response_copy_async(user_input, context)),
+                context.timings.timed("gift_products", asyncio.to_thread(self._get_external_gift_products)),
+            )
 
-            composed_response = self.make_response_sentence(user_input, external_products, self.USER_LANG_CODE)
-            print(f"DEBUG: Composed response: {composed_response}")
+            composed_response = self._finish_response_copy(copy_template, external_products, lang_code, category)
 
             result = {
                 "status": "success",
@@ -297,7 +378,7 @@ class AIService:
             }
             
             # Use the category for search
-            #  result = self.semantic_search(category, 5, self.USER_LANG_CODE, searchFromTool="find_gifts")
+            #  result = await self.semantic_search_async(category, context)
             
             
             
@@ -334,29 +415,140 @@ class AIService:
 
     # ---------- Vector DB init ----------
     def _initialize_collection(self):
+        self.live_collection_name = self.collection_aliases.resolve(self.collection_name)
+        self._alias_version = self.collection_aliases.version()
+        self._rebuild_collection = None
         try:
-            self.collection = self.chroma_client.get_collection(name=self.collection_name)
+            self.collection = self.chroma_client.get_collection(name=self.live_collection_name)
         except Exception:
             self.collection = self.chroma_client.create_collection(
-                name=self.collection_name,
-                metadata={"hnsw:space": "cosine"},
+                name=self.live_collection_name,
+                metadata=self._collection_metadata(),
                 embedding_function=None  # We provide our own embeddings
             )
+        self._stamp_legacy_metadata()
+        self.drop_retired_collections()
+
+    def _collection_metadata(self) -> Dict[str, Any]:
+        return {
+            "hnsw:space": "cosine",
+            **self.hnsw_params,
+            "embedding_model": self.embedding_model,
+            "product_text_version": self.product_text_version,
+        }
+
+    def _needs_rebuild(self) -> bool:
+        """True when the live collection was built with another model, text template or HNSW settings.
+        Settings the collection does not record (collections created before they were stamped) count as matching."""
+        current = self.collection.metadata or {}
+        return any(key in current and current[key] != value for key, value in self._collection_metadata().items())
+
+    def _stamp_legacy_metadata(self) -> None:
+        """Record the build settings on a collection created before they were stored, instead of rebuilding it"""
+        current = self.collection.metadata or {}
+        expected = self._collection_metadata()
+        missing = {key: expected[key] for key in ("embedding_model", "product_text_version") if key not in current}
+        if not missing:
+            return
+        try:
+            # modify() replaces the metadata and rejects hnsw:* keys; the HNSW index keeps its own copy of those
+            kept = {key: value for key, value in current.items() if not key.startswith("hnsw:")}
+            self.collection.modify(metadata={**kept, **missing})
+            print(f"Stamped legacy collection {self.live_collection_name} with {missing}")
+        except Exception as e:
+            print(f"Error stamping collection metadata: {e}")
+
+    def get_live_collection(self):
+        """The collection searches should use, following alias switches made by any process"""
+        version = self.collection_aliases.version()
+        if version != self._alias_version:
+            self._alias_version = version
+            live_name = self.collection_aliases.resolve(self.collection_name)
+            if live_name != self.live_collection_name:
+                try:
+                    self.collection = self.chroma_client.get_collection(name=live_name)
+                    self.live_collection_name = live_name
+                    print(f"Switched vector search to collection {live_name}")
+                except Exception as e:
+                    print(f"Error switching to collection {live_name}: {e}")
+        return self.collection
+
+    def _write_collections(self) -> List[Any]:
+        # Follow alias switches made by other processes, so writes never land in a retired collection
+        live = self.get_live_collection()
+        # While a rebuild runs, product writes go to both the live and the new collection
+        if self._rebuild_collection is not None:
+            return [live, self._rebuild_collection]
+        return [live]
+
+    def _next_collection_version(self) -> int:
+        prefix = f"{self.collection_name}_v"
+        versions = [0]
+        for collection in self.chroma_client.list_collections():
+            name = getattr(collection, "name", collection)  # Chroma >= 0.6 lists names only
+            if name.startswith(prefix) and name[len(prefix):].isdigit():
+                versions.append(int(name[len(prefix):]))
+        return max(versions) + 1
+
+    def _delete_collection(self, name: str) -> None:
+        try:
+            self.chroma_client.delete_collection(name)
+        except Exception as e:
+            print(f"Error deleting collection {name}: {e}")
+
+    def drop_retired_collections(self, max_age: Optional[float] = None) -> List[str]:
+        """Delete collections the alias moved away from more than `max_age` seconds ago"""
+        max_age = self.retired_collection_ttl if max_age is None else max_age
+        now = time.time()
+        dropped = []
+        for retired in self.collection_aliases.retired(self.collection_name):
+            if retired["name"] == self.live_collection_name or now - retired["retired_at"] < max_age:
+                continue
+            self._delete_collection(retired["name"])
+            dropped.append(retired["name"])
+        if dropped:
+            self.collection_aliases.forget_retired(self.collection_name, dropped)
+            print(f"Dropped retired collections: {', '.join(dropped)}")
+        return dropped
 
     # ---------- Embeddings / Whisper ----------
     def get_embedding(self, text: str) -> List[float]:
+        # Repeated queries are served from the memory/disk cache without an API round-trip
+        cached = self.embedding_cache.get(text, self.embedding_model)
+        if cached is not None:
+            return cached
         if not self.openai_available:
             print("OpenAI not available, returning empty embedding")
             return []
         try:
             response = self.openai_client.embeddings.create(
                 model=self.embedding_model, input=text, encoding_format="float"
->>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            self.embedding_cache.set(text, self.embedding_model, embedding)
+            return embedding
+        except Exception as e:
+            print(f"Error getting embedding: {str(e)}")
+            return []
+
+    async def get_embedding_async(self, text: str) -> List[float]:
+        cached = await self.embedding_cache.get_async(text, self.embedding_model)
+        if cached is not None:
+            return cached
+        if not self.openai_available:
+            print("OpenAI not available, returning empty embedding")
+            return []
+        try:
+            response = await self.async_openai_client.embeddings.create(
+                model=self.embedding_model, input=text, encoding_format="float"
+            )
+            embedding = response.data[0].embedding
+            await self.embedding_cache.set_async(text, self.embedding_model, embedding)
+            return embedding
         except Exception as e:
             print(f"Error getting embedding: {str(e)}")
             return []
+>>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
 <<<<<<< HEAD
     
     def transcribe_audio(self, audio_file) -> Dict[str, Any]:
@@ -643,6 +835,9 @@ class AIService:
     async def embed_all_products(self) -> Dict[str, Any]:
         if not self.openai_available:
             return {"status": "error", "message": "OpenAI API key not available. Cannot create embeddings."}
+        if self._needs_rebuild():
+            # A model, text template or HNSW change can't be applied in place without degrading search
+            return await self.rebuild_embeddings()
         try:
             products_data = self.product_service.get_all_products()
             if not products_data:
@@ -684,26 +879,11 @@ class AIService:
                     # Get embedding
                     embedding = self.get_embedding(text)
                     
-=======
-            if not products:
-                return {"status": "error", "message": "No valid products found"}
-            self.chroma_client.delete_collection(self.collection_name)
-            self._initialize_collection()
-            embeddings, documents, metadatas, ids = [], [], [], []
-            print(f"Processing {len(products)} products...")
-            batch_size = 10
-            for i in range(0, len(products), batch_size):
-                batch = products[i:i + batch_size]
-                for product in batch:
-                    text = self._prepare_product_text(product)
-                    embedding = self.get_embedding(text)
->>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
                     if embedding:
                         embeddings.append(embedding)
                         documents.append(text)
                         metadatas.append(self._prepare_product_metadata(product))
                         ids.append(f"product_{product.id}")
-<<<<<<< HEAD
                 
                 # Small delay between batches to respect rate limits
                 if i + batch_size < len(products):
@@ -747,44 +927,12 @@ class AIService:
                 "search_query": "main search terms for semantic search",
                 "filters": {{
                     "category": "category if mentioned (Camera, Laptop, Phone, Watch) or null",
-=======
-                if i + batch_size < len(products):
-                    await asyncio.sleep(1)
-            if embeddings:
-                self.collection.add(
-                    embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids
-                )
-                return {"status": "success", "message": f"Successfully embedded {len(embeddings)} products", "total_products": len(embeddings)}
-            else:
-                return {"status": "error", "message": "Failed to create embeddings"}
-        except Exception as e:
-            print(f"Error embedding products: {str(e)}")
-            return {"status": "error", "message": f"Error: {str(e)}"}
-
-    def extract_search_intent(self, user_input: str) -> Dict[str, Any]:
-        if not self.openai_available:
-            return {"search_query": user_input, "product_name": None, "product_description": None, "filters": {}}
-        try:
-            prompt = f"""
-            Extract product search information from the following user input. 
-            IMPORTANT: Only recognize these 5 categories: phone, camera, laptop, watch, camping gear. 
-            If the input refers to any other category (clothes, jewelry, furniture, etc.), set category to null.
-            
-            Return a JSON object with the following structure:
-            {{
-                "search_query": "main search terms for semantic search",
-                "product_name": "specific product name if mentioned, otherwise null",
-                "product_description": "specific product features, specifications, or descriptions mentioned, otherwise null",
-                "filters": {{
-                    "category": "ONLY one of: phone, camera, laptop, watch, camping gear - or null if not these categories",
->>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
                     "min_price": number or null,
                     "max_price": number or null,
                     "min_rating": number or null,
                     "min_discount": number or null
                 }}
             }}
-<<<<<<< HEAD
             
             User input: "{user_input}"
             
@@ -843,34 +991,312 @@ class AIService:
 
         # Price (numeric)
 =======
-            User input: "{user_input}"
-            Return only the JSON object, no additional text.
-            """
+            if not products:
+                return {"status": "error", "message": "No valid products found"}
+            print(f"Processing {len(products)} products...")
+            # Incremental: the live collection keeps serving while only new/changed products are embedded
+            result = await asyncio.to_thread(self._sync_products_to_collection, products)
+
+            removed = self._drop_missing_products(self.collection, products_data)
+
+            if result["failed"]:
+                print(f"Failed to embed {result['failed']} products")
+            if result["failed"] and not (result["embedded"] or result["unchanged"] or result["metadata_updated"]):
+                return {"status": "error", "message": "Failed to create embeddings"}
+            return {
+                "status": "success",
+                "message": (f"Embedded {result['embedded']} new/changed products, refreshed metadata of "
+                            f"{result['metadata_updated']}, skipped {result['unchanged']} unchanged, removed {removed}"),
+                "total_products": self.collection.count(),
+            }
+        except Exception as e:
+            print(f"Error embedding products: {str(e)}")
+            return {"status": "error", "message": f"Error: {str(e)}"}
+
+    async def rebuild_embeddings(self) -> Dict[str, Any]:
+        """Blue/green rebuild: fill a new versioned collection while search keeps using the live one,
+        validate it, then switch the alias. The old collection is dropped after the retention period."""
+        if not self.openai_available:
+            return {"status": "error", "message": "OpenAI API key not available. Cannot create embeddings."}
+        if self._rebuild_collection is not None:
+            return {"status": "error", "message": "An embedding rebuild is already in progress"}
+        self.drop_retired_collections()
+
+        new_name = f"{self.collection_name}_v{self._next_collection_version()}"
+        try:
+            new_collection = self.chroma_client.create_collection(
+                name=new_name,
+                metadata=self._collection_metadata(),
+                embedding_function=None
+            )
+        except Exception as e:
+            return {"status": "error", "message": f"Error creating collection {new_name}: {str(e)}"}
+        self._rebuild_collection = new_collection
+        try:
+            products_data = self.product_service.get_all_products()
+            products = self._products_from_dicts(products_data)
+            if not products:
+                raise ValueError("No valid products found")
+            print(f"Rebuilding embeddings for {len(products)} products into {new_name}...")
+            reused = await asyncio.to_thread(self._copy_reusable_embeddings, self.collection, new_collection)
+            result = await asyncio.to_thread(self._sync_products_to_collection, products, new_collection)
+            self._drop_missing_products(new_collection, products_data)
+            if result["failed"]:
+                raise ValueError(f"failed to embed {result['failed']} products")
+            problem = await asyncio.to_thread(self._validate_collection, new_collection, len(products))
+            if problem:
+                raise ValueError(f"validation failed: {problem}")
+        except Exception as e:
+            self._rebuild_collection = None
+            self._delete_collection(new_name)
+            print(f"Error rebuilding embeddings: {str(e)}")
+            return {"status": "error", "message": f"Rebuild aborted, still serving {self.live_collection_name}: {str(e)}"}
+
+        previous = self.collection_aliases.switch(self.collection_name, new_name)
+        self.collection = new_collection
+        self.live_collection_name = new_name
+        self._alias_version = self.collection_aliases.version()
+        self._rebuild_collection = None
+        return {
+            "status": "success",
+            "message": (f"Switched search to {new_name} (reused {reused} vectors, embedded {result['embedded']}); "
+                        f"{previous} will be dropped after {int(self.retired_collection_ttl)}s"),
+            "total_products": new_collection.count(),
+        }
+
+    def _products_from_dicts(self, products_data: List[Dict[str, Any]]) -> List[Product]:
+        products = []
+        for product_dict in products_data:
+            try:
+                products.append(Product(**product_dict))
+            except Exception as e:
+                print(f"Error converting product {product_dict.get('id', 'unknown')}: {e}")
+        return products
+
+    def _copy_reusable_embeddings(self, source, target, page_size: int = 1000) -> int:
+        """Copy vectors made by the current model into `target`, so a rebuild only pays for changed texts"""
+        copied = offset = 0
+        while True:
+            page = source.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            offset += len(page["ids"])
+            keep = [i for i, metadata in enumerate(page["metadatas"])
+                    if metadata and metadata.get("content_hash") and metadata.get("embedding_model") == self.embedding_model]
+            if keep:
+                target.upsert(
+                    ids=[page["ids"][i] for i in keep],
+                    embeddings=[page["embeddings"][i] for i in keep],
+                    documents=[page["documents"][i] for i in keep],
+                    metadatas=[page["metadatas"][i] for i in keep],
+                )
+                copied += len(keep)
+        return copied
+
+    def _validate_collection(self, collection, expected_count: int) -> Optional[str]:
+        """None when the collection is complete and answers queries, otherwise what is wrong"""
+        count = collection.count()
+        if count < expected_count:
+            return f"{count} entries, expected {expected_count}"
+        sample = collection.get(limit=1, include=["embeddings"])
+        if not sample["ids"]:
+            return "collection is empty"
+        # A stored vector must come back as its own nearest neighbour
+        hits = collection.query(query_embeddings=[list(sample["embeddings"][0])], n_results=1, include=["distances"])
+        if not hits["distances"][0] or hits["distances"][0][0] > 1e-3:
+            return "validation query did not find a stored product"
+        return None
+
+    def _drop_missing_products(self, collection, products_data: List[Dict[str, Any]]) -> int:
+        """Delete entries of products that are no longer in the catalog"""
+        live_ids = {f"product_{p.get('id')}" for p in products_data}
+        removed = [entry_id for entry_id in collection.get(include=[])["ids"] if entry_id not in live_ids]
+        if removed:
+            collection.delete(ids=removed)
+        return len(removed)
+
+    def _reembed_products(self, product_ids: List[int]) -> None:
+        """Re-embed the given products and upsert them into the collection"""
+        products_by_id = {p.get("id"): p for p in self.product_service.get_products_by_ids(product_ids)}
+        # Products deleted since they were queued are dropped from the index instead
+        gone = [pid for pid in product_ids if pid not in products_by_id]
+        if gone:
+            self._delete_product_embeddings(gone)
+        if not products_by_id or not self.openai_available:
+            return
+
+        products = self._products_from_dicts(list(products_by_id.values()))
+        if products:
+            for collection in self._write_collections():
+                result = self._sync_products_to_collection(products, collection)
+                print(f"Refreshed embeddings for {result['embedded']} products, metadata for {result['metadata_updated']}")
+
+    def _sync_products_to_collection(self, products: List[Product], collection=None) -> Dict[str, int]:
+        """Embed only products whose text hash or embedding model changed; refresh metadata of the rest"""
+        if collection is None:
+            collection = self.collection
+        entries = {}
+        for product in products:
+            text = self._prepare_product_text(product)
+            metadata = self._prepare_product_metadata(product)
+            metadata["content_hash"] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            metadata["embedding_model"] = self.embedding_model
+            entries[f"product_{product.id}"] = (text, metadata)
+
+        existing = collection.get(ids=list(entries), include=["metadatas"])
+        current = dict(zip(existing["ids"], existing["metadatas"]))
+
+        to_embed, to_update = [], []
+        for entry_id, (text, metadata) in entries.items():
+            old = current.get(entry_id)
+            if (old is None or old.get("content_hash") != metadata["content_hash"]
+                    or old.get("embedding_model") != self.embedding_model):
+                to_embed.append(entry_id)
+            elif old != metadata:
+                # Same text, so the vector is still valid; only price/rating/etc. moved
+                to_update.append(entry_id)
+
+        if to_update:
+            collection.update(ids=to_update, metadatas=[entries[i][1] for i in to_update])
+        embedded = failed = 0
+        if to_embed:
+            embedded, failed = self.embedding_batcher.embed_into_collection(
+                collection, to_embed, [entries[i][0] for i in to_embed], [entries[i][1] for i in to_embed]
+            )
+        return {
+            "embedded": embedded,
+            "failed": failed,
+            "metadata_updated": len(to_update),
+            "unchanged": len(entries) - len(to_embed) - len(to_update),
+        }
+
+    def _delete_product_embeddings(self, product_ids: List[int]) -> None:
+        for collection in self._write_collections():
+            collection.delete(ids=[f"product_{pid}" for pid in product_ids])
+
+    def _search_intent_messages(self, user_input: str) -> List[Dict[str, str]]:
+        prompt = f"""
+        Extract product search information from the following user input. 
+        IMPORTANT: Only recognize these 5 categories: phone, camera, laptop, watch, camping gear. 
+        If the input refers to any other category (clothes, jewelry, furniture, etc.), set category to null.
+        
+        Return a JSON object with the following structure:
+        {{
+            "search_query": "main search terms for semantic search",
+            "product_name": "specific product name if mentioned, otherwise null",
+            "product_description": "specific product features, specifications, or descriptions mentioned, otherwise null",
+            "filters": {{
+                "category": "ONLY one of: phone, camera, laptop, watch, camping gear - or null if not these categories",
+                "min_price": number or null,
+                "max_price": number or null,
+                "min_rating": number or null,
+                "min_discount": number or null
+            }}
+        }}
+        User input: "{user_input}"
+        Return only the JSON object, no additional text.
+        """
+        return [
+            {"role": "system", "content": "You are a helpful assistant that extracts product search intent from user queries. ONLY recognize these 5 product categories: phone, camera, laptop, watch, camping gear. Ignore any other categories."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _cached_search_intent(self, user_input: str, log_query: bool):
+        """(cache key, cached intent or None) for an intent-extraction input"""
+        if log_query:
+            self._log_intent_query(user_input)
+        cache_key = (os.getenv("OPENAI_MODEL_ID"), normalize_text(user_input))
+        cached = self.intent_cache.get(cache_key)
+        return cache_key, (copy.deepcopy(cached) if cached is not None else None)
+
+    def _parse_search_intent(self, result: str, user_input: str, cache_key) -> Dict[str, Any]:
+        try:
+            search_intent = json.loads(result)
+            if "product_name" not in search_intent:
+                search_intent["product_name"] = None
+            if "product_description" not in search_intent:
+                search_intent["product_description"] = None
+            if "filters" not in search_intent:
+                search_intent["filters"] = {}
+            self.intent_cache.set(cache_key, copy.deepcopy(search_intent))
+            return search_intent
+        except json.JSONDecodeError:
+            return {"search_query": user_input, "product_name": None, "product_description": None, "filters": {}}
+
+    def extract_search_intent(self, user_input: str, log_query: bool = True) -> Dict[str, Any]:
+        if not self.openai_available:
+            return {"search_query": user_input, "product_name": None, "product_description": None, "filters": {}}
+        cache_key, cached = self._cached_search_intent(user_input, log_query)
+        if cached is not None:
+            return cached
+        try:
             response = self.openai_client.chat.completions.create(
                 model=os.getenv("OPENAI_MODEL_ID"),
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that extracts product search intent from user queries. ONLY recognize these 5 product categories: phone, camera, laptop, watch, camping gear. Ignore any other categories."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._search_intent_messages(user_input),
                 temperature=0.3,
                 max_tokens=300
             )
-            result = response.choices[0].message.content.strip()
-            try:
-                search_intent = json.loads(result)
-                if "product_name" not in search_intent:
-                    search_intent["product_name"] = None
-                if "product_description" not in search_intent:
-                    search_intent["product_description"] = None
-                if "filters" not in search_intent:
-                    search_intent["filters"] = {}
-                return search_intent
-            except json.JSONDecodeError:
-                return {"search_query": user_input, "product_name": None, "product_description": None, "filters": {}}
+            return self._parse_search_intent(response.choices[0].message.content.strip(), user_input, cache_key)
         except Exception as e:
             print(f"Error extracting search intent: {str(e)}")
             return {"search_query": user_input, "product_name": None, "product_description": None, "filters": {}}
 
+    async def extract_search_intent_async(self, user_input: str, log_query: bool = True) -> Dict[str, Any]:
+        if not self.openai_available:
+            return {"search_query": user_input, "product_name": None, "product_description": None, "filters": {}}
+        cache_key, cached = self._cached_search_intent(user_input, log_query)
+        if cached is not None:
+            return cached
+        try:
+            response = await self.async_openai_client.chat.completions.create(
+                model=os.getenv("OPENAI_MODEL_ID"),
+                messages=self._search_intent_messages(user_input),
+                temperature=0.3,
+                max_tokens=300
+            )
+            return self._parse_search_intent(response.choices[0].message.content.strip(), user_input, cache_key)
+        except Exception as e:
+            print(f"Error extracting search intent: {str(e)}")
+            return {"search_query": user_input, "product_name": None, "product_description": None, "filters": {}}
+
+    def _log_intent_query(self, user_input: str) -> None:
+        if not self.intent_query_log:
+            return
+        try:
+            line = json.dumps({"ts": time.time(), "query": user_input}, ensure_ascii=False)
+            with self._intent_log_lock:
+                with open(self.intent_query_log, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception as e:
+            print(f"Error writing intent query log: {e}")
+
+    def warm_intent_cache(self, queries: List[str], max_workers: int = 4) -> Dict[str, Any]:
+        """Extract and cache intents for queries that are not cached yet"""
+        if not self.openai_available:
+            return {"status": "error", "message": "OpenAI API key not available. Cannot extract intents."}
+        model_id = os.getenv("OPENAI_MODEL_ID")
+        pending, seen, already_cached = [], set(), 0
+        for query in queries:
+            key = (model_id, normalize_text(query))
+            if not key[1] or key in seen:
+                continue
+            seen.add(key)
+            if self.intent_cache.contains(key):
+                already_cached += 1
+            else:
+                pending.append(query)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(lambda query: self.extract_search_intent(query, log_query=False), pending))
+        warmed = sum(1 for query in pending if self.intent_cache.contains((model_id, normalize_text(query))))
+        return {
+            "status": "success",
+            "requested": len(seen),
+            "already_cached": already_cached,
+            "warmed": warmed,
+            "failed": len(pending) - warmed,
+        }
+
     def _apply_metadata_filters(self, filters: Dict[str, Any]) -> Dict[str, Any] | None:
         clauses: list[dict] = []
         
@@ -953,58 +1379,6 @@ class AIService:
                     if similarity_score > 0.35:
                         product_data = {
                             "id": int(metadata["id"]),
-=======
-    def semantic_search(self, user_input: str, limit: int = 10, lang: str = "en", searchFromTool:str = "find_products") -> Dict[str, Any]:
-        try:
-            search_intent = self.extract_search_intent(user_input)
-            product_name = search_intent.get("product_name", None)
-            filters = search_intent.get("filters", {})
-            product_category = filters.get("category", None)
-            product_description = search_intent.get("product_description", None)
-            # Use the full original query for better semantic search, enhanced with extracted info
-            embedding_input = f"{product_category or ''} {product_name or ''} {product_description or ''}".strip()
-
-            print(f"Search intent extracted: {search_intent}")
-            print(f"Original query: {user_input}")
-            print(f"Processed search_query: {embedding_input}")
-
-            query_embedding = self.get_embedding(embedding_input)
-            if not query_embedding:
-                return {"status": "error", "message": "Failed to create query embedding"}
-
-            # STEP 1: Semantic search first (without price filters) - get more results for better filtering
-            search_params = {
-                "query_embeddings": [query_embedding],
-                "n_results": min(50, limit * 5),  # Get 5x more results for better filtering
-                "include": ["metadatas", "documents", "distances"]
-            }
-            # Only apply category filter in ChromaDB, NOT price filters
-            if filters.get("category"):
-                # Title case category to match database format (e.g., "camping gear" -> "Camping Gear")
-                category_value = filters.get("category").title()
-                search_params["where"] = {"category": {"$eq": category_value}}
-                
-            results = self.collection.query(**search_params)
-
-            products = []
-            valid_categories = ["phone", "camera", "laptop", "watch", "camping gear"]
-            
-            if results["metadatas"] and results["metadatas"][0]:
-                for i, metadata in enumerate(results["metadatas"][0]):
-                    # Only include products from valid categories
-                    if metadata["category"].lower() not in valid_categories:
-                        continue
-                        
-                    # For cosine distance: distance ranges from 0 (identical) to 2 (opposite)
-                    # Convert to similarity: similarity = 1 - (distance / 2) to get range [0, 1]
-                    distance = results["distances"][0][i]
-                    similarity_score = 1 - (distance / 2)  # Normalize to [0, 1] range
-                    
-                    # Lower threshold since we're now getting proper similarity scores
-                    if similarity_score > 0.1:  # Much lower threshold for better results
-                        product_data = {
-                            "id": metadata["id"],  # Keep as string, don't convert to int
->>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
                             "name": metadata["name"],
                             "category": metadata["category"],
                             "price": metadata["price"],
@@ -1012,7 +1386,6 @@ class AIService:
                             "rating": metadata["rating"],
                             "discount": metadata["discount"],
                             "imageUrl": metadata["imageUrl"],
-<<<<<<< HEAD
                             "similarity_score": similarity_score
                         }
                         products.append(product_data)
@@ -1035,51 +1408,168 @@ class AIService:
             transcription_result = self.transcribe_audio(audio_file)
             
 =======
-                            "similarity_score": similarity_score,
-                            "showLabel": "product" if searchFromTool == "find_products" else ("gift" if searchFromTool == "find_gifts" else None)
-                        }
-                        products.append(product_data)
-                        
-            # STEP 2: Apply additional filters (price, rating, etc.) after semantic search
-            filtered_products = []
-            for product in products:
-                # Apply price filters
-                if filters.get("min_price") and product["price"] < filters["min_price"]:
-                    continue
-                if filters.get("max_price") and product["price"] > filters["max_price"]:
-                    continue
-                # Apply rating filters  
-                if filters.get("min_rating") and product["rating"] < filters["min_rating"]:
-                    continue
-                # Apply discount filters
-                if filters.get("min_discount") and product["discount"] < filters["min_discount"]:
+    def _search_embedding_input(self, search_intent: Dict[str, Any]) -> str:
+        # Use the full original query for better semantic search, enhanced with extracted info
+        filters = search_intent.get("filters", {})
+        product_name = search_intent.get("product_name", None)
+        product_description = search_intent.get("product_description", None)
+        return f"{filters.get('category', None) or ''} {product_name or ''} {product_description or ''}".strip()
+
+    def _search_params(self, query_embedding: List[float], filters: Dict[str, Any], limit: int) -> Dict[str, Any]:
+        # STEP 1: Semantic search first (without price filters) - get more results for better filtering
+        search_params = {
+            "query_embeddings": [query_embedding],
+            "n_results": min(50, limit * 5),  # Get 5x more results for better filtering
+            "include": ["metadatas", "documents", "distances"]
+        }
+        # Only apply category filter in ChromaDB, NOT price filters
+        if filters.get("category"):
+            # Title case category to match database format (e.g., "camping gear" -> "Camping Gear")
+            category_value = filters.get("category").title()
+            search_params["where"] = {"category": {"$eq": category_value}}
+        return search_params
+
+    def _rank_search_results(self, results: Dict[str, Any], filters: Dict[str, Any], limit: int,
+                             searchFromTool: str) -> List[Dict[str, Any]]:
+        products = []
+        valid_categories = ["phone", "camera", "laptop", "watch", "camping gear"]
+        
+        if results["metadatas"] and results["metadatas"][0]:
+            for i, metadata in enumerate(results["metadatas"][0]):
+                # Only include products from valid categories
+                if metadata["category"].lower() not in valid_categories:
                     continue
                     
-                filtered_products.append(product)
+                # For cosine distance: distance ranges from 0 (identical) to 2 (opposite)
+                # Convert to similarity: similarity = 1 - (distance / 2) to get range [0, 1]
+                distance = results["distances"][0][i]
+                similarity_score = 1 - (distance / 2)  # Normalize to [0, 1] range
                 
-            # Limit results to requested amount
-            products = filtered_products[:limit]
-            
-            print(f"DEBUG: Semantic search found {len(results['metadatas'][0] if results['metadatas'] else [])} total")
-            print(f"DEBUG: After similarity filter: {len(products)} products") 
-            print(f"DEBUG: After price/rating filters: {len(filtered_products)} products")
-            print(f"DEBUG: Final result (limited to {limit}): {len(products)} products")
+                # Lower threshold since we're now getting proper similarity scores
+                if similarity_score > 0.1:  # Much lower threshold for better results
+                    product_data = {
+                        "id": metadata["id"],  # Keep as string, don't convert to int
+                        "name": metadata["name"],
+                        "category": metadata["category"],
+                        "price": metadata["price"],
+                        "original_price": metadata["original_price"],
+                        "rating": metadata["rating"],
+                        "discount": metadata["discount"],
+                        "imageUrl": metadata["imageUrl"],
+                        "similarity_score": similarity_score,
+                        "showLabel": "product" if searchFromTool == "find_products" else ("gift" if searchFromTool == "find_gifts" else None)
+                    }
+                    products.append(product_data)
+                    
+        # STEP 2: Apply additional filters (price, rating, discount) after semantic search.
+        # At most n_results (50) candidates, so a plain loop beats building column arrays
+        filtered_products = []
+        for product in products:
+            if filters.get("min_price") and product["price"] < filters["min_price"]:
+                continue
+            if filters.get("max_price") and product["price"] > filters["max_price"]:
+                continue
+            if filters.get("min_rating") and product["rating"] < filters["min_rating"]:
+                continue
+            if filters.get("min_discount") and product["discount"] < filters["min_discount"]:
+                continue
+            filtered_products.append(product)
+            
+        # Limit results to requested amount
+        return filtered_products[:limit]
+
+    def _search_response(self, search_intent: Dict[str, Any], products: List[Dict[str, Any]],
+                         composed_response: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "status": "success",
+            "search_intent": search_intent,
+            "intro": composed_response["intro"],
+            "header": composed_response["header"],
+            "products": products,  # Use the original products list
+            "show_all_product": composed_response["show_all_product"],
+            "total_results": len(products)
+        }
 
-            composed_response = self.make_response_sentence(user_input, products, lang)
-            print(f"DEBUG: Composed response: {composed_response}")
+    def semantic_search(self, user_input: str, limit: int = 10, lang: str = "en", searchFromTool:str = "find_products") -> Dict[str, Any]:
+        try:
+            search_intent = self.extract_search_intent(user_input)
+            filters = search_intent.get("filters", {})
+            embedding_input = self._search_embedding_input(search_intent)
 
-            return {
-                "status": "success",
-                "search_intent": search_intent,
-                "intro": composed_response["intro"],
-                "header": composed_response["header"],
-                "products": products,  # Use the original products list
-                "show_all_product": composed_response["show_all_product"],
-                "total_results": len(products)
-            }
+            print(f"Search intent extracted: {search_intent}")
+            print(f"Original query: {user_input}")
+            print(f"Processed search_query: {embedding_input}")
+
+            query_embedding = self.get_embedding(embedding_input)
+            if not query_embedding:
+                return {"status": "error", "message": "Failed to create query embedding"}
+
+            results = self.get_live_collection().query(**self._search_params(query_embedding, filters, limit))
+            products = self._rank_search_results(results, filters, limit, searchFromTool)
+
+            composed_response = self.make_response_sentence(user_input, products, lang, filters.get("category"))
+            return self._search_response(search_intent, products, composed_response)
+        except Exception as e:
+            print(f"Error in semantic search: {str(e)}")
+            return {"status": "error", "message": f"Search error: {str(e)}"}
+
+    async def _search_pipeline(self, user_input: str, context: SearchContext):
+        """The async search steps shared by semantic_search_async and semantic_search_stream.
+
+        Yields ("intent", search_intent) as soon as the intent is parsed, then ("products", products)
+        ranked from the vector query, or ("error", response) when no query embedding could be made.
+        Limit and tool source come from the request's SearchContext; stages are timed on it.
+        """
+        timings, limit = context.timings, context.limit
+        search_intent = await timings.timed("extract_intent", self.extract_search_intent_async(user_input))
+        filters = search_intent.get("filters", {})
+        embedding_input = self._search_embedding_input(search_intent)
+
+        print(f"Search intent extracted: {search_intent}")
+        print(f"Original query: {user_input}")
+        print(f"Processed search_query: {embedding_input}")
+        yield "intent", search_intent
+
+        query_embedding = await timings.timed("embedding", self.get_embedding_async(embedding_input))
+        if not query_embedding:
+            yield "error", {"status": "error", "message": "Failed to create query embedding"}
+            return
+
+        collection = self.get_live_collection()
+        results = await timings.timed(
+            "vector_query", asyncio.to_thread(collection.query, **self._search_params(query_embedding, filters, limit))
+        )
+        yield "products", self._rank_search_results(results, filters, limit, context.tool_source or "find_products")
+
+    async def semantic_search_async(self, user_input: str, context: Optional[SearchContext] = None) -> Dict[str, Any]:
+        """semantic_search on the async clients; the response copy is generated while the vector
+        search runs. Language, limit and tool source come from the request's SearchContext."""
+        context = context or SearchContext()
+        copy_task = None
+        try:
+            stages = {}
+            async for stage, value in self._search_pipeline(user_input, context):
+                stages[stage] = value
+                if stage == "intent":
+                    # The copy only depends on the query and language, not on which products match
+                    copy_task = asyncio.create_task(
+                        context.timings.timed("response_copy", self._make_response_copy_async(user_input, context))
+                    )
+            if "error" in stages:
+                return stages["error"]
+
+            search_intent, products = stages["intent"], stages["products"]
+            copy_template, lang_code = await copy_task
+            composed_response = self._finish_response_copy(
+                copy_template, products, lang_code, search_intent.get("filters", {}).get("category")
+            )
+            return self._search_response(search_intent, products, composed_response)
         except Exception as e:
             print(f"Error in semantic search: {str(e)}")
             return {"status": "error", "message": f"Search error: {str(e)}"}
+        finally:
+            if copy_task is not None and not copy_task.done():
+                copy_task.cancel()
 
     async def voice_search(self, audio_file) -> Dict[str, Any]:
         try:
@@ -1137,7 +1627,7 @@ class AIService:
                 if "function_used" not in search_result:
                     search_result["function_used"] = None
                 if "language_detected" not in search_result:
-                    search_result["language_detected"] = self.USER_LANG_CODE
+                    search_result["language_detected"] = self.detect_language(transcribed_text)
                 if "messages" not in search_result:
                     search_result["messages"] = messages
             
@@ -1148,15 +1638,46 @@ class AIService:
 
     def get_collection_stats(self) -> Dict[str, Any]:
         try:
-            count = self.collection.count()
-            return {"status": "success", "collection_name": self.collection_name, "total_products": count, "embedding_model": self.embedding_model}
+            count = self.get_live_collection().count()
+            return {
+                "status": "success",
+                "collection_name": self.collection_name,
+                "live_collection": self.live_collection_name,
+                "rebuilding": self._rebuild_collection.name if self._rebuild_collection is not None else None,
+                "retired_collections": [r["name"] for r in self.collection_aliases.retired(self.collection_name)],
+                "total_products": count,
+                "embedding_model": self.embedding_model,
+                "embedding_refresh": self.embedding_refresher.stats(),
+                "embedding_requests": self.embedding_batcher.stats() if self.embedding_batcher else None,
+                "embedding_cache": self.embedding_cache.stats(),
+                "intent_cache": self.intent_cache.stats(),
+                "language_detections": dict(self.language_detections),
+                "routing": self.route_stats.stats(),
+                "response_copy_cache": {
+                    **self.copy_cache.stats(),
+                    "enrichment_enabled": self.copy_enrichment_enabled,
+                    "enrichment_pending": len(self._copy_enrichment_tasks),
+                },
+            }
         except Exception as e:
             return {"status": "error", "message": f"Error getting stats: {str(e)}"}
 
+    def _detect_language_locally(self, text: str) -> Optional[str]:
+        """Language code when the offline detector is confident enough, otherwise None"""
+        code, confidence = detect_language_locally(text)
+        if code is not None and confidence >= self.language_min_confidence:
+            self.language_detections["local"] += 1
+            return code
+        return None
+
     def detect_language(self, text: str) -> str:
+        local_code = self._detect_language_locally(text)
+        if local_code is not None:
+            return local_code
         if not self.openai_available:
             return "en"
         try:
+            self.language_detections["llm"] += 1
             response = self.openai_client.chat.completions.create(
                 model=os.getenv("OPENAI_MODEL_ID"),
                 messages=[
@@ -1171,6 +1692,28 @@ class AIService:
             print(f"Error detecting language: {str(e)}")
             return "en"
 
+    async def detect_language_async(self, text: str) -> str:
+        local_code = self._detect_language_locally(text)
+        if local_code is not None:
+            return local_code
+        if not self.openai_available:
+            return "en"
+        try:
+            self.language_detections["llm"] += 1
+            response = await self.async_openai_client.chat.completions.create(
+                model=os.getenv("OPENAI_MODEL_ID"),
+                messages=[
+                    {"role": "system", "content": "Detect the language of the following text. Return only the language code (en, vi, fr, es, etc.)."},
+                    {"role": "user", "content": text}
+                ],
+                temperature=0,
+                max_tokens=10
+            )
+            return response.choices[0].message.content.strip().lower()
+        except Exception as e:
+            print(f"Error detecting language: {str(e)}")
+            return "en"
+
     # ---------- Copy helpers ----------
     def make_intro_sentence(self, context: str, lang_code: str) -> str:
         instruction = (
@@ -1183,81 +1726,151 @@ class AIService:
             text = text.split(".")[0].strip() + "."
         return text
 
-    def make_response_sentence(self, user_input: str, products: List[Dict], lang_code: str) -> Dict[str, str]:
-        try:
-            product_count = len(products)
-            
-            # Single comprehensive prompt for all three fields
-            prompt = f"""
-            You are a multilingual e-commerce assistant. Generate a JSON response with exactly these 3 fields for a product search result.
+    def _response_copy_prompt(self, user_input: str, lang_code: str) -> str:
+        # Written without the product count ({count} placeholder) so it can be generated
+        # while the vector search is still running; _finish_response_copy fills it in
+        return f"""
+        You are a multilingual e-commerce assistant. Generate a JSON response with exactly these 4 fields for a product search result.
 
-            USER SEARCH: "{user_input}"
-            PRODUCTS FOUND: {product_count}
-            LANGUAGE CODE: {lang_code}
+        USER SEARCH: "{user_input}"
+        LANGUAGE CODE: {lang_code}
 
-            Generate response in the language indicated by the language code ({lang_code}).
+        Generate response in the language indicated by the language code ({lang_code}).
+        The number of products found is not known yet; wherever it is needed, write the literal placeholder {{count}}.
 
-            Return ONLY a valid JSON object with these exact keys:
-            {{
-                "intro": "A warm, encouraging 1-sentence introduction about the search results (max 30 words). Be cheerful and engaging.",
-                "header": "A short subtitle introducing the product list below (max 15 words). Like 'Here are your product suggestions:' but more natural.",
-                "show_all_product": "A message asking if user wants to see all {product_count} results on products page (max 25 words). ONLY include this if product_count > 3, otherwise return empty string."
-            }}
+        Return ONLY a valid JSON object with these exact keys:
+        {{
+            "intro": "A warm, excited 1-sentence introduction for when products were found (max 30 words). Be cheerful and engaging.",
+            "no_results_intro": "An encouraging and helpful 1-sentence message for when no products were found (max 30 words).",
+            "header": "A short subtitle introducing the product list below (max 15 words). Like 'Here are your product suggestions:' but more natural.",
+            "show_all_product": "A message asking if user wants to see all {{count}} results on products page (max 25 words)."
+        }}
 
-            Context guidelines:
-            - If {product_count} == 0: Make intro encouraging and helpful
-            - If {product_count} > 0: Make intro excited about the findings  
-            - If {product_count} > 3: Include show_all_product message, otherwise empty string ""
-            - Use natural, conversational tone appropriate for the language
-            - Be consistent with the language code throughout
+        Context guidelines:
+        - Use natural, conversational tone appropriate for the language
+        - Be consistent with the language code throughout
 
-            Return only the JSON object, no other text.
-            """
-            
-            response = self.llm.invoke(prompt).content.strip()
-            
-            # Parse the JSON response
-            try:
-                result = json.loads(response)
-                return {
-                    "intro": result.get("intro", ""),
-                    "header": result.get("header", ""),
-                    "show_all_product": result.get("show_all_product", "")
-                }
-            except json.JSONDecodeError as e:
-                print(f"Failed to parse LLM JSON response: {e}")
-                print(f"Raw response: {response}")
-                raise Exception("LLM returned invalid JSON")
-            
+        Return only the JSON object, no other text.
+        """
+
+    def _parse_response_copy(self, response: str) -> Dict[str, str]:
+        try:
+            result = json.loads(response)
+        except json.JSONDecodeError as e:
+            print(f"Failed to parse LLM JSON response: {e}")
+            print(f"Raw response: {response}")
+            raise Exception("LLM returned invalid JSON")
+        return {key: result.get(key, "") for key in ("intro", "no_results_intro", "header", "show_all_product")}
+
+    def _copy_cache_key(self, user_input: str, lang_code: str) -> tuple:
+        return (lang_code, normalize_text(user_input))
+
+    async def _generate_response_copy_async(self, user_input: str, lang_code: str) -> Optional[Dict[str, str]]:
+        try:
+            response = await self.llm.ainvoke(self._response_copy_prompt(user_input, lang_code))
+            copy_template = self._parse_response_copy(response.content.strip())
         except Exception as e:
             print(f"Error in make_response_sentence: {str(e)}")
-            # Fallback to static messages
-            fallback_intros = {
-                "en": f"I found {len(products)} products for your search!" if products else "Sorry, no products found for your search.",
-                "vi": f"Tôi tìm thấy {len(products)} sản phẩm cho bạn!" if products else "Xin lỗi, không tìm thấy sản phẩm nào.",
-                "ko": f"검색에서 {len(products)}개 제품을 찾았습니다!" if products else "죄송합니다. 제품을 찾을 수 없습니다.",
-                "ja": f"検索で{len(products)}個の商品を見つけました！" if products else "申し訳ございませんが、商品が見つかりませんでした。"
-            }
-            
-            fallback_headers = {
-                "en": "Here are your product suggestions:",
-                "vi": "Đây là những sản phẩm gợi ý cho bạn:",
-                "ko": "제품 추천 목록입니다:",
-                "ja": "おすすめ商品一覧："
-            }
-            
-            fallback_show_all = {
-                "en": f"I found {len(products)} total results. Would you like to see all of them?" if len(products) > 3 else "",
-                "vi": f"Tôi tìm thấy {len(products)} kết quả. Bạn có muốn xem tất cả không?" if len(products) > 3 else "",
-                "ko": f"{len(products)}개의 결과를 찾았습니다. 모두 보시겠습니까?" if len(products) > 3 else "",
-                "ja": f"{len(products)}個の結果が見つかりました。すべて見ますか？" if len(products) > 3 else ""
-            }
-            
-            return {
-                "intro": fallback_intros.get(lang_code, fallback_intros["en"]),
-                "header": fallback_headers.get(lang_code, fallback_headers["en"]),
-                "show_all_product": fallback_show_all.get(lang_code, fallback_show_all["en"])
-            }
+            return None
+        self.copy_cache.set(self._copy_cache_key(user_input, lang_code), copy_template)
+        return copy_template
+
+    def _schedule_copy_enrichment(self, user_input: str, lang_code: str) -> None:
+        """Generate LLM copy for this query off the request path, so the next search for it gets it"""
+        key = self._copy_cache_key(user_input, lang_code)
+        if key in self._copy_enrichment_tasks:
+            return
+        task = asyncio.create_task(self._generate_response_copy_async(user_input, lang_code))
+        self._copy_enrichment_tasks[key] = task
+        task.add_done_callback(lambda _: self._copy_enrichment_tasks.pop(key, None))
+
+    async def _make_response_copy_async(self, user_input: str, context: SearchContext):
+        """(LLM copy template or None for the localized templates, language code);
+        waits for the request's language detection"""
+        lang_code = await context.resolve_language()
+        copy_template = self.copy_cache.get(self._copy_cache_key(user_input, lang_code))
+        if copy_template is not None:
+            return copy_template, lang_code
+        if context.llm_copy:
+            return await self._generate_response_copy_async(user_input, lang_code), lang_code
+        if self.copy_enrichment_enabled:
+            self._schedule_copy_enrichment(user_input, lang_code)
+        return None, lang_code
+
+    def _finish_response_copy(self, copy_template: Optional[Dict[str, str]], products: List[Dict],
+                              lang_code: str, category: Optional[str] = None) -> Dict[str, str]:
+        """Pick the intro for the actual result count and fill in {count}; template copy without LLM copy"""
+        if copy_template is None:
+            return self._template_response_copy(products, lang_code, category)
+        product_count = len(products)
+        return {
+            "intro": copy_template["intro"] if product_count > 0 else copy_template["no_results_intro"],
+            "header": copy_template["header"],
+            "show_all_product": copy_template["show_all_product"].replace("{count}", str(product_count)) if product_count > 3 else "",
+        }
+
+    def make_response_sentence(self, user_input: str, products: List[Dict], lang_code: str,
+                               category: Optional[str] = None, use_llm: bool = False) -> Dict[str, str]:
+        copy_template = self.copy_cache.get(self._copy_cache_key(user_input, lang_code))
+        if copy_template is None and use_llm:
+            try:
+                response = self.llm.invoke(self._response_copy_prompt(user_input, lang_code)).content.strip()
+                copy_template = self._parse_response_copy(response)
+                self.copy_cache.set(self._copy_cache_key(user_input, lang_code), copy_template)
+            except Exception as e:
+                print(f"Error in make_response_sentence: {str(e)}")
+        return self._finish_response_copy(copy_template, products, lang_code, category)
+
+    def _response_copy_stream_prompt(self, user_input: str, lang_code: str, product_count: int) -> str:
+        # Plain lines instead of JSON so each field can be shown while it is being written
+        return f"""
+        You are a multilingual e-commerce assistant writing the text shown with a product search result.
+
+        USER SEARCH: "{user_input}"
+        LANGUAGE CODE: {lang_code}
+        PRODUCTS FOUND: {product_count}
+
+        Write in the language indicated by the language code ({lang_code}) exactly 3 lines,
+        without numbering, labels, quotes or JSON:
+        A warm, excited 1-sentence introduction (max 30 words); if no products were found, an encouraging and helpful message instead.
+        A short subtitle introducing the product list below (max 15 words), more natural than 'Here are your product suggestions:'.
+        A message asking if the user wants to see all {product_count} results on the products page (max 25 words).
+        """
+
+    async def _stream_response_copy(self, user_input: str, products: List[Dict], lang_code: str,
+                                    category: Optional[str] = None):
+        """Yields (field, text delta) as the LLM writes intro, header and show_all_product;
+        fields it did not get to are filled from the templates"""
+        fields = ("intro", "header", "show_all_product")
+        # show_all_product is only offered for more than 3 results
+        wanted = fields if len(products) > 3 else fields[:2]
+        index, line_started, written = 0, False, set()
+        try:
+            async for chunk in self.llm.astream(self._response_copy_stream_prompt(user_input, lang_code, len(products))):
+                for n, part in enumerate((chunk.content or "").split("\n")):
+                    if n > 0 and line_started:
+                        index, line_started = index + 1, False
+                    if index >= len(wanted):
+                        break
+                    if not line_started:
+                        part = part.lstrip()
+                    if part:
+                        line_started = True
+                        written.add(wanted[index])
+                        yield wanted[index], part
+                if index >= len(wanted):
+                    break
+        except Exception as e:
+            print(f"Error streaming response copy: {str(e)}")
+        fallback = self._template_response_copy(products, lang_code, category)
+        for field in wanted:
+            if field not in written and fallback[field]:
+                yield field, fallback[field]
+
+    def _template_response_copy(self, products: List[Dict], lang_code: str,
+                                category: Optional[str] = None) -> Dict[str, str]:
+        # Localized phrase banks, rotated per language and result count; no LLM call
+        return self.response_templates.render(lang_code, len(products), category)
 
     def compose_response(self, intro: str, items, lang_code: str):
         header = self.HEADER_BY_LANG.get(lang_code, self.HEADER_BY_LANG["en"])
@@ -1275,13 +1888,17 @@ class AIService:
             gift_recommendations = self.middleware_service.find_gifts_external()
             print(f"DEBUG _get_external_gift_products - external recommendations: {gift_recommendations}")
             
+            # Fetch every recommended product in one batched read
+            all_product_ids = [pid for rec in gift_recommendations for pid in rec.get("product_ids", [])]
+            products_by_id = {p.get("id"): p for p in self.product_service.get_products_by_ids(all_product_ids)}
+            
             external_products = []
             for recommendation in gift_recommendations:
                 label = recommendation.get("label")
                 product_ids = recommendation.get("product_ids", [])
                 
                 for product_id in product_ids:
-                    product_data = self.product_service.get_product_by_id(product_id)
+                    product_data = products_by_id.get(product_id)
                     if product_data:
                         # Create product structure similar to semantic_search results
                         external_product = {
@@ -1335,15 +1952,25 @@ class AIService:
         return result
 
     # ---------- Chat middleware ----------
-    async def semantic_search_middleware(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    def _route_search(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        if not self.fast_path_enabled:
+            return {"path": AGENT_PATH, "category": None, "reason": "fast path disabled"}
+        return route_search(messages)
+
+    async def semantic_search_middleware(self, messages: List[Dict[str, str]], limit: int = 10,
+                                         llm_copy: bool = False) -> Dict[str, Any]:
+        context = SearchContext(limit=limit, llm_copy=llm_copy)
+        timings = context.timings
         # Truncate conversation history to prevent token overflow
         messages = self.truncate_conversation_history(messages, max_messages=8)
         
         # last user input
         user_input = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
 
-        # update language ON INSTANCE
-        self.USER_LANG_CODE = self.detect_language(user_input)
+        # Language detection runs alongside the agent and the intent extraction inside its tools;
+        # only the response copy waits for it
+        language_task = asyncio.create_task(timings.timed("detect_language", self.detect_language_async(user_input)))
+        context.language = language_task
 
         # ensure system message is always present with updated instructions
         agent_messages = messages.copy()
@@ -1354,19 +1981,46 @@ class AIService:
             agent_messages[0]["content"] = SYSTEM_INSTRUCTIONS
 
         print(f"DEBUG: User input: {user_input}")
-        print(f"DEBUG: Language detected: {self.USER_LANG_CODE}")
         print(f"DEBUG: Messages count after truncation: {len(agent_messages)}")
 
-        # allow more steps for tool calling
-        response = self.agent.invoke({"messages": agent_messages}, config={"recursion_limit": 5})
-        print(f"DEBUG: Full agent response: {response}")
+        route = self._route_search(messages)
 
-        msgs = response["messages"]
-        tool_msgs = [m for m in msgs if isinstance(m, ToolMessage) and getattr(m, "name", None) in self.TOOL_NAMES]
-
-        ai_response = tool_msgs[-1].content if tool_msgs else msgs[-1].content
+        try:
+            if route["path"] == FAST_PATH:
+                # Plain product query: same search find_products would run, without the agent's LLM round trips
+                context.tool_source = "find_products"
+                result = await timings.timed("search", self.semantic_search_async(user_input, context))
+                ai_response = json.dumps(result, ensure_ascii=False)
+                function_used = "find_products"
+            else:
+                # allow more steps for tool calling
+                response = await timings.timed("agent", self.agent.ainvoke(
+                    {"messages": agent_messages},
+                    config=context.as_config(recursion_limit=5),
+                ))
+                print(f"DEBUG: Full agent response: {response}")
+
+                msgs = response["messages"]
+                tool_msgs = [m for m in msgs if isinstance(m, ToolMessage) and getattr(m, "name", None) in self.TOOL_NAMES]
+                ai_response = tool_msgs[-1].content if tool_msgs else msgs[-1].content
+                function_used = tool_msgs[-1].name if tool_msgs else None
+            lang_code = await context.resolve_language()
+        finally:
+            if not language_task.done():
+                language_task.cancel()
+        print(f"DEBUG: Language detected: {lang_code}")
         print(f"DEBUG: Final AI response (raw): {ai_response}")
 
+        # What the agent costs on top of the search it delegates to is what the fast path saves
+        stages = timings.stages
+        if route["path"] == FAST_PATH:
+            self.route_stats.record(FAST_PATH)
+            route["estimated_latency_saved_ms"] = self.route_stats.estimated_saving_ms()
+        elif "search" in stages:
+            self.route_stats.record(AGENT_PATH, stages["agent"]["duration_ms"] - stages["search"]["duration_ms"])
+        else:
+            self.route_stats.record(AGENT_PATH)
+
         # parse JSON if tool returned JSON string
         try:
             ai_response_data = json.loads(ai_response) if isinstance(ai_response, str) else ai_response
@@ -1392,21 +2046,22 @@ class AIService:
             return {
                 "status": "success",
                 "function_used": None,
-                "language_detected": self.USER_LANG_CODE,
+                "language_detected": lang_code,
                 "search_intent": None,
                 "intro": ai_response,
                 "header": "",
                 "products": [],
                 "total_results": 0,
                 "messages": messages,
-                "is_clarification": True
+                "is_clarification": True,
+                "debug": {"timings": timings.as_dict(), "route": route},
             }
 
         print(f"DEBUG: Returning tool response")
         return {
             "status": ai_response_data.get("status", "success"),
-            "function_used": tool_msgs[-1].name if tool_msgs else None,
-            "language_detected": self.USER_LANG_CODE,
+            "function_used": function_used,
+            "language_detected": lang_code,
             "search_intent": ai_response_data.get("search_intent"),
             "intro": ai_response_data.get("intro"),
             "header": ai_response_data.get("header"),
@@ -1414,5 +2069,89 @@ class AIService:
             "show_all_product": ai_response_data.get("show_all_product"),  # Add missing show_all_product field
             "total_results": ai_response_data.get("total_results", 0),
             "messages": messages,
+            "debug": {"timings": timings.as_dict(), "route": route},
+        }
+
+    async def semantic_search_stream(self, messages: List[Dict[str, str]], limit: int = 10, llm_copy: bool = False):
+        """Yields (event, data) for a search as each part becomes available: language, intent,
+        products, copy deltas and finally done with the same payload as semantic_search_middleware.
+
+        Fast-path queries stream progressively, so products arrive after intent, embedding and
+        vector query without waiting for the copy. Agent-routed conversations (gifts, ambiguous
+        follow-ups) are answered by the middleware and replayed as the same events.
+        """
+        messages = self.truncate_conversation_history(messages, max_messages=8)
+        route = self._route_search(messages)
+
+        if route["path"] != FAST_PATH:
+            result = await self.semantic_search_middleware(messages, limit, llm_copy)
+            if result.get("status") == "error":
+                yield "error", result
+                return
+            yield "language", {"language": result.get("language_detected")}
+            if result.get("search_intent") is not None:
+                yield "intent", {"search_intent": result["search_intent"]}
+            yield "products", {"products": result.get("products", []), "total_results": result.get("total_results", 0)}
+            for field in ("intro", "header", "show_all_product"):
+                if result.get(field):
+                    yield "copy", {"field": field, "delta": result[field]}
+            yield "done", result
+            return
+
+        context = SearchContext(limit=limit, llm_copy=llm_copy)
+        context.tool_source = "find_products"
+        timings = context.timings
+        user_input = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+
+        # Language detection runs alongside intent extraction and is reported just before the intent
+        language_task = asyncio.create_task(timings.timed("detect_language", self.detect_language_async(user_input)))
+        context.language = language_task
+        try:
+            async with aclosing(self._search_pipeline(user_input, context)) as pipeline:
+                async for stage, value in pipeline:
+                    if stage == "intent":
+                        search_intent = value
+                        lang_code = await context.resolve_language()
+                        yield "language", {"language": lang_code}
+                        yield "intent", {"search_intent": search_intent}
+                    elif stage == "products":
+                        products = value
+                        yield "products", {"products": products, "total_results": len(products)}
+                    else:
+                        yield "error", value
+                        return
+
+            response_copy = {"intro": "", "header": "", "show_all_product": ""}
+            category = search_intent.get("filters", {}).get("category")
+            with timings.span("response_copy"):
+                if llm_copy and not self.copy_cache.contains(self._copy_cache_key(user_input, lang_code)):
+                    async for field, delta in self._stream_response_copy(user_input, products, lang_code, category):
+                        response_copy[field] += delta
+                        yield "copy", {"field": field, "delta": delta}
+                else:
+                    # Template or cached copy is ready at once; each field goes out as a single delta
+                    copy_template, _ = await self._make_response_copy_async(user_input, context)
+                    response_copy.update(self._finish_response_copy(copy_template, products, lang_code, category))
+                    for field, text in response_copy.items():
+                        if text:
+                            yield "copy", {"field": field, "delta": text}
+        except Exception as e:
+            print(f"Error in streaming search: {str(e)}")
+            yield "error", {"status": "error", "message": f"Search error: {str(e)}"}
+            return
+        finally:
+            if not language_task.done():
+                language_task.cancel()
+
+        result = self._search_response(search_intent, products, {key: value.strip() for key, value in response_copy.items()})
+        messages.append({"role": "assistant", "content": json.dumps(result, ensure_ascii=False)})
+        self.route_stats.record(FAST_PATH)
+        route["estimated_latency_saved_ms"] = self.route_stats.estimated_saving_ms()
+        yield "done", {
+            **result,
+            "function_used": context.tool_source,
+            "language_detected": lang_code,
+            "messages": messages,
+            "debug": {"timings": timings.as_dict(), "route": route},
         }
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
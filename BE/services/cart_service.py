@@ -1,13 +1,14 @@
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import time
-from firebase_config import get_firestore_db
+from firebase_config import get_firestore_async_db
 from models import Cart, CartItem, CartCreate, CartAddItem, CartUpdateItem, CartRemoveItem, Product
 from product_service import product_service
 
 class CartService:
     def __init__(self):
-        self.db = get_firestore_db()
+        # AsyncClient: every cart method runs inside async route handlers
+        self.db = get_firestore_async_db()
         self.collection_name = "carts"
     
     def _get_collection(self):
@@ -42,17 +43,21 @@ class CartService:
             
             # Query for existing cart
             query = collection.where("user_id", "==", user_id).limit(1)
-            docs = query.get()
+            docs = await query.get()
             
             if docs:
                 # Cart exists, return it
                 doc = docs[0]
                 cart_data = self._cart_doc_to_dict(doc)
                 
-                # Load product details for each item
+                # Load product details for all items in one batched read
+                item_list = cart_data.get('items', [])
+                products = await product_service.get_products_by_ids_async([item['product_id'] for item in item_list])
+                products_by_id = {p.get('id'): p for p in products}
+                
                 items_with_details = []
-                for item_data in cart_data.get('items', []):
-                    product = product_service.get_product_by_id(item_data['product_id'])
+                for item_data in item_list:
+                    product = products_by_id.get(item_data['product_id'])
                     cart_item = CartItem(
                         product_id=item_data['product_id'],
                         quantity=item_data['quantity'],
@@ -86,7 +91,7 @@ class CartService:
                     "updated_at": current_time
                 }
                 
-                doc_ref = collection.add(cart_data)
+                doc_ref = await collection.add(cart_data)
                 cart_id = doc_ref[1].id
                 
                 print(f"✅ Created new cart with ID: {cart_id} for user: {user_id}")
@@ -117,7 +122,7 @@ class CartService:
             collection = self._get_collection()
             
             # Check if product exists
-            product = product_service.get_product_by_id(cart_add_item.product_id)
+            product = await product_service.get_product_by_id_async(cart_add_item.product_id)
             if not product:
                 raise Exception(f"Product with ID {cart_add_item.product_id} not found")
             
@@ -173,7 +178,7 @@ class CartService:
             }
             
             print(f"🔄 Updating Firebase with: {update_data}")
-            cart_ref.update(update_data)
+            await cart_ref.update(update_data)
             
             # Update cart object
             cart.item_count = totals['item_count']
@@ -223,7 +228,7 @@ class CartService:
             
             # Update cart in Firestore
             cart_ref = collection.document(cart.id)
-            cart_ref.update({
+            await cart_ref.update({
                 "items": items_data,
                 "item_count": totals['item_count'],
                 "total_amount": totals['total_amount'],
@@ -273,7 +278,7 @@ class CartService:
             
             # Update cart in Firestore
             cart_ref = collection.document(cart.id)
-            cart_ref.update({
+            await cart_ref.update({
                 "items": items_data,
                 "item_count": totals['item_count'],
                 "total_amount": totals['total_amount'],
@@ -301,7 +306,7 @@ class CartService:
             
             # Update cart in Firestore
             cart_ref = collection.document(cart.id)
-            cart_ref.update({
+            await cart_ref.update({
                 "items": [],
                 "item_count": 0,
                 "total_amount": 0.0,
@@ -333,13 +338,18 @@ class CartService:
             # Clear existing items
             cart.items = []
             
+            # Get product details for all items in one batched read
+            products = await product_service.get_products_by_ids_async(
+                [item.get('id') for item in frontend_cart if item.get('id') is not None]
+            )
+            products_by_id = {p.get('id'): p for p in products}
+            
             # Add all items from frontend
             for frontend_item in frontend_cart:
                 product_id = frontend_item.get('id')
                 quantity = frontend_item.get('quantity', 1)
                 
-                # Get product details
-                product = product_service.get_product_by_id(product_id)
+                product = products_by_id.get(product_id)
                 if product:
                     cart_item = CartItem(
                         product_id=product_id,
@@ -364,7 +374,7 @@ class CartService:
             
             # Update cart in Firestore
             cart_ref = collection.document(cart.id)
-            cart_ref.update({
+            await cart_ref.update({
                 "items": items_data,
                 "item_count": totals['item_count'],
                 "total_amount": totals['total_amount'],
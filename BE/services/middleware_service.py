@@ -37,7 +37,7 @@ class MiddlewareService:
             }
             
             # Query the collection
-            results = self.ai_service.collection.query(**search_params)
+            results = self.ai_service.get_live_collection().query(**search_params)
             
             products = []
             if results["metadatas"] and results["metadatas"][0]:
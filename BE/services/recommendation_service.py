@@ -3,14 +3,14 @@ import json
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
-from firebase_config import get_firestore_db
+from firebase_config import get_firestore_async_db
 from models import UserEvent, UserEventCreate, RecommendationRequest, RecommendationResponse, EventType
 from product_service import product_service
-import random
 
 class RecommendationService:
     def __init__(self):
-        self.db = get_firestore_db()
+        # AsyncClient: every method here is awaited from async route handlers
+        self.db = get_firestore_async_db()
         self.collection_name = 'user_events'
         
         if self.db is None:
@@ -36,7 +36,7 @@ class RecommendationService:
             }
             
             # Add to Firestore
-            collection.add(event_doc)
+            await collection.add(event_doc)
             
             print(f"✅ Tracked {event_data.event_type} event for user {event_data.user_id} on product {event_data.product_id}")
             return True
@@ -55,7 +55,7 @@ class RecommendationService:
             
             # Query events for user
             query = collection.where("user_id", "==", user_id).where("timestamp", ">=", cutoff_time)
-            docs = query.get()
+            docs = await query.get()
             
             events = []
             for doc in docs:
@@ -93,9 +93,8 @@ class RecommendationService:
                 EventType.REMOVE_FROM_WISHLIST: -0.5
             }
             
-            # Get all products for category analysis
-            all_products = product_service.get_all_products()
-            product_map = {p['id']: p for p in all_products}
+            # Columnar catalog snapshot for category lookups and vectorized ranking
+            catalog = await product_service.get_columnar_catalog_async()
             
             # Analyze user behavior
             for event in events:
@@ -113,13 +112,15 @@ class RecommendationService:
                 product_interactions[product_id] += final_weight
                 
                 # Score the category
-                if product_id in product_map:
-                    category = product_map[product_id].get('category')
+                product = catalog.get(product_id)
+                if product is not None:
+                    category = product.get('category')
                     if category:
                         category_scores[category] += final_weight
             
             # Get viewed/purchased products to exclude
             interacted_products = set(product_interactions.keys())
+            not_interacted = catalog.mask(exclude_ids=interacted_products)
             
             # Find products in preferred categories
             preferred_categories = sorted(category_scores.items(), key=lambda x: x[1], reverse=True)[:3]
@@ -128,23 +129,16 @@ class RecommendationService:
             
             # Strategy 1: Similar products in preferred categories
             for category, score in preferred_categories[:2]:
-                category_products = [p for p in all_products 
-                                   if p.get('category') == category 
-                                   and p['id'] not in interacted_products]
-                
-                # Sort by rating and add some randomness
-                category_products.sort(key=lambda x: (x.get('rating', 0) * random.uniform(0.8, 1.2)), reverse=True)
-                
-                recommendations.extend(category_products[:limit//3])
+                # Top by rating with some randomness
+                category_mask = not_interacted & catalog.category_mask(category)
+                jittered_rating = catalog.jittered(catalog.rating, 0.8, 1.2)
+                recommendations.extend(catalog.top_products(jittered_rating, limit//3, category_mask))
             
             # Strategy 2: High-rated products in any category user might like
-            remaining_products = [p for p in all_products 
-                                if p['id'] not in interacted_products 
-                                and p not in recommendations
-                                and p.get('rating', 0) >= 4.0]
-            
-            remaining_products.sort(key=lambda x: x.get('rating', 0), reverse=True)
-            recommendations.extend(remaining_products[:limit//3])
+            remaining_mask = (not_interacted
+                              & (catalog.rating >= 4.0)
+                              & ~catalog.ids_mask(p['id'] for p in recommendations))
+            recommendations.extend(catalog.top_products(catalog.rating, limit//3, remaining_mask))
             
             # Remove duplicates and limit
             seen_ids = set()
@@ -170,7 +164,7 @@ class RecommendationService:
             # Get recent events
             cutoff_time = time.time() - (days_back * 24 * 60 * 60)
             query = collection.where("timestamp", ">=", cutoff_time)
-            docs = query.get()
+            docs = await query.get()
             
             # Count interactions per product
             product_popularity = defaultdict(float)
@@ -193,13 +187,13 @@ class RecommendationService:
                                         key=lambda x: x[1], reverse=True)[:limit*2]
             
             # Get product details
-            all_products = product_service.get_all_products()
-            product_map = {p['id']: p for p in all_products}
+            catalog = await product_service.get_columnar_catalog_async()
             
             trending_products = []
             for product_id, score in trending_product_ids:
-                if product_id in product_map:
-                    product = product_map[product_id].copy()
+                product = catalog.get(product_id)
+                if product is not None:
+                    product = product.copy()
                     product['trending_score'] = score
                     trending_products.append(product)
                     if len(trending_products) >= limit:
@@ -214,13 +208,11 @@ class RecommendationService:
     async def get_category_recommendations(self, category: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get top products in a specific category"""
         try:
-            all_products = product_service.get_all_products()
-            category_products = [p for p in all_products if p.get('category') == category]
-            
-            # Sort by rating and some randomness
-            category_products.sort(key=lambda x: (x.get('rating', 0) * random.uniform(0.9, 1.1)), reverse=True)
+            catalog = await product_service.get_columnar_catalog_async()
             
-            return category_products[:limit]
+            # Top by rating with some randomness
+            jittered_rating = catalog.jittered(catalog.rating, 0.9, 1.1)
+            return catalog.top_products(jittered_rating, limit, catalog.category_mask(category))
             
         except Exception as e:
             print(f"Error getting category recommendations: {e}")
@@ -263,20 +255,17 @@ class RecommendationService:
                     
                     # Fill remaining with top-rated products
                     needed = request.limit - len(trending)
-                    all_products = product_service.get_all_products()
-                    all_products.sort(key=lambda x: x.get('rating', 0), reverse=True)
+                    catalog = await product_service.get_columnar_catalog_async()
                     
                     # Exclude products already in trending
-                    trending_ids = {p['id'] for p in trending}
-                    additional_products = [p for p in all_products if p['id'] not in trending_ids][:needed]
-                    recommendations.extend(additional_products)
+                    trending_mask = catalog.mask(exclude_ids={p['id'] for p in trending})
+                    recommendations.extend(catalog.top_products(catalog.rating, needed, trending_mask))
 >>>>>>> 152c40476bd97e5141c23051b72efd7a3226cb7e
             
             # Strategy 4: Fallback to top-rated products
             if not recommendations:
-                all_products = product_service.get_all_products()
-                all_products.sort(key=lambda x: x.get('rating', 0), reverse=True)
-                recommendations = all_products[:request.limit]
+                catalog = await product_service.get_columnar_catalog_async()
+                recommendations = catalog.top_products(catalog.rating, request.limit)
                 source = "fallback"
             
             return RecommendationResponse(
@@ -292,7 +281,7 @@ class RecommendationService:
             print(f"Error generating recommendations: {e}")
             # Return fallback recommendations
             try:
-                all_products = product_service.get_all_products()
+                all_products = await product_service.get_all_products_async()
                 fallback_recs = all_products[:request.limit] if all_products else []
                 
                 return RecommendationResponse(
@@ -21,12 +21,17 @@ class WishlistService:
         """Populate product details for wishlist items"""
         try:
             if 'products' in wishlist_data and wishlist_data['products']:
+                # Get product details for every item in one batched read
+                products = product_service.get_products_by_ids(
+                    [item.get('product_id') for item in wishlist_data['products'] if item.get('product_id')]
+                )
+                products_by_id = {p.get('id'): p for p in products}
+                
                 populated_products = []
                 for item in wishlist_data['products']:
                     product_id = item.get('product_id')
                     if product_id:
-                        # Get product details from product service
-                        product_details = product_service.get_product_by_id(product_id)
+                        product_details = products_by_id.get(product_id)
                         if product_details:
                             # Combine wishlist item data with product details
                             populated_item = {
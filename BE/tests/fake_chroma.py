@@ -0,0 +1,172 @@
+"""
+In-memory stand-ins for a Chroma client and an OpenAI embeddings client, plus an AIService
+built around them without its __init__ (no API keys, no persistent Chroma directory)
+"""
+
+import math
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from fake_firestore import FakeFirestore, make_product_service
+
+
+class FakeChromaCollection:
+    def __init__(self, name, metadata=None):
+        self.name = name
+        self.metadata = dict(metadata or {})
+        self.entries = {}  # id -> {"embedding", "document", "metadata"}
+        self.calls = []
+
+    def count(self):
+        return len(self.entries)
+
+    def modify(self, metadata=None):
+        self.metadata = dict(metadata)
+
+    def get(self, ids=None, include=(), limit=None, offset=0):
+        self.calls.append(("get", list(ids) if ids is not None else None))
+        selected = [i for i in (ids if ids is not None else self.entries) if i in self.entries]
+        selected = selected[offset:offset + limit] if limit is not None else selected[offset:]
+        result = {"ids": selected}
+        for field, key in (("embeddings", "embedding"), ("documents", "document"), ("metadatas", "metadata")):
+            if field in include:
+                result[field] = [self.entries[i][key] for i in selected]
+        return result
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.calls.append(("upsert", list(ids)))
+        for i, entry_id in enumerate(ids):
+            self.entries[entry_id] = {"embedding": list(embeddings[i]), "document": documents[i],
+                                      "metadata": dict(metadatas[i])}
+
+    def update(self, ids, metadatas):
+        self.calls.append(("update", list(ids)))
+        for entry_id, metadata in zip(ids, metadatas):
+            self.entries[entry_id]["metadata"] = dict(metadata)
+
+    def delete(self, ids):
+        self.calls.append(("delete", list(ids)))
+        for entry_id in ids:
+            self.entries.pop(entry_id, None)
+
+    @staticmethod
+    def _cosine_distance(a, b):
+        norm = math.hypot(*a) * math.hypot(*b)
+        return 1 - sum(x * y for x, y in zip(a, b)) / norm if norm else 1.0
+
+    def query(self, query_embeddings, n_results, include=(), where=None):
+        self.calls.append(("query", where))
+        hits = []
+        for entry_id, entry in self.entries.items():
+            if where and any(entry["metadata"].get(field) != condition["$eq"] for field, condition in where.items()):
+                continue
+            hits.append((self._cosine_distance(query_embeddings[0], entry["embedding"]), entry_id))
+        hits = sorted(hits)[:n_results]
+        return {
+            "ids": [[entry_id for _, entry_id in hits]],
+            "distances": [[distance for distance, _ in hits]],
+            "metadatas": [[self.entries[entry_id]["metadata"] for _, entry_id in hits]],
+            "documents": [[self.entries[entry_id]["document"] for _, entry_id in hits]],
+        }
+
+
+class FakeChromaClient:
+    def __init__(self):
+        self.collections = {}
+        self.deleted = []
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist")
+        return self.collections[name]
+
+    def create_collection(self, name, metadata=None, embedding_function=None):
+        if name in self.collections:
+            raise ValueError(f"Collection {name} already exists")
+        self.collections[name] = FakeChromaCollection(name, metadata)
+        return self.collections[name]
+
+    def delete_collection(self, name):
+        self.collections.pop(name)
+        self.deleted.append(name)
+
+    def list_collections(self):
+        return list(self.collections)
+
+
+class FakeEmbeddingsClient:
+    """client.embeddings.create returning a 2-d vector derived from each text"""
+
+    def __init__(self):
+        self.embedded = []
+        self.embeddings = self
+
+    def create(self, model, input, encoding_format):
+        self.embedded.extend(input)
+        data = [SimpleNamespace(index=i, embedding=[float(len(text)), float(sum(map(ord, text)) % 97)])
+                for i, text in enumerate(input)]
+        return SimpleNamespace(data=data)
+
+
+def product(product_id, name="Trail Tent", price=120.0, **fields):
+    return {"id": product_id, "name": name, "price": price, "imageUrl": "", "category": "Camping Gear", **fields}
+
+
+def make_ai_service(monkeypatch, tmp_path, products=()):
+    """AIService wired to fakes, with only the state the embedding/search code paths read"""
+    for module in ("openai", "chromadb", "langgraph"):
+        pytest.importorskip(module)
+    db = FakeFirestore()
+    db.seed("products", products)
+    product_service = make_product_service(monkeypatch, db)
+    from services.ai_service import AIService
+    from utils.collection_alias import CollectionAliases
+    from utils import embedding_batcher
+    from utils.embedding_batcher import EmbeddingBatcher
+    # Estimate tokens from length instead of downloading a tiktoken encoding
+    monkeypatch.setattr(embedding_batcher, "TIKTOKEN_AVAILABLE", False)
+
+    service = AIService.__new__(AIService)
+    service.openai_available = True
+    service.embedding_model = "text-embedding-3-small"
+    service.product_text_version = 1
+    service.hnsw_params = {}
+    service.collection_name = "products_embeddings"
+    service.collection_aliases = CollectionAliases(str(tmp_path / "collection_aliases.json"))
+    service.retired_collection_ttl = 3600.0
+    service.chroma_client = FakeChromaClient()
+    service.embeddings_client = FakeEmbeddingsClient()
+    service.embedding_batcher = EmbeddingBatcher(service.embeddings_client, service.embedding_model, max_concurrency=1)
+    service.product_service = product_service
+    service._initialize_collection()
+
+    # Search path: routing, language and response copy state
+    from utils.intent_router import RouteStats
+    from utils.response_templates import ResponseTemplates
+    from utils.ttl_cache import TTLCache
+    service.fast_path_enabled = True
+    service.route_stats = RouteStats()
+    service.language_min_confidence = 0.6
+    service.language_detections = {"local": 0, "llm": 0}
+    service.intent_cache = TTLCache(max_entries=100, ttl=None)
+    service.intent_query_log = None
+    service._intent_log_lock = threading.Lock()
+    service.response_templates = ResponseTemplates()
+    service.copy_cache = TTLCache(max_entries=100, ttl=None)
+    service.copy_enrichment_enabled = False
+    service._copy_enrichment_tasks = {}
+    return service
+
+
+def index_products(service, vectors):
+    """Store products with hand-picked embeddings ({product_id: vector}) in the live collection"""
+    from models import Product
+    products = {p["id"]: Product(**p) for p in service.product_service.get_all_products()}
+    service.collection.upsert(
+        ids=[f"product_{pid}" for pid in vectors],
+        embeddings=list(vectors.values()),
+        documents=[service._prepare_product_text(products[pid]) for pid in vectors],
+        metadatas=[service._prepare_product_metadata(products[pid]) for pid in vectors],
+    )
@@ -0,0 +1,246 @@
+"""
+In-memory stand-in for the parts of the Firestore client the services use
+"""
+
+import numbers
+import operator
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = dict(data) if data is not None else None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data[field]
+
+
+class FakeDocument:
+    def __init__(self, collection, doc_id):
+        self.collection = collection
+        self.id = str(doc_id)
+
+    @property
+    def _store(self):
+        return self.collection.docs
+
+    def get(self, transaction=None):
+        with self.collection.db.lock:
+            data = self._store.get(self.id)
+            if transaction is not None:
+                transaction.reads[(self.collection.name, self.id)] = self.collection.versions.get(self.id, 0)
+            return FakeSnapshot(self, data)
+
+    def _write(self, data):
+        # Caller holds db.lock
+        if data is None:
+            self._store.pop(self.id, None)
+        else:
+            self._store[self.id] = dict(data)
+        self.collection.versions[self.id] = self.collection.versions.get(self.id, 0) + 1
+
+    def set(self, data):
+        with self.collection.db.lock:
+            self._write(data)
+
+    def update(self, data):
+        with self.collection.db.lock:
+            if self.id not in self._store:
+                raise KeyError(f"No document to update: {self.id}")
+            self._write({**self._store[self.id], **data})
+
+    def delete(self):
+        with self.collection.db.lock:
+            self._write(None)
+
+
+_OPERATORS = {"<": operator.lt, "<=": operator.le, "==": operator.eq, ">=": operator.ge, ">": operator.gt}
+
+
+def _value_order(value):
+    # Firestore orders values by type first: numbers sort before strings
+    if isinstance(value, numbers.Number):
+        return (0, value)
+    return (1, str(value))
+
+
+class FakeQuery:
+    def __init__(self, collection, order_field=None, descending=False, max_results=None, filters=()):
+        self.collection = collection
+        self.order_field = order_field
+        self.descending = descending
+        self.max_results = max_results
+        self.filters = tuple(filters)
+
+    def _copy(self, **changes):
+        state = dict(order_field=self.order_field, descending=self.descending,
+                     max_results=self.max_results, filters=self.filters)
+        state.update(changes)
+        return FakeQuery(self.collection, **state)
+
+    def where(self, field, op, value):
+        return self._copy(filters=self.filters + ((field, op, value),))
+
+    def order_by(self, field, direction=None):
+        return self._copy(order_field=field, descending=direction == "DESCENDING")
+
+    def limit(self, count):
+        return self._copy(max_results=count)
+
+    @staticmethod
+    def _matches(data, field, op, value):
+        # Range filters only match values of the same type, as in Firestore
+        current = data.get(field)
+        if _value_order(current)[0] != _value_order(value)[0]:
+            return False
+        return _OPERATORS[op](current, value)
+
+    def get(self):
+        snapshots = [s for s in self.collection.get()
+                     if all(self._matches(s.to_dict(), *f) for f in self.filters)]
+        if self.order_field is not None:
+            snapshots.sort(key=lambda s: _value_order(s.to_dict().get(self.order_field)), reverse=self.descending)
+        return snapshots[:self.max_results] if self.max_results is not None else snapshots
+
+    stream = get
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.docs = {}
+        self.versions = {}
+
+    def document(self, doc_id):
+        return FakeDocument(self, doc_id)
+
+    def get(self):
+        with self.db.lock:
+            return [FakeSnapshot(self.document(doc_id), data) for doc_id, data in self.docs.items()]
+
+    stream = get
+
+    def order_by(self, field, direction=None):
+        return FakeQuery(self).order_by(field, direction)
+
+    def where(self, field, op, value):
+        return FakeQuery(self).where(field, op, value)
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.ops = []
+
+    def create(self, reference, data):
+        self.ops.append(("create", reference, data))
+
+    def set(self, reference, data):
+        self.ops.append(("set", reference, data))
+
+    def update(self, reference, data):
+        self.ops.append(("update", reference, data))
+
+    def delete(self, reference):
+        self.ops.append(("delete", reference, None))
+
+    def commit(self):
+        if len(self.ops) > 500:
+            raise ValueError("A write batch can contain at most 500 operations")
+        with self.db.lock:
+            self.db.commits.append(len(self.ops))
+            for op, reference, data in self.ops:
+                if op == "update":
+                    data = {**reference.collection.docs[reference.id], **data}
+                reference._write(None if op == "delete" else data)
+
+
+class FakeTransaction:
+    def __init__(self, db):
+        self.db = db
+        self.reads = {}
+        self.writes = []
+
+    def set(self, reference, data):
+        self.writes.append((reference, data))
+
+    def _commit(self):
+        """Apply the writes unless a document read in this attempt changed meanwhile"""
+        with self.db.lock:
+            for (collection_name, doc_id), version in self.reads.items():
+                if self.db.collection(collection_name).versions.get(doc_id, 0) != version:
+                    return False
+            for reference, data in self.writes:
+                reference._write(data)
+            return True
+
+
+def transactional(fn):
+    """Optimistic retry loop like firestore.transactional"""
+    def run(transaction, *args, **kwargs):
+        for _ in range(100):
+            transaction.reads, transaction.writes = {}, []
+            result = fn(transaction, *args, **kwargs)
+            if transaction._commit():
+                return result
+            transaction.db.aborted += 1
+        raise RuntimeError("transaction kept conflicting")
+    return run
+
+
+# Drop-in for the `google.cloud.firestore` module where services use it
+fake_firestore_module = SimpleNamespace(transactional=transactional,
+                                        Query=SimpleNamespace(DESCENDING="DESCENDING"))
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.collections = {}
+        self.commits = []  # operations per committed batch
+        self.aborted = 0  # transaction attempts retried after a conflict
+
+    def collection(self, name):
+        with self.lock:
+            if name not in self.collections:
+                self.collections[name] = FakeCollection(self, name)
+            return self.collections[name]
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def get_all(self, references):
+        return [reference.get() for reference in references]
+
+    def seed(self, collection_name, products):
+        collection = self.collection(collection_name)
+        for product in products:
+            collection.document(product["id"]).set(product)
+
+
+def make_product_service(monkeypatch, db):
+    """A ProductService over `db`; skips when the Firebase SDK is not installed"""
+    pytest.importorskip("firebase_admin")
+    import firebase_config
+    monkeypatch.setattr(firebase_config, "get_firestore_db", lambda: db)
+    monkeypatch.setattr(firebase_config, "get_firestore_async_db", lambda: None)
+    import product_service
+    monkeypatch.setattr(product_service, "get_firestore_db", lambda: db)
+    monkeypatch.setattr(product_service, "get_firestore_async_db", lambda: None)
+    monkeypatch.setattr(product_service, "firestore", fake_firestore_module)
+    from utils import id_allocator
+    monkeypatch.setattr(id_allocator, "firestore", fake_firestore_module)
+    return product_service.ProductService()
@@ -0,0 +1,128 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fake_firestore import FakeFirestore, make_product_service
+from utils.catalog_replica import CatalogReplica
+
+
+class FakeDoc:
+    def __init__(self, data, doc_id=None):
+        self._data = data
+        self.id = str(doc_id if doc_id is not None else data["id"])
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+def change(kind, doc):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=doc)
+
+
+class FakeWatchedCollection:
+    """on_snapshot target whose snapshots the test pushes by hand"""
+
+    def __init__(self):
+        self.callback = None
+        self.watch = SimpleNamespace(is_active=True, unsubscribed=False)
+        self.watch.unsubscribe = lambda: setattr(self.watch, "unsubscribed", True)
+
+    def on_snapshot(self, callback):
+        self.callback = callback
+        return self.watch
+
+    def push(self, docs, changes=(), read_time=None):
+        self.callback(docs, list(changes), read_time)
+
+
+class Recorder:
+    def __init__(self):
+        self.resets, self.upserts, self.removes = [], [], []
+
+    def replica(self, collection):
+        return CatalogReplica(collection, on_reset=self.resets.append,
+                              on_upsert=self.upserts.append, on_remove=self.removes.append)
+
+
+def test_first_snapshot_resets_then_changes_apply_incrementally():
+    collection, recorder = FakeWatchedCollection(), Recorder()
+    replica = recorder.replica(collection)
+    replica.start()
+    assert not replica.synced
+
+    lamp, desk = FakeDoc({"id": 1, "name": "Lamp"}), FakeDoc({"id": 2, "name": "Desk"})
+    collection.push([lamp, desk], [change("ADDED", lamp), change("ADDED", desk)])
+    assert recorder.resets == [[{"id": 1, "name": "Lamp"}, {"id": 2, "name": "Desk"}]]
+    assert replica.synced
+
+    new_lamp = FakeDoc({"id": 1, "name": "New lamp"})
+    collection.push([new_lamp], [change("MODIFIED", new_lamp), change("REMOVED", desk)])
+    assert recorder.upserts == [{"id": 1, "name": "New lamp"}]
+    assert recorder.removes == [2]
+    stats = replica.stats()
+    assert (stats["doc_count"], stats["snapshots"], stats["changes_applied"]) == (1, 2, 4)
+
+
+def test_removed_documents_without_an_id_field_use_the_document_id():
+    collection, recorder = FakeWatchedCollection(), Recorder()
+    replica = recorder.replica(collection)
+    replica.start()
+    collection.push([])
+    collection.push([], [change("REMOVED", FakeDoc({}, doc_id="7")), change("REMOVED", FakeDoc({}, doc_id="abc"))])
+    assert recorder.removes == [7, "abc"]
+
+
+def test_lag_is_measured_from_the_snapshot_read_time():
+    collection, recorder = FakeWatchedCollection(), Recorder()
+    replica = recorder.replica(collection)
+    replica.start()
+    read_time = datetime.fromtimestamp(time.time() - 2.5, tz=timezone.utc)
+    collection.push([], read_time=read_time)
+    assert 2.5 <= replica.stats()["lag_seconds"] < 3.5
+
+
+def test_callback_errors_are_counted_and_do_not_stop_the_listener():
+    collection = FakeWatchedCollection()
+
+    def broken_reset(products):
+        raise RuntimeError("boom")
+
+    replica = CatalogReplica(collection, on_reset=broken_reset, on_upsert=print, on_remove=print)
+    replica.start()
+    collection.push([FakeDoc({"id": 1})])
+    assert replica.stats()["errors"] == 1
+    assert not replica.synced
+
+
+def test_stop_unsubscribes_and_drops_sync():
+    collection, recorder = FakeWatchedCollection(), Recorder()
+    replica = recorder.replica(collection)
+    replica.start()
+    collection.push([])
+    replica.stop()
+    assert collection.watch.unsubscribed
+    assert not replica.synced
+
+
+def test_service_replica_reports_drift_and_does_not_renotify_writes(monkeypatch):
+    service = make_product_service(monkeypatch, FakeFirestore())
+    notified = []
+    service.add_write_listener(lambda action, ids: notified.append((action, ids)))
+    collection = FakeWatchedCollection()
+    service.start_replica(collection)
+
+    lamp, desk = FakeDoc({"id": 1, "name": "Lamp", "price": 20}), FakeDoc({"id": 2, "name": "Desk", "price": 90})
+    collection.push([lamp, desk])
+    stats = service.get_cache_stats()
+    assert stats["replica"]["synced"] and stats["replica"]["drift"] == 0
+
+    # Snapshot events for writes are applied to the indexes without a second notification
+    rug = FakeDoc({"id": 3, "name": "Rug", "price": 40})
+    collection.push([lamp, desk, rug], [change("ADDED", rug), change("REMOVED", desk)])
+    assert [p["id"] for p in service.get_all_products()] == [1, 3]
+    assert notified == []
+
+    # A snapshot listing more docs than the indexes hold shows up as drift
+    collection.push([lamp, desk, rug])
+    assert service.get_cache_stats()["replica"]["drift"] == 1
+    service.stop_replica()
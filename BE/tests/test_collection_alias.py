@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from utils import collection_alias
+from utils.collection_alias import CollectionAliases
+
+
+def test_unswitched_alias_resolves_to_itself(tmp_path):
+    aliases = CollectionAliases(str(tmp_path / "aliases.json"))
+    assert aliases.resolve("products") == "products"
+    assert aliases.retired("products") == []
+    assert aliases.version() is None
+
+
+def test_switch_replaces_the_file_atomically_and_retires_the_previous_target(tmp_path, monkeypatch):
+    path = tmp_path / "aliases.json"
+    aliases = CollectionAliases(str(path))
+    replaced = []
+    real_replace = os.replace
+
+    def recording_replace(src, dst):
+        # The new table is fully written to a temp file next to the target before the swap
+        replaced.append((os.path.dirname(src), dst, json.loads(open(src).read())["aliases"]))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(collection_alias.os, "replace", recording_replace)
+    assert aliases.switch("products", "products_v1") == "products"
+    assert aliases.switch("products", "products_v2") == "products_v1"
+
+    assert replaced[-1] == (str(tmp_path), str(path), {"products": "products_v2"})
+    assert aliases.resolve("products") == "products_v2"
+    assert [r["name"] for r in aliases.retired("products")] == ["products", "products_v1"]
+    assert [p.name for p in tmp_path.iterdir()] == ["aliases.json"]
+
+
+def test_switching_back_unretires_the_target(tmp_path):
+    aliases = CollectionAliases(str(tmp_path / "aliases.json"))
+    aliases.switch("products", "products_v1")
+    aliases.switch("products", "products")
+    assert [r["name"] for r in aliases.retired("products")] == ["products_v1"]
+
+
+def test_forget_retired(tmp_path):
+    aliases = CollectionAliases(str(tmp_path / "aliases.json"))
+    aliases.switch("products", "products_v1")
+    aliases.switch("products", "products_v2")
+    aliases.forget_retired("products", ["products"])
+    assert [r["name"] for r in aliases.retired("products")] == ["products_v1"]
+
+
+def test_failed_write_keeps_the_old_table(tmp_path, monkeypatch):
+    aliases = CollectionAliases(str(tmp_path / "aliases.json"))
+    aliases.switch("products", "products_v1")
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(collection_alias.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        aliases.switch("products", "products_v2")
+    assert aliases.resolve("products") == "products_v1"
+    assert [p.name for p in tmp_path.iterdir()] == ["aliases.json"]
+
+
+def test_unreadable_table_falls_back_to_identity(tmp_path):
+    path = tmp_path / "aliases.json"
+    path.write_text("{not json")
+    assert CollectionAliases(str(path)).resolve("products") == "products"
@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils.columnar_catalog import ColumnarCatalog
+
+PRODUCTS = [
+    {"id": 1, "category": "Phone", "price": 300, "rating": 4.5, "discount": 10},
+    {"id": 2, "category": "Laptop", "price": 900, "rating": 4.8, "discount": 0},
+    {"id": 3, "category": "Phone", "price": 150, "rating": 3.9, "discount": 25},
+    {"id": 4, "category": None, "price": "n/a", "discount": 5},
+]
+
+
+@pytest.fixture
+def catalog():
+    return ColumnarCatalog(PRODUCTS)
+
+
+def test_missing_fields_are_zero_and_unparseable_ones_nan(catalog):
+    assert catalog.rating[3] == 0.0
+    assert math.isnan(catalog.price[3])
+
+
+def test_category_mask(catalog):
+    assert catalog.category_mask("Phone").tolist() == [True, False, True, False]
+    assert not catalog.category_mask("Camera").any()
+
+
+def test_mask_combines_filters(catalog):
+    assert catalog.mask(category="Phone", max_price=200).tolist() == [False, False, True, False]
+    assert catalog.mask(min_rating=4.0, min_discount=5).tolist() == [True, False, False, False]
+    assert catalog.mask(exclude_ids=[2, 3]).tolist() == [True, False, False, True]
+
+
+def test_nan_prices_never_pass_a_price_filter(catalog):
+    assert not catalog.mask(min_price=0)[3]
+    assert not catalog.mask(max_price=10_000)[3]
+    assert catalog.mask()[3]
+
+
+def test_top_k_orders_by_score_then_row(catalog):
+    scores = np.array([5.0, 9.0, 5.0, 5.0])
+    assert catalog.top_k(scores, 2).tolist() == [1, 0]
+    assert catalog.top_k(scores, 3).tolist() == [1, 0, 2]
+    assert catalog.top_k(scores, 10).tolist() == [1, 0, 2, 3]
+
+
+def test_top_k_skips_nan_scores_and_respects_mask(catalog):
+    scores = np.array([1.0, float("nan"), 3.0, 2.0])
+    assert catalog.top_k(scores, 4).tolist() == [2, 3, 0]
+    assert catalog.top_k(scores, 2, mask=catalog.category_mask("Phone")).tolist() == [2, 0]
+    assert catalog.top_k(scores, 0).tolist() == []
+
+
+def test_top_products_returns_the_dicts(catalog):
+    products = catalog.top_products(catalog.popularity_scores(), 1)
+    assert products == [PRODUCTS[1]]
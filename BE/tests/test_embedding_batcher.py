@@ -0,0 +1,118 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from utils import embedding_batcher
+from utils.embedding_batcher import EmbeddingBatcher
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after=None):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class FakeEmbeddings:
+    """Stands in for client.embeddings: one vector [len(text)] per input, returned out of order"""
+
+    def __init__(self, failures=(), fail_inputs=()):
+        self.failures = list(failures)
+        self.fail_inputs = set(fail_inputs)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def create(self, model, input, encoding_format):
+        with self._lock:
+            self.calls.append(list(input))
+            if self.failures:
+                raise self.failures.pop(0)
+        if self.fail_inputs & set(input):
+            raise ValueError("bad input")
+        data = [SimpleNamespace(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))
+
+
+class FakeCollection:
+    def __init__(self):
+        self.upserts = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.upserts.append(ids)
+
+
+@pytest.fixture(autouse=True)
+def no_tiktoken(monkeypatch):
+    # 4 characters per token, and no encoding download, whether or not tiktoken is installed
+    monkeypatch.setattr(embedding_batcher, "TIKTOKEN_AVAILABLE", False)
+
+
+def make_batcher(embeddings, **kwargs):
+    return EmbeddingBatcher(SimpleNamespace(embeddings=embeddings), "fake-model", **kwargs)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(embedding_batcher.time, "sleep", delays.append)
+    return delays
+
+
+def test_batches_respect_input_count():
+    batcher = make_batcher(FakeEmbeddings(), batch_size=2)
+    assert batcher.make_batches(["a", "b", "c", "d", "e"]) == [[0, 1], [2, 3], [4]]
+
+
+def test_batches_respect_token_budget():
+    batcher = make_batcher(FakeEmbeddings(), batch_size=10, max_batch_tokens=5)
+    # 8 characters ~ 2 tokens each: two fit in a 5-token request, a third does not
+    assert batcher.make_batches(["x" * 8] * 5) == [[0, 1], [2, 3], [4]]
+
+
+def test_oversized_text_gets_its_own_request():
+    batcher = make_batcher(FakeEmbeddings(), batch_size=10, max_batch_tokens=5)
+    assert batcher.make_batches(["abcd", "x" * 400, "abcd"]) == [[0], [1], [2]]
+
+
+def test_embeddings_are_aligned_with_inputs():
+    fake = FakeEmbeddings()
+    batcher = make_batcher(fake, batch_size=2, max_concurrency=2)
+    assert batcher.embed(["a", "bb", "ccc"]) == [[1.0], [2.0], [3.0]]
+    assert batcher.stats()["requests"] == 2
+
+
+def test_rate_limit_retry_honours_retry_after(sleeps):
+    fake = FakeEmbeddings(failures=[RateLimited(retry_after="7"), RateLimited(retry_after="120")])
+    batcher = make_batcher(fake, backoff_max=30.0)
+    assert batcher.embed(["abc"]) == [[3.0]]
+    # Retry-After is used as-is, capped at backoff_max
+    assert sleeps == [7.0, 30.0]
+    assert batcher.stats()["retries"] == 2
+
+
+def test_rate_limit_without_retry_after_backs_off_exponentially(sleeps):
+    fake = FakeEmbeddings(failures=[RateLimited(), RateLimited()])
+    batcher = make_batcher(fake, backoff_base=1.0)
+    batcher.embed(["abc"])
+    assert 0.5 <= sleeps[0] <= 1.0 and 1.0 <= sleeps[1] <= 2.0
+
+
+def test_retries_give_up_after_max_retries(sleeps):
+    fake = FakeEmbeddings(failures=[RateLimited(retry_after="1")] * 5)
+    batcher = make_batcher(fake, max_retries=2)
+    assert batcher.embed(["abc"]) == [None]
+    assert len(sleeps) == 2
+    assert batcher.stats()["failed_batches"] == 1
+
+
+def test_failed_batches_are_counted_not_stored():
+    fake = FakeEmbeddings(fail_inputs={"bad"})
+    batcher = make_batcher(fake, batch_size=2, max_concurrency=1)
+    collection = FakeCollection()
+    texts = ["ok1", "ok2", "bad", "ok3", "ok4"]
+    ids = [f"id{i}" for i in range(len(texts))]
+    stored, failed = batcher.embed_into_collection(collection, ids, texts, [{}] * len(texts))
+    assert (stored, failed) == (3, 2)
+    assert sorted(sum(collection.upserts, [])) == ["id0", "id1", "id4"]
+    assert batcher.stats()["failed_batches"] == 1
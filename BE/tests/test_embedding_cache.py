@@ -0,0 +1,26 @@
+import asyncio
+
+from utils.embedding_cache import EmbeddingCache
+
+
+def test_async_lookups_fall_through_to_disk(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    asyncio.run(EmbeddingCache(path).set_async("Red  Shoes", "m", [0.5, 0.25]))
+
+    cache = EmbeddingCache(path)
+    assert asyncio.run(cache.get_async("red shoes", "m")) == [0.5, 0.25]
+    assert asyncio.run(cache.get_async("blue shoes", "m")) is None
+    disk = cache.stats()["disk"]
+    assert (disk["hits"], disk["misses"]) == (1, 1)
+
+
+def test_disk_entry_count_tracks_inserts_and_prunes(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path, max_disk_entries=2)
+    for i in range(3):
+        cache.set(f"query {i}", "m", [float(i)])
+    cache.set("query 0", "m", [9.0])
+    assert cache.stats()["disk"]["entries"] == 3
+    cache._prune()
+    assert cache.stats()["disk"]["entries"] == 2
+    assert EmbeddingCache(path).stats()["disk"]["entries"] == 2
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from fake_chroma import make_ai_service, product
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    return make_ai_service(monkeypatch, tmp_path, [product(1), product(2, "Camp Stove", 45.0)])
+
+
+def test_rebuild_switches_the_alias_and_retires_the_old_collection(service):
+    old = service.collection
+    assert old.name == "products_embeddings"
+
+    result = asyncio.run(service.rebuild_embeddings())
+    assert result["status"] == "success"
+    assert service.collection_aliases.resolve("products_embeddings") == "products_embeddings_v1"
+    assert service.live_collection_name == "products_embeddings_v1"
+    assert service.get_live_collection().count() == 2
+    assert service._rebuild_collection is None
+
+    # The old collection keeps serving in-flight searches until the retention period ends
+    assert service.drop_retired_collections() == []
+    assert service.drop_retired_collections(max_age=0) == ["products_embeddings"]
+    assert "products_embeddings" not in service.chroma_client.collections
+    assert service.collection_aliases.retired("products_embeddings") == []
+
+
+def test_rebuild_reuses_vectors_of_the_live_collection(service):
+    asyncio.run(service.embed_all_products())
+    embedded = len(service.embeddings_client.embedded)
+    assert embedded == 2
+
+    asyncio.run(service.rebuild_embeddings())
+    assert len(service.embeddings_client.embedded) == embedded
+
+
+def test_failed_validation_rolls_back(service, monkeypatch):
+    monkeypatch.setattr(service, "_validate_collection", lambda collection, expected: "collection is empty")
+    result = asyncio.run(service.rebuild_embeddings())
+    assert result["status"] == "error"
+    assert "still serving products_embeddings" in result["message"]
+    assert service.collection_aliases.resolve("products_embeddings") == "products_embeddings"
+    assert service.chroma_client.deleted == ["products_embeddings_v1"]
+    assert service._rebuild_collection is None
+    assert service.live_collection_name == "products_embeddings"
+
+
+def test_validation_rejects_incomplete_collections(service):
+    asyncio.run(service.embed_all_products())
+    assert service._validate_collection(service.collection, 2) is None
+    assert service._validate_collection(service.collection, 3) == "2 entries, expected 3"
+
+
+def test_needs_rebuild_only_on_recorded_settings_that_differ(service):
+    assert not service._needs_rebuild()
+    service.collection.metadata = {"hnsw:space": "cosine"}  # legacy: model and text version not recorded
+    assert not service._needs_rebuild()
+    service.collection.metadata = {"embedding_model": "text-embedding-ada-002"}
+    assert service._needs_rebuild()
+    service.collection.metadata = {"embedding_model": service.embedding_model, "product_text_version": 0}
+    assert service._needs_rebuild()
+
+
+def test_other_processes_alias_switches_are_followed(service):
+    service.chroma_client.create_collection("products_embeddings_v7")
+    service.collection_aliases.switch("products_embeddings", "products_embeddings_v7")
+    service._alias_version = None  # mtime may not tick between the two writes
+    assert service.get_live_collection().name == "products_embeddings_v7"
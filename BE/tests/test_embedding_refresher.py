@@ -0,0 +1,77 @@
+import threading
+import time
+
+from utils.embedding_refresher import DELETE, UPSERT, EmbeddingRefresher
+
+
+class Recorder:
+    def __init__(self, fail=False):
+        self.upserts, self.deletes = [], []
+        self.fail = fail
+        self.flushed = threading.Event()
+
+    def upsert(self, product_ids):
+        if self.fail:
+            raise RuntimeError("chroma down")
+        self.upserts.append(sorted(product_ids))
+        self.flushed.set()
+
+    def delete(self, product_ids):
+        self.deletes.append(sorted(product_ids))
+        self.flushed.set()
+
+
+def test_events_within_the_window_are_coalesced_to_the_latest_action():
+    recorder = Recorder()
+    refresher = EmbeddingRefresher(recorder.upsert, recorder.delete, batch_window=0.2)
+    refresher.enqueue(UPSERT, [1, 2])
+    refresher.enqueue(UPSERT, [1])
+    refresher.enqueue(DELETE, [2, 3])
+    pending = refresher._collect()
+    assert {pid: action for pid, (action, _) in pending.items()} == {1: UPSERT, 2: DELETE, 3: DELETE}
+
+    refresher.flush(pending)
+    assert recorder.upserts == [[1]]
+    assert recorder.deletes == [[2, 3]]
+    stats = refresher.stats()
+    assert (stats["batches"], stats["upserted"], stats["deleted"]) == (1, 1, 2)
+
+
+def test_collect_keeps_the_first_queued_time_for_lag():
+    refresher = EmbeddingRefresher(print, print, batch_window=0.05)
+    refresher.enqueue(UPSERT, [1])
+    first = time.monotonic()
+    time.sleep(0.01)
+    refresher.enqueue(DELETE, [1])
+    action, queued_at = refresher._collect()[1]
+    assert action == DELETE
+    assert queued_at <= first
+
+
+def test_max_batch_closes_the_window_early():
+    refresher = EmbeddingRefresher(print, print, batch_window=5.0, max_batch=3)
+    refresher.enqueue(UPSERT, list(range(5)))
+    started = time.monotonic()
+    assert sorted(refresher._collect()) == [0, 1, 2]
+    assert time.monotonic() - started < 1.0
+    assert refresher.stats()["queued"] == 2
+
+
+def test_worker_flushes_in_the_background():
+    recorder = Recorder()
+    refresher = EmbeddingRefresher(recorder.upsert, recorder.delete, batch_window=0.05)
+    refresher.start()
+    try:
+        refresher.enqueue(UPSERT, [7, 8])
+        assert recorder.flushed.wait(2)
+        assert recorder.upserts == [[7, 8]]
+        assert refresher.stats()["last_lag_seconds"] is not None
+    finally:
+        refresher.stop()
+
+
+def test_failed_flush_is_counted():
+    refresher = EmbeddingRefresher(Recorder(fail=True).upsert, print)
+    refresher.flush({1: (UPSERT, time.monotonic())})
+    assert refresher.stats()["errors"] == 1
+    assert refresher.stats()["batches"] == 0
@@ -0,0 +1,63 @@
+import pytest
+
+from fake_chroma import make_ai_service, product
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    service = make_ai_service(monkeypatch, tmp_path)
+    products = [product(1), product(2, "Camp Stove", 45.0), product(3, "Sleeping Bag", 80.0)]
+    service._sync_products_to_collection(service._products_from_dicts(products))
+    service.collection.calls.clear()
+    service.embeddings_client.embedded.clear()
+    return service
+
+
+def sync(service, products):
+    return service._sync_products_to_collection(service._products_from_dicts(products))
+
+
+def writes(collection):
+    return [call for call in collection.calls if call[0] in ("upsert", "update", "delete")]
+
+
+def test_unchanged_products_are_skipped(service):
+    result = sync(service, [product(1), product(2, "Camp Stove", 45.0), product(3, "Sleeping Bag", 80.0)])
+    assert result == {"embedded": 0, "failed": 0, "metadata_updated": 0, "unchanged": 3}
+    assert writes(service.collection) == []
+    assert service.embeddings_client.embedded == []
+
+
+def test_only_changed_and_new_texts_are_embedded(service):
+    result = sync(service, [product(1), product(2, "Camping Stove", 45.0), product(4, "Lantern", 25.0)])
+    assert (result["embedded"], result["unchanged"]) == (2, 1)
+    assert writes(service.collection) == [("upsert", ["product_2", "product_4"])]
+    assert len(service.embeddings_client.embedded) == 2
+
+
+def test_metadata_only_changes_keep_the_vector(service):
+    vector = service.collection.entries["product_3"]["embedding"]
+    result = sync(service, [product(1), product(3, "Sleeping Bag", 80.0, rating=4.5)])
+    assert (result["embedded"], result["metadata_updated"], result["unchanged"]) == (0, 1, 1)
+    assert writes(service.collection) == [("update", ["product_3"])]
+    assert service.collection.entries["product_3"]["metadata"]["rating"] == 4.5
+    assert service.collection.entries["product_3"]["embedding"] == vector
+
+
+def test_changing_the_embedding_model_reembeds_everything(service):
+    service.embedding_model = "text-embedding-3-large"
+    service.embedding_batcher.model = service.embedding_model
+    result = sync(service, [product(1), product(2, "Camp Stove", 45.0)])
+    assert result["embedded"] == 2
+    assert service.collection.entries["product_1"]["metadata"]["embedding_model"] == "text-embedding-3-large"
+
+
+def test_drop_missing_products_deletes_only_removed_ids(service):
+    removed = service._drop_missing_products(service.collection, [product(1), product(3, "Sleeping Bag", 80.0)])
+    assert removed == 1
+    assert writes(service.collection) == [("delete", ["product_2"])]
+    assert sorted(service.collection.entries) == ["product_1", "product_3"]
+
+    service.collection.calls.clear()
+    assert service._drop_missing_products(service.collection, [product(1), product(3)]) == 0
+    assert writes(service.collection) == []
@@ -0,0 +1,57 @@
+from utils.facets import CatalogFacets, PRICE_BUCKET_EDGES
+
+
+def bucket_counts(snapshot):
+    return {bucket["label"]: bucket["count"] for bucket in snapshot["price_buckets"] if bucket["count"]}
+
+
+def test_build_counts_categories_brands_and_price_buckets():
+    facets = CatalogFacets()
+    facets.build([
+        {"category": "Phone", "brand": "Apple", "price": 999},
+        {"category": "Phone", "brand": "Samsung", "price": 49.99},
+        {"category": "Watch", "brand": "Apple", "price": 2500},
+        {"category": "Watch", "price": "n/a"},
+    ])
+    snapshot = facets.snapshot()
+    assert snapshot["categories"] == {"Phone": 2, "Watch": 2}
+    assert snapshot["brands"] == {"Apple": 2, "Samsung": 1}
+    assert bucket_counts(snapshot) == {"0-50": 1, "500-1000": 1, "2000+": 1}
+    assert snapshot["total_products"] == 4
+    assert len(snapshot["price_buckets"]) == len(PRICE_BUCKET_EDGES)
+
+
+def test_add_and_remove_update_counts_and_names():
+    facets = CatalogFacets()
+    facets.build([{"category": "Phone", "brand": "Apple", "price": 10}])
+    assert facets.categories() == ["Phone"]
+
+    facets.add({"category": "Camera", "brand": "Canon", "price": 300})
+    assert facets.categories() == ["Camera", "Phone"]
+    assert facets.brands() == ["Apple", "Canon"]
+
+    facets.remove({"category": "Phone", "brand": "Apple", "price": 10})
+    snapshot = facets.snapshot()
+    assert facets.categories() == ["Camera"]
+    assert snapshot["categories"] == {"Camera": 1}
+    assert bucket_counts(snapshot) == {"250-500": 1}
+
+
+def test_snapshot_is_memoized_until_a_write():
+    facets = CatalogFacets()
+    facets.build([{"category": "Phone", "price": 10}])
+    first = facets.snapshot()
+    assert facets.snapshot() is first
+    facets.add({"category": "Phone", "price": 20})
+    assert facets.snapshot()["categories"] == {"Phone": 2}
+
+
+def test_rebuild_with_empty_catalog_drops_old_snapshot():
+    facets = CatalogFacets()
+    facets.build([{"category": "Phone", "brand": "Apple", "price": 10}])
+    facets.snapshot()
+    facets.build([])
+    snapshot = facets.snapshot()
+    assert snapshot["categories"] == {}
+    assert snapshot["total_products"] == 0
+    assert facets.categories() == []
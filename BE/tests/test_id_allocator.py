@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+pytest.importorskip("google.cloud.firestore")
+
+from fake_firestore import FakeFirestore, fake_firestore_module
+from utils import id_allocator
+from utils.id_allocator import IdAllocator
+
+
+@pytest.fixture(autouse=True)
+def fake_transactions(monkeypatch):
+    monkeypatch.setattr(id_allocator, "firestore", fake_firestore_module)
+
+
+def counter(db):
+    return db.collection("counters").docs["products"]["next_id"]
+
+
+def test_first_reservation_is_seeded_inside_the_transaction():
+    db = FakeFirestore()
+    seeds = []
+
+    def seed():
+        seeds.append(1)
+        return 42
+
+    allocator = IdAllocator(db, block_size=5, seed_fn=seed)
+    assert allocator.allocate(2) == [42, 43]
+    assert counter(db) == 47
+    assert allocator.allocate(1) == [44]
+    assert seeds == [1]
+    assert allocator.stats() == {"held": 2, "block_size": 5, "reservations": 1}
+
+
+def test_existing_counter_wins_over_the_seed():
+    db = FakeFirestore()
+    db.collection("counters").document("products").set({"next_id": 100})
+    allocator = IdAllocator(db, block_size=3, seed_fn=lambda: 1)
+    assert allocator.allocate(1) == [100]
+
+
+def test_block_refills_when_it_runs_out():
+    db = FakeFirestore()
+    allocator = IdAllocator(db, block_size=3)
+    assert allocator.allocate(2) == [1, 2]
+    # One ID left in the block; the other two come from a fresh reservation
+    assert allocator.allocate(3) == [3, 4, 5]
+    assert allocator.stats()["reservations"] == 2
+    assert counter(db) == 7
+
+
+def test_large_requests_reserve_at_least_what_they_need():
+    db = FakeFirestore()
+    allocator = IdAllocator(db, block_size=2)
+    assert allocator.allocate(5) == [1, 2, 3, 4, 5]
+    assert allocator.allocate(0) == []
+    assert counter(db) == 6
+
+
+def test_concurrent_allocators_never_overlap():
+    db = FakeFirestore()
+    allocators = [IdAllocator(db, block_size=7, seed_fn=lambda: 10) for _ in range(4)]
+    allocated = []
+    lock = threading.Lock()
+    start = threading.Barrier(8)
+
+    def worker(allocator):
+        start.wait()
+        for size in (1, 3, 2, 5, 1, 4):
+            ids = allocator.allocate(size)
+            with lock:
+                allocated.extend(ids)
+
+    threads = [threading.Thread(target=worker, args=(allocators[i % 4],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(allocated) == 8 * 16
+    assert len(set(allocated)) == len(allocated)
+    assert min(allocated) == 10
+
+
+def test_service_seed_ignores_non_numeric_ids(monkeypatch):
+    from fake_firestore import make_product_service
+    db = FakeFirestore()
+    db.seed("products", [{"id": 5}, {"id": 12}, {"id": "legacy-7"}])
+    service = make_product_service(monkeypatch, db)
+    assert service._get_max_product_id() == 13
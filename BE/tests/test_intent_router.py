@@ -0,0 +1,82 @@
+import pytest
+
+from utils.intent_router import AGENT_PATH, FAST_PATH, RouteStats, is_question, match_categories, route_search
+
+
+def user(*turns):
+    messages = []
+    for i, turn in enumerate(turns):
+        if i:
+            messages.append({"role": "assistant", "content": "..."})
+        messages.append({"role": "user", "content": turn})
+    return messages
+
+
+@pytest.mark.parametrize("query, category", [
+    ("cheap laptop under 500", "laptop"),
+    ("garmin watch", "watch"),
+    ("máy ảnh giá rẻ", "camera"),
+    ("노트북 추천", "laptop"),
+    ("tent for 4 people", "camping gear"),
+])
+def test_plain_product_query_takes_fast_path(query, category):
+    route = route_search(user(query))
+    assert route["path"] == FAST_PATH
+    assert route["category"] == category
+
+
+@pytest.mark.parametrize("query", ["gift for my mom", "birthday present camera", "quà tặng điện thoại", "선물 카메라"])
+def test_gift_requests_go_to_agent(query):
+    assert route_search(user(query)) == {"path": AGENT_PATH, "category": None, "reason": "gift context"}
+
+
+@pytest.mark.parametrize("query", ["where is my order for the camera", "refund my phone", "laptop shipping"])
+def test_non_search_requests_go_to_agent(query):
+    assert route_search(user(query))["reason"] == "not a product search"
+
+
+def test_category_count_must_be_exactly_one():
+    assert route_search(user("phone and laptop deals"))["reason"] == "several categories"
+    assert route_search(user("something nice"))["reason"] == "no category"
+
+
+@pytest.mark.parametrize("query", [
+    "is this phone waterproof?",
+    "which laptop is best for gaming",
+    "does the garmin watch have gps",
+    "điện thoại này giá bao nhiêu",
+    "这个相机怎么样",
+])
+def test_questions_go_to_agent(query):
+    assert route_search(user(query))["reason"] == "question"
+
+
+def test_follow_up_turns_go_to_agent():
+    # The search would only see "tent" and lose the budget from the first turn
+    route = route_search(user("something for hiking under 100", "ok", "tent"))
+    assert route == {"path": AGENT_PATH, "category": None, "reason": "multi-turn conversation"}
+
+
+def test_empty_conversation_goes_to_agent():
+    assert route_search([])["reason"] == "no user input"
+    assert route_search(user("   "))["reason"] == "no user input"
+
+
+def test_keywords_match_whole_tokens():
+    assert match_categories("watchful eye") == []
+    assert match_categories("smartwatch strap") == ["watch"]
+    assert not is_question("show me cameras")
+
+
+def test_route_stats_track_paths_and_agent_overhead():
+    stats = RouteStats(smoothing=0.5)
+    assert stats.estimated_saving_ms() is None
+    stats.record(AGENT_PATH, 1000.0)
+    stats.record(AGENT_PATH, 2000.0)
+    stats.record(FAST_PATH)
+    assert stats.estimated_saving_ms() == 1500.0
+    assert stats.stats() == {
+        "requests": {FAST_PATH: 1, AGENT_PATH: 2},
+        "fast_path_share": 0.3333,
+        "avg_agent_overhead_ms": 1500.0,
+    }
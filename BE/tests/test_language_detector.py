@@ -0,0 +1,60 @@
+import pytest
+
+from utils.language_detector import SUPPORTED_LANGUAGES, detect_language
+
+# AIService asks the LLM below this confidence (LANGUAGE_DETECT_MIN_CONFIDENCE default)
+MIN_CONFIDENCE = 0.6
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("I want a cheap laptop for my mom", "en"),
+    ("tôi muốn mua điện thoại giá rẻ", "vi"),
+    ("toi muon mua dien thoai gia re", "vi"),
+    ("quiero un teléfono barato para mi mamá", "es"),
+    ("je cherche une montre pas chère", "fr"),
+    ("ich suche eine günstige Kamera für meine Mutter", "de"),
+    ("quero um celular barato para minha mãe", "pt"),
+    ("cerco un orologio economico per mia mamma", "it"),
+    ("安いノートパソコンを探しています", "ja"),
+    ("저렴한 노트북 추천해 주세요", "ko"),
+    ("我想买一部便宜的手机", "zh"),
+])
+def test_detects_supported_languages_confidently(text, expected):
+    code, confidence = detect_language(text)
+    assert code == expected
+    assert code in SUPPORTED_LANGUAGES
+    assert MIN_CONFIDENCE <= confidence <= 1.0
+
+
+def test_bare_product_names_default_to_english():
+    assert detect_language("iphone 15 pro") == ("en", 0.7)
+
+
+@pytest.mark.parametrize("text", ["", "   ", "дешевый телефон"])
+def test_empty_or_unprofiled_text_is_unknown(text):
+    assert detect_language(text) == (None, 0.0)
+
+
+def test_ambiguous_short_text_has_low_confidence():
+    code, confidence = detect_language("la camera")
+    assert code is not None
+    assert confidence < MIN_CONFIDENCE
+
+
+def test_japanese_kanji_with_kana_is_not_chinese():
+    assert detect_language("腕時計を買いたい")[0] == "ja"
+
+
+@pytest.mark.parametrize("text", [
+    "portable speaker",
+    "portable monitor",
+    "portable charger",
+    "mini camera",
+    "camera with wifi",
+    "sony a7 iv",
+    "gaming laptop",
+])
+def test_english_shopping_queries_with_shared_words_stay_english(text):
+    code, confidence = detect_language(text)
+    assert code == "en"
+    assert confidence >= MIN_CONFIDENCE
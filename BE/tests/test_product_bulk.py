@@ -0,0 +1,59 @@
+import pytest
+
+from fake_firestore import FakeFirestore, make_product_service
+
+
+@pytest.fixture
+def db():
+    db = FakeFirestore()
+    db.seed("products", [
+        {"id": 1, "name": "Lamp", "price": 20, "category": "Home"},
+        {"id": 2, "name": "Desk", "price": 90, "category": "Home"},
+        {"id": "legacy-7", "name": "Rug", "price": 40, "category": "Home"},
+    ])
+    return db
+
+
+@pytest.fixture
+def service(monkeypatch, db):
+    service = make_product_service(monkeypatch, db)
+    service.get_all_products()  # warm the indexes
+    clears = []
+    original = service._clear_products_cache
+    monkeypatch.setattr(service, "_clear_products_cache", lambda: (clears.append(1), original()))
+    service.cache_clears = clears
+    return service
+
+
+def test_bulk_create_commits_in_batches_of_500_and_invalidates_once(service, db):
+    from models import ProductCreate, SearchFilters
+    products = [ProductCreate(name=f"Item {i}", price=i, imageUrl="", category="Bulk") for i in range(1200)]
+    result = service.bulk_create_products(products)
+    assert (result["success"], result["succeeded"]) == (True, 1200)
+    assert sorted(db.commits) == [200, 500, 500]
+    assert service.cache_clears == [1]
+    assert [r["index"] for r in result["results"]] == list(range(1200))
+    assert len(service.search_products(SearchFilters(category="Bulk"))) == 1200
+
+
+def test_bulk_update_handles_non_numeric_document_ids(service, db):
+    from models import ProductUpdate
+    result = service.bulk_update_products([
+        ("legacy-7", ProductUpdate(price=35)),
+        (2, ProductUpdate(name="Standing desk")),
+        (99, ProductUpdate(price=1)),
+    ])
+    assert [r["success"] for r in result["results"]] == [True, True, False]
+    assert result["results"][2]["error"] == "Product not found"
+    assert db.collection("products").docs["legacy-7"]["price"] == 35
+    assert service.get_product_by_id(2)["name"] == "Standing desk"
+    assert db.commits == [2]
+    assert service.cache_clears == [1]
+
+
+def test_bulk_delete_reports_unknown_ids(service, db):
+    result = service.bulk_delete_products([1, "legacy-7", 42])
+    assert [r["success"] for r in result["results"]] == [True, True, False]
+    assert set(db.collection("products").docs) == {"2"}
+    assert [p["id"] for p in service.get_all_products()] == [2]
+    assert service.cache_clears == [1]
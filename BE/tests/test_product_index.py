@@ -0,0 +1,42 @@
+from utils.product_index import ProductIndex
+
+
+def build(*products):
+    index = ProductIndex()
+    index.build(products)
+    return index
+
+
+MIXED = (
+    {"id": 10, "name": "Lamp", "category": "Home", "price": 20},
+    {"id": "abc", "name": "Kettle", "category": "Home", "price": 20},
+    {"id": 2, "name": "Desk", "category": "Home", "price": 150},
+    {"id": "7", "name": "Chair", "category": "Office", "price": 20},
+)
+
+
+def test_mixed_id_types_sort_ints_then_numeric_then_other_strings():
+    index = build(*MIXED)
+    assert [p["id"] for p in index.all_products()] == [2, 10, "7", "abc"]
+    assert [p["id"] for p in index.query(category="Home")] == [2, 10, "abc"]
+
+
+def test_price_range_over_mixed_ids():
+    index = build(*MIXED)
+    assert index.query_ids(max_price=50) == {10, "abc", "7"}
+    assert index.query_ids(min_price=100) == {2}
+
+
+def test_upsert_and_remove_with_mixed_ids():
+    index = build(*MIXED)
+    index.upsert({"id": "xyz", "name": "Rug", "category": "Home", "price": 20})
+    index.upsert({"id": 2, "name": "Desk", "category": "Home", "price": 30})
+    assert index.query_ids(max_price=50) == {2, 10, "abc", "7", "xyz"}
+    index.remove("abc")
+    assert index.query_ids(category="Home") == {2, 10, "xyz"}
+
+
+def test_keyset_page_after_mixed_ids():
+    index = build(*MIXED)
+    assert [p["id"] for p in index.page(None, 2)] == [2, 10]
+    assert [p["id"] for p in index.page(10, 2)] == ["7", "abc"]
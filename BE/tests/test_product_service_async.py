@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from fake_firestore import FakeFirestore, make_product_service
+
+
+@pytest.fixture
+def service(monkeypatch):
+    db = FakeFirestore()
+    db.seed("products", [
+        {"id": 1, "name": "Lamp", "price": 20, "category": "Home", "brand": "Lumo"},
+        {"id": 2, "name": "Tent", "price": 150, "category": "Camping Gear", "brand": "Trail"},
+    ])
+    return make_product_service(monkeypatch, db)
+
+
+def test_async_facets_load_the_catalog(service):
+    assert sorted(asyncio.run(service.get_categories_async())) == ["Camping Gear", "Home"]
+    assert sorted(asyncio.run(service.get_brands_async())) == ["Lumo", "Trail"]
+    assert asyncio.run(service.get_facets_async())["total_products"] == 2
+
+
+def test_async_facets_fall_back_like_the_sync_versions(service, monkeypatch):
+    async def unavailable():
+        raise RuntimeError("firestore unavailable")
+
+    monkeypatch.setattr(service, "_ensure_index_async", unavailable)
+    assert asyncio.run(service.get_categories_async()) == []
+    assert asyncio.run(service.get_brands_async()) == []
+    facets = asyncio.run(service.get_facets_async())
+    assert facets == {"categories": {}, "brands": {}, "price_buckets": [], "total_products": 0}
+
+
+def test_async_search_never_loads_synchronously(service, monkeypatch):
+    from models import SearchFilters
+    asyncio.run(service._ensure_index_async())
+
+    def blocking_load():
+        raise AssertionError("sync catalog load on the async path")
+
+    monkeypatch.setattr(service, "_ensure_index", blocking_load)
+    assert [p["id"] for p in asyncio.run(service.search_products_async(SearchFilters(category="Home")))] == [1]
+    assert len(asyncio.run(service.get_featured_products_async(5))) == 2
@@ -0,0 +1,61 @@
+from utils.rankings import Leaderboard, featured_score, popularity_score
+
+
+def featured(*products):
+    board = Leaderboard(featured_score, fields=("featured", "rating"), capacity=3)
+    board.build(products)
+    return board
+
+
+def ids(pairs):
+    return [product_id for product_id, _ in pairs]
+
+
+def test_scores():
+    assert featured_score({"featured": False, "rating": 5}) is None
+    assert featured_score({"featured": True, "rating": "4.5"}) == 4.5
+    assert featured_score({"featured": True, "rating": "n/a"}) == 0.0
+    assert popularity_score({"weeklySales": 3, "weeklyViews": 10, "rating": 4}) == 53
+    assert popularity_score({"weeklySales": "many"}) is None
+
+
+def test_top_orders_by_score_and_keeps_id_order_on_ties():
+    board = featured(
+        {"id": 1, "featured": True, "rating": 4},
+        {"id": 2, "featured": True, "rating": 5},
+        {"id": 3, "featured": False, "rating": 5},
+        {"id": 4, "featured": True, "rating": 4},
+    )
+    assert ids(board.top(3)) == [2, 1, 4]
+    assert ids(board.top(10)) == [2, 1, 4]
+
+
+def test_unchanged_write_keeps_cached_top():
+    board = featured({"id": 1, "featured": True, "rating": 4}, {"id": 2, "featured": True, "rating": 3})
+    board.top(2)
+    board.upsert({"id": 1, "featured": True, "rating": 4, "name": "renamed"})
+    board.top(2)
+    assert board.stats()["recomputes"] == 1
+
+
+def test_score_changes_update_the_top():
+    board = featured(*({"id": i, "featured": True, "rating": i} for i in range(1, 6)))
+    assert ids(board.top(3)) == [5, 4, 3]
+
+    board.upsert({"id": 1, "featured": True, "rating": 9})
+    assert ids(board.top(3)) == [1, 5, 4]
+
+    board.upsert({"id": 5, "featured": False, "rating": 5})
+    assert ids(board.top(3)) == [1, 4, 3]
+
+    board.remove(4)
+    assert ids(board.top(3)) == [1, 3, 2]
+    assert board.stats()["ranked"] == 3
+
+
+def test_change_below_the_cached_top_does_not_recompute():
+    board = featured(*({"id": i, "featured": True, "rating": i} for i in range(1, 6)))
+    board.top(3)
+    board.upsert({"id": 1, "featured": True, "rating": 1.5})
+    board.top(3)
+    assert board.stats()["recomputes"] == 1
@@ -0,0 +1,57 @@
+from utils.response_templates import PHRASES, ResponseTemplates, normalize_language
+
+PHRASES_SMALL = {
+    "en": {
+        "intro": {"none": ["No {items}."], "one": ["One {items}."], "some": ["{count} {items}.", "All {count}."]},
+        "header": ["Picks:"],
+        "show_all": ["See all {count} {items}?"],
+    },
+    "vi": {
+        "intro": {"none": ["Không có."], "one": ["Một."], "some": ["{count} {items}."]},
+        "header": ["Gợi ý:"],
+        "show_all": ["Xem {count}?"],
+    },
+}
+ITEM_NAMES_SMALL = {
+    "en": {"laptop": "laptops", "products": "products"},
+    "vi": {"laptop": "máy tính", "products": "sản phẩm"},
+}
+
+
+def templates():
+    return ResponseTemplates(PHRASES_SMALL, ITEM_NAMES_SMALL)
+
+
+def test_intro_follows_count_bucket():
+    assert templates().render("en", 0)["intro"] == "No products."
+    assert templates().render("en", 1)["intro"] == "One products."
+    assert templates().render("en", 2, "laptop")["intro"] == "2 laptops."
+
+
+def test_count_and_items_are_substituted():
+    copy = templates().render("vi", 5, " Laptop ")
+    assert copy == {"intro": "5 máy tính.", "header": "Gợi ý:", "show_all_product": "Xem 5?"}
+    assert templates().render("en", 4, "tent")["show_all_product"] == "See all 4 products?"
+
+
+def test_show_all_only_above_three():
+    assert templates().render("en", 3)["show_all_product"] == ""
+    assert templates().render("en", 4)["show_all_product"] == "See all 4 products?"
+
+
+def test_unknown_language_falls_back_to_default():
+    assert templates().render("xx", 2)["header"] == "Picks:"
+    assert templates().render(None, 2)["header"] == "Picks:"
+
+
+def test_language_code_is_normalized():
+    assert [normalize_language(code) for code in ("pt-BR", "EN", "vi.", " zh_CN ")] == ["pt", "en", "vi", "zh"]
+    assert templates().render("VI-vn", 0)["intro"] == "Không có."
+    assert templates().render("vi.", 2)["header"] == "Gợi ý:"
+    assert ResponseTemplates().render("pt-BR", 1)["intro"] in PHRASES["pt"]["intro"]["one"]
+
+
+def test_variants_rotate_per_language_and_bucket():
+    rendered = templates()
+    assert [rendered.render("en", 2)["intro"] for _ in range(3)] == ["2 products.", "All 2.", "2 products."]
+    assert rendered.render("en", 0)["intro"] == "No products."
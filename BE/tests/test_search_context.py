@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+
+from fake_chroma import index_products, make_ai_service, product
+from utils.search_context import SearchContext
+
+
+def test_context_round_trips_through_the_run_config():
+    context = SearchContext(limit=3, language="de")
+    config = context.as_config(recursion_limit=5)
+    assert config["recursion_limit"] == 5
+    assert SearchContext.from_config(config) is context
+
+
+def test_missing_context_falls_back_to_defaults():
+    for config in (None, {}, {"configurable": {}}):
+        context = SearchContext.from_config(config)
+        assert (context.limit, context.language, context.tool_source) == (10, "en", None)
+
+
+def test_resolve_language_awaits_a_pending_detection():
+    async def run():
+        context = SearchContext(language=asyncio.create_task(asyncio.sleep(0.01, result="ja")))
+        assert await context.resolve_language() == "ja"
+        assert context.language == "ja"
+
+    asyncio.run(run())
+
+
+class FakeAgent:
+    """Runs find_products the way the real tool does: the context only comes in through config"""
+
+    def __init__(self, service):
+        self.service = service
+        self.contexts = []
+
+    async def ainvoke(self, state, config):
+        from langchain_core.messages import ToolMessage
+        context = SearchContext.from_config(config)
+        self.contexts.append(context)
+        query = state["messages"][-1]["content"]
+        # Let the other request's agent run start before this one searches
+        await asyncio.sleep(0.05)
+        context.tool_source = "find_products"
+        result = await context.timings.timed("search", self.service.semantic_search_async(query, context))
+        return {"messages": [ToolMessage(content=json.dumps(result), name="find_products", tool_call_id="call-1")]}
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    service = make_ai_service(monkeypatch, tmp_path, [
+        product(1, "Trail Tent", 120.0),
+        product(2, "Camp Stove", 45.0),
+        product(3, "Sleeping Bag", 80.0),
+    ])
+    index_products(service, {1: [1.0, 0.0], 2: [0.8, 0.2], 3: [0.6, 0.4]})
+    service.fast_path_enabled = False
+    service.agent = FakeAgent(service)
+    service.TOOL_NAMES = {"find_products"}
+
+    languages = {"find a tent": ("vi", 0.2), "find a stove": ("fr", 0.01)}
+
+    async def detect_language(text):
+        language, delay = languages[text]
+        await asyncio.sleep(delay)
+        return language
+
+    async def extract_intent(user_input, log_query=True):
+        await asyncio.sleep(0.01)
+        return {"search_query": user_input, "product_name": None, "product_description": None, "filters": {}}
+
+    async def embed(text):
+        return [1.0, 0.0]
+
+    monkeypatch.setattr(service, "detect_language_async", detect_language)
+    monkeypatch.setattr(service, "extract_search_intent_async", extract_intent)
+    monkeypatch.setattr(service, "get_embedding_async", embed)
+    return service
+
+
+def test_overlapping_searches_keep_their_own_context(service):
+    async def run():
+        return await asyncio.gather(
+            service.semantic_search_middleware([{"role": "user", "content": "find a tent"}], limit=1),
+            service.semantic_search_middleware([{"role": "user", "content": "find a stove"}], limit=3),
+        )
+
+    tent, stove = asyncio.run(run())
+    assert (tent["language_detected"], len(tent["products"])) == ("vi", 1)
+    assert (stove["language_detected"], len(stove["products"])) == ("fr", 3)
+    assert tent["search_intent"]["search_query"] == "find a tent"
+    assert stove["search_intent"]["search_query"] == "find a stove"
+    assert tent["function_used"] == stove["function_used"] == "find_products"
+
+    first, second = service.agent.contexts
+    assert first is not second
+    assert (first.limit, second.limit) == (1, 3)
+    # Each run's stage timings only hold its own stages
+    assert set(first.timings.stages) >= {"detect_language", "agent", "search"}
+    assert tent["debug"]["timings"]["stages"] == first.timings.as_dict()["stages"]
@@ -0,0 +1,66 @@
+from utils.search_index import InvertedIndex, tokenize
+
+
+def build(*products):
+    index = InvertedIndex()
+    index.build(products)
+    return index
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("Show me THE best Tent-2") == ["best", "tent", "2"]
+    assert tokenize("") == []
+
+
+def test_search_ranks_better_matches_first():
+    index = build(
+        {"id": 1, "name": "Trail Tent", "description": "tent for two, light tent"},
+        {"id": 2, "name": "Camp Stove", "description": "fits next to your tent"},
+    )
+    ranked = [doc_id for doc_id, _ in index.search("tent")]
+    assert ranked == [1, 2]
+
+
+def test_search_restricted_to_candidates_and_limit():
+    index = build(*({"id": i, "name": f"Tent {i}"} for i in range(5)))
+    assert {doc_id for doc_id, _ in index.search("tent", candidate_ids={1, 3})} == {1, 3}
+    assert len(index.search("tent", limit=2)) == 2
+
+
+def test_query_term_matches_inside_longer_terms():
+    index = build({"id": 1, "name": "Handheld smartwatches"}, {"id": 2, "name": "Desk lamp"})
+    assert [doc_id for doc_id, _ in index.search("smartwatch")] == [1]
+
+
+def test_substring_match_scores_below_exact_match():
+    index = build({"id": 1, "name": "Waterproof jacket"}, {"id": 2, "name": "Waterproofing spray"})
+    scores = dict(index.search("waterproof"))
+    assert scores[1] > scores[2] > 0
+
+
+def test_short_terms_only_match_exactly():
+    index = build({"id": 1, "name": "Smart TV"}, {"id": 2, "name": "TVstand oak"})
+    assert [doc_id for doc_id, _ in index.search("tv")] == [1]
+
+
+def test_ties_between_mixed_id_types_do_not_fail():
+    index = build({"id": 1, "name": "Blue lamp"}, {"id": "2", "name": "Blue lamp"})
+    assert {doc_id for doc_id, _ in index.search("lamp")} == {1, "2"}
+
+
+def test_upsert_and_remove_update_postings():
+    index = build({"id": 1, "name": "Red kettle"})
+    index.upsert({"id": 1, "name": "Green kettle"})
+    assert index.search("red") == []
+    assert [doc_id for doc_id, _ in index.search("green")] == [1]
+    index.remove(1)
+    assert index.search("kettle") == []
+    assert index.stats() == {"documents": 0, "terms": 0}
+
+
+def test_substring_matches_follow_upserts_and_removals():
+    index = build({"id": 1, "name": "Desk lamp"})
+    index.upsert({"id": 2, "name": "Smartphone stand"})
+    assert [doc_id for doc_id, _ in index.search("phone")] == [2]
+    index.remove(2)
+    assert index.search("phone") == []
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from fake_chroma import index_products, make_ai_service, product
+
+DELAY = 0.2
+
+
+@pytest.fixture
+def service(monkeypatch, tmp_path):
+    service = make_ai_service(monkeypatch, tmp_path, [
+        product(1, "Trail Tent", 120.0),
+        product(2, "Camp Stove", 45.0),
+    ])
+    index_products(service, {1: [1.0, 0.0], 2: [0.9, 0.1]})
+
+    async def extract_intent(user_input, log_query=True):
+        await asyncio.sleep(DELAY)
+        return {"search_query": user_input, "product_name": None, "product_description": None,
+                "filters": {"category": "camping gear"}}
+
+    async def llm_language(text):
+        await asyncio.sleep(DELAY)
+        return "vi"
+
+    async def embed(text):
+        return [1.0, 0.0]
+
+    monkeypatch.setattr(service, "extract_search_intent_async", extract_intent)
+    monkeypatch.setattr(service, "detect_language_async", llm_language)
+    monkeypatch.setattr(service, "get_embedding_async", embed)
+    return service
+
+
+def test_language_detection_overlaps_intent_extraction(service):
+    started = time.perf_counter()
+    result = asyncio.run(service.semantic_search_middleware([{"role": "user", "content": "camping gear"}]))
+    elapsed = time.perf_counter() - started
+
+    assert result["language_detected"] == "vi"
+    assert [p["id"] for p in result["products"]] == ["1", "2"]
+    # Two DELAY-long stages in sequence would take 2 * DELAY
+    assert elapsed < 1.75 * DELAY
+    stages = result["debug"]["timings"]["stages"]
+    assert stages["detect_language"]["start_ms"] < stages["extract_intent"]["start_ms"] + stages["extract_intent"]["duration_ms"]
+
+
+def test_search_waits_for_a_slow_language_detection(service, monkeypatch):
+    async def slow_language(text):
+        await asyncio.sleep(2 * DELAY)
+        return "fr"
+
+    monkeypatch.setattr(service, "detect_language_async", slow_language)
+    result = asyncio.run(service.semantic_search_middleware([{"role": "user", "content": "camping gear"}]))
+    assert result["language_detected"] == "fr"
+    assert result["products"]
@@ -0,0 +1,87 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture
+def client(monkeypatch):
+    for module in ("fastapi", "httpx", "openai", "chromadb", "langgraph"):
+        pytest.importorskip(module)
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from services.ai_service import AIService
+    # The router builds its AIService at import time; the tests swap in a stub right after
+    monkeypatch.setattr(AIService, "__init__", lambda self: None)
+    from routers import ai_router
+
+    calls, events = [], []
+
+    async def semantic_search_stream(messages, limit, llm_copy):
+        calls.append({"messages": messages, "limit": limit, "llm_copy": llm_copy})
+        for event, data in events:
+            if isinstance(data, Exception):
+                raise data
+            yield event, data
+
+    monkeypatch.setattr(ai_router, "ai_service", SimpleNamespace(semantic_search_stream=semantic_search_stream))
+    app = FastAPI()
+    app.include_router(ai_router.router, prefix="/api")
+    client = TestClient(app)
+    client.calls, client.events = calls, events
+    return client
+
+
+def parse_events(body):
+    """Split an SSE body into (event, data) pairs, checking each frame's layout"""
+    assert body.endswith("\n\n")
+    events = []
+    for frame in body[:-2].split("\n\n"):
+        event_line, data_line = frame.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def stream(client, **payload):
+    payload.setdefault("messages", [{"role": "user", "content": "tent"}])
+    return client.post("/api/ai/search/stream", json=payload)
+
+
+def test_events_are_streamed_in_order_and_end_with_done(client):
+    done = {"status": "success", "products": [{"id": "1"}], "total_results": 1}
+    client.events.extend([
+        ("language", {"language": "vi"}),
+        ("intent", {"search_query": "tent"}),
+        ("products", {"products": [{"id": "1"}]}),
+        ("copy", {"field": "intro", "delta": "Tôi tìm thấy "}),
+        ("copy", {"field": "intro", "delta": "1 sản phẩm"}),
+        ("done", done),
+    ])
+    response = stream(client, limit=5, llm_copy=True)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    events = parse_events(response.text)
+    assert [event for event, _ in events] == ["language", "intent", "products", "copy", "copy", "done"]
+    # Non-ASCII copy is sent as-is rather than \u-escaped
+    assert "Tôi tìm thấy" in response.text
+    assert events[-1] == ("done", done)
+    assert client.calls == [{"messages": [{"role": "user", "content": "tent"}], "limit": 5, "llm_copy": True}]
+
+
+def test_a_failing_search_ends_with_an_error_event(client):
+    client.events.extend([
+        ("language", {"language": "en"}),
+        ("intent", RuntimeError("chroma down")),
+    ])
+    events = parse_events(stream(client).text)
+    assert [event for event, _ in events] == ["language", "error"]
+    assert events[-1][1] == {"status": "error", "message": "Search failed: chroma down"}
+
+
+def test_limit_defaults_to_ten(client):
+    client.events.append(("done", {"status": "success"}))
+    stream(client, limit=None)
+    assert client.calls[0]["limit"] == 10 and client.calls[0]["llm_copy"] is False
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(2)
+        return "catalog"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("all", load))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["coalesced"] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["catalog"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+
+def test_sequential_calls_execute_again():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    assert flight.stats()["executions"] == 2
+
+
+def test_error_is_raised_to_every_caller():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError("firestore down")
+
+    with pytest.raises(RuntimeError):
+        flight.do("k", fail)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_callers_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("all", load) for _ in range(4)))
+
+    assert asyncio.run(main()) == [1, 1, 1, 1]
+    assert len(calls) == 1
+
+
+def test_async_follower_of_a_thread_leader_gets_its_error():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("bad")
+
+    leader = threading.Thread(target=lambda: pytest.raises(ValueError, flight.do, "k", fail))
+    leader.start()
+    started.wait(1)
+
+    async def follow():
+        with pytest.raises(ValueError):
+            await flight.do_async("k", lambda: "not called")
+
+    asyncio.run(follow())
+    leader.join()
+    assert flight.stats()["executions"] == 1
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from utils.stage_timer import StageTimings
+
+
+def test_concurrent_stages_have_overlapping_windows():
+    timings = StageTimings()
+
+    async def run():
+        await asyncio.gather(
+            timings.timed("intent", asyncio.sleep(0.05)),
+            timings.timed("language", asyncio.sleep(0.05)),
+        )
+
+    asyncio.run(run())
+    intent, language = timings.stages["intent"], timings.stages["language"]
+    assert intent["duration_ms"] >= 45 and language["duration_ms"] >= 45
+    assert language["start_ms"] < intent["start_ms"] + intent["duration_ms"]
+    assert timings.as_dict()["total_ms"] < intent["duration_ms"] + language["duration_ms"]
+
+
+def test_timed_returns_the_result_and_records_failures():
+    timings = StageTimings()
+
+    async def fail():
+        raise ValueError("boom")
+
+    assert asyncio.run(timings.timed("ok", asyncio.sleep(0, result=42))) == 42
+    with pytest.raises(ValueError):
+        asyncio.run(timings.timed("failed", fail()))
+    assert set(timings.stages) == {"ok", "failed"}
+
+
+def test_span_times_a_block():
+    timings = StageTimings()
+    with timings.span("copy"):
+        pass
+    assert timings.as_dict()["stages"]["copy"]["duration_ms"] >= 0
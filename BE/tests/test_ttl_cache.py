@@ -0,0 +1,64 @@
+import pytest
+
+from utils import ttl_cache
+from utils.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_returns_stored_value_and_counts_hits():
+    cache = TTLCache(max_entries=4, ttl=None)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(max_entries=4, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=30)
+    clock[0] += 11
+    assert not cache.contains("a")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_contains_does_not_touch_counters_or_order():
+    cache = TTLCache(max_entries=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.contains("a")
+    cache.set("c", 3)
+    assert not cache.contains("a")
+    assert cache.stats()["hits"] == 0
+
+
+def test_invalidation():
+    cache = TTLCache(ttl=None)
+    for key in ("products:all", "products:1", "users:1"):
+        cache.set(key, key)
+    assert cache.invalidate_prefix("products:") == 2
+    cache.invalidate("users:1")
+    assert len(cache) == 0
+    cache.set("x", 1)
+    cache.clear()
+    assert cache.get("x") is None
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Full in-memory replica of a Firestore collection kept current by an on_snapshot listener
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class CatalogReplica:
+    """Applies collection snapshots incrementally through upsert/remove/reset callbacks.
+
+    The first snapshot delivers the whole collection to `on_reset`; later snapshots only
+    forward their ADDED/MODIFIED/REMOVED changes. Anything exposing
+    `on_snapshot(callback) -> watch` works as the collection (the emulator or an in-memory
+    fake), where callback receives (docs, changes, read_time) like the Firestore client.
+    """
+
+    def __init__(self, collection_ref,
+                 on_reset: Callable[[List[Dict[str, Any]]], None],
+                 on_upsert: Callable[[Dict[str, Any]], None],
+                 on_remove: Callable[[Any], None]):
+        self.collection_ref = collection_ref
+        self.on_reset = on_reset
+        self.on_upsert = on_upsert
+        self.on_remove = on_remove
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._watch = None
+        self.doc_count = 0
+        self.snapshots = 0
+        self.changes_applied = 0
+        self.errors = 0
+        self.last_lag: Optional[float] = None  # seconds between server read_time and local apply
+        self.last_applied_at: Optional[float] = None
+
+    @staticmethod
+    def _doc_id(doc) -> Any:
+        data = doc.to_dict() or {}
+        if data.get('id') is not None:
+            return data['id']
+        return int(doc.id) if str(doc.id).isdigit() else doc.id
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        # Runs on the listener's background thread
+        with self._lock:
+            try:
+                if not self._synced.is_set():
+                    self.on_reset([doc.to_dict() for doc in docs])
+                    self.changes_applied += len(docs)
+                    self._synced.set()
+                else:
+                    for change in changes:
+                        if change.type.name == 'REMOVED':
+                            self.on_remove(self._doc_id(change.document))
+                        else:
+                            self.on_upsert(change.document.to_dict())
+                        self.changes_applied += 1
+                self.doc_count = len(docs)
+                self.snapshots += 1
+                self.last_applied_at = time.time()
+                if read_time is not None:
+                    self.last_lag = max(self.last_applied_at - read_time.timestamp(), 0.0)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error applying catalog snapshot: {e}")
+
+    def start(self) -> None:
+        if self._watch is None:
+            self._watch = self.collection_ref.on_snapshot(self._on_snapshot)
+
+    def stop(self) -> None:
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self._synced.clear()
+
+    @property
+    def synced(self) -> bool:
+        """True once the initial snapshot is applied and the listener is still running"""
+        return (self._synced.is_set() and self._watch is not None
+                and getattr(self._watch, 'is_active', True))
+
+    def wait_until_synced(self, timeout: Optional[float] = None) -> bool:
+        return self._synced.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "synced": self.synced,
+                "doc_count": self.doc_count,
+                "snapshots": self.snapshots,
+                "changes_applied": self.changes_applied,
+                "errors": self.errors,
+                "lag_seconds": round(self.last_lag, 3) if self.last_lag is not None else None,
+                "seconds_since_last_snapshot": (
+                    round(time.time() - self.last_applied_at, 1) if self.last_applied_at else None
+                ),
+            }
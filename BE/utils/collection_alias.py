@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+File-backed alias table mapping a logical vector collection name to its live versioned collection
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class CollectionAliases:
+    """Alias -> collection name, plus the collections each alias pointed at before.
+
+    The table is a small JSON file rewritten through a temp file and os.replace, so a
+    reader (another worker process included) sees either the old or the new mapping,
+    never a partial one. An alias that was never switched resolves to the collection of
+    the same name. Collections an alias moved away from are kept as "retired" with a
+    timestamp so they can be dropped once in-flight searches are done with them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading collection aliases from {self.path}: {e}")
+            data = {}
+        data.setdefault("aliases", {})
+        data.setdefault("retired", {})
+        return data
+
+    def _save(self, data: Dict[str, Any]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".aliases-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def version(self) -> Optional[int]:
+        """Modification time of the table; changes whenever an alias is switched"""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def resolve(self, alias: str) -> str:
+        return self._load()["aliases"].get(alias, alias)
+
+    def switch(self, alias: str, target: str) -> str:
+        """Point `alias` at `target`; returns (and retires) the collection it pointed at before"""
+        with self._lock:
+            data = self._load()
+            previous = data["aliases"].get(alias, alias)
+            data["aliases"][alias] = target
+            retired = [r for r in data["retired"].get(alias, []) if r["name"] != target]
+            if previous != target:
+                retired.append({"name": previous, "retired_at": time.time()})
+            data["retired"][alias] = retired
+            self._save(data)
+            return previous
+
+    def retired(self, alias: str) -> List[Dict[str, Any]]:
+        return list(self._load()["retired"].get(alias, []))
+
+    def forget_retired(self, alias: str, names: List[str]) -> None:
+        with self._lock:
+            data = self._load()
+            data["retired"][alias] = [r for r in data["retired"].get(alias, []) if r["name"] not in names]
+            self._save(data)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Columnar NumPy snapshot of the product catalog for vectorized filtering and top-k ranking
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+NUMERIC_FIELDS = ('price', 'original_price', 'rating', 'discount', 'weeklySales', 'weeklyViews')
+
+
+def _to_float(value: Any) -> float:
+    # Missing fields count as 0 (like product.get(field, 0)); unparseable ones become NaN
+    if value is None:
+        return 0.0
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return float('nan')
+
+
+class ColumnarCatalog:
+    """Immutable column arrays over a list of product dicts; row i describes products[i].
+
+    Masks are boolean arrays over rows, scores are float arrays over rows, and top_k
+    returns row indices, so callers combine primitives freely and only touch the dicts
+    of the rows they finally return.
+    """
+
+    def __init__(self, products: Sequence[Dict[str, Any]]):
+        self.products = list(products)
+        size = len(self.products)
+        self.ids = np.array([p.get('id') for p in self.products], dtype=object)
+        self._row_by_id = {product_id: row for row, product_id in enumerate(self.ids)}
+        for field in NUMERIC_FIELDS:
+            column = np.fromiter((_to_float(p.get(field)) for p in self.products), dtype=np.float64, count=size)
+            setattr(self, field, column)
+
+        # Categories as integer codes; code -1 means no category
+        self.category_names: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+        codes = np.empty(size, dtype=np.int32)
+        for row, product in enumerate(self.products):
+            category = product.get('category')
+            if not category:
+                codes[row] = -1
+                continue
+            code = self._category_codes.get(category)
+            if code is None:
+                code = self._category_codes[category] = len(self.category_names)
+                self.category_names.append(category)
+            codes[row] = code
+        self.category_codes = codes
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def row_of(self, product_id: Any) -> Optional[int]:
+        return self._row_by_id.get(product_id)
+
+    def get(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        row = self._row_by_id.get(product_id)
+        return self.products[row] if row is not None else None
+
+    def rows_to_products(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.products[row] for row in rows]
+
+    # ---- filter primitives ----
+
+    def category_mask(self, category: str) -> np.ndarray:
+        code = self._category_codes.get(category)
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.category_codes == code
+
+    def ids_mask(self, product_ids: Iterable[Any]) -> np.ndarray:
+        mask = np.zeros(len(self), dtype=bool)
+        rows = [self._row_by_id[pid] for pid in product_ids if pid in self._row_by_id]
+        if rows:
+            mask[rows] = True
+        return mask
+
+    def mask(self, category: Optional[str] = None, min_price: Optional[float] = None,
+             max_price: Optional[float] = None, min_rating: Optional[float] = None,
+             min_discount: Optional[float] = None, exclude_ids: Optional[Iterable[Any]] = None) -> np.ndarray:
+        """Rows passing every given filter (None means no constraint)"""
+        mask = np.ones(len(self), dtype=bool)
+        if category is not None:
+            mask &= self.category_mask(category)
+        if min_price is not None:
+            mask &= self.price >= min_price
+        if max_price is not None:
+            mask &= self.price <= max_price
+        if min_rating is not None:
+            mask &= self.rating >= min_rating
+        if min_discount is not None:
+            mask &= self.discount >= min_discount
+        if exclude_ids:
+            mask &= ~self.ids_mask(exclude_ids)
+        return mask
+
+    # ---- score primitives ----
+
+    def popularity_scores(self) -> np.ndarray:
+        """weeklySales + weeklyViews + rating * 10, as on the top-this-week board"""
+        return self.weeklySales + self.weeklyViews + self.rating * 10
+
+    def jittered(self, scores: np.ndarray, low: float, high: float,
+                 rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Scores multiplied by per-row uniform noise in [low, high)"""
+        rng = rng or np.random.default_rng()
+        return scores * rng.uniform(low, high, size=len(self))
+
+    def top_k(self, scores: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows of the k highest finite scores (within mask), best first; ties keep row order"""
+        candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(self))
+        values = scores[candidates]
+        finite = ~np.isnan(values)
+        candidates, values = candidates[finite], values[finite]
+        if k <= 0 or candidates.size == 0:
+            return np.empty(0, dtype=np.intp)
+
+        if k < candidates.size:
+            # argpartition finds the k-th best value; rows tied with it are taken in row order
+            kth = values[np.argpartition(-values, k - 1)[k - 1]]
+            above = np.flatnonzero(values > kth)
+            tied = np.flatnonzero(values == kth)[:k - above.size]
+            picked = np.concatenate((above, tied))
+            candidates, values = candidates[picked], values[picked]
+
+        order = np.lexsort((candidates, -values))
+        return candidates[order]
+
+    def top_products(self, scores: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        return self.rows_to_products(self.top_k(scores, k, mask))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Batched, concurrent OpenAI embedding requests with token-aware chunking and 429 backoff
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+# OpenAI limits: 8191 tokens per input, 2048 inputs per request
+MAX_INPUT_TOKENS = 8191
+MAX_INPUTS_PER_REQUEST = 2048
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class EmbeddingBatcher:
+    """Embeds many texts with few requests.
+
+    Texts are grouped into requests of at most `batch_size` inputs and `max_batch_tokens`
+    estimated tokens, and up to `max_concurrency` requests run at once. Rate-limited (429)
+    and transient 5xx responses are retried with exponential backoff and jitter, honouring
+    Retry-After when the server sends one. The client is any OpenAI-compatible client, so
+    OPENAI_BASE_URL can point it at a local fake embedding server.
+    """
+
+    def __init__(self, client, model: str,
+                 batch_size: Optional[int] = None,
+                 max_concurrency: Optional[int] = None,
+                 max_batch_tokens: Optional[int] = None,
+                 max_retries: int = 6,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0):
+        self.client = client
+        self.model = model
+        self.batch_size = min(batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "256")), MAX_INPUTS_PER_REQUEST)
+        self.max_concurrency = max_concurrency or int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+        self.max_batch_tokens = max_batch_tokens or int(os.getenv("EMBEDDING_MAX_BATCH_TOKENS", "100000"))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except Exception:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.failed_batches = 0
+
+    # ---- chunking ----
+
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text))
+        # Roughly 4 characters per token for English text
+        return max(1, len(text) // 4)
+
+    def _truncate(self, text: str) -> str:
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text)
+            return self._encoding.decode(tokens[:MAX_INPUT_TOKENS]) if len(tokens) > MAX_INPUT_TOKENS else text
+        return text[:MAX_INPUT_TOKENS * 4]
+
+    def make_batches(self, texts: Sequence[str]) -> List[List[int]]:
+        """Group text positions into requests bounded by input count and token budget"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = min(self.count_tokens(text), MAX_INPUT_TOKENS)
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.max_batch_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    # ---- requests ----
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None when the error is not retryable"""
+        status = getattr(error, "status_code", None)
+        if status is None and error.__class__.__name__ in ("RateLimitError", "APIConnectionError", "APITimeoutError"):
+            status = 429
+        if status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+            return None
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.backoff_max)
+        except ValueError:
+            pass
+        return min(self.backoff_base * (2 ** attempt), self.backoff_max) * random.uniform(0.5, 1.0)
+
+    def _embed_batch(self, inputs: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                with self._lock:
+                    self.requests += 1
+                response = self.client.embeddings.create(model=self.model, input=inputs, encoding_format="float")
+                # Responses carry an index per input; don't rely on ordering
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                print(f"Embedding request throttled/failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def iter_embedded(self, texts: Sequence[str]):
+        """Yield (positions, embeddings) per completed request; failed requests yield embeddings=None"""
+        inputs = [self._truncate(text) for text in texts]
+        batches = self.make_batches(inputs)
+        if not batches:
+            return
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_concurrency, len(batches)))) as pool:
+            futures = {pool.submit(self._embed_batch, [inputs[i] for i in batch]): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    yield batch, future.result()
+                except Exception as e:
+                    with self._lock:
+                        self.failed_batches += 1
+                    print(f"Error embedding batch of {len(batch)} texts: {e}")
+                    yield batch, None
+
+    def embed(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Embeddings aligned with `texts` (None where the request ultimately failed)"""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        for batch, embeddings in self.iter_embedded(texts):
+            if embeddings is not None:
+                for position, embedding in zip(batch, embeddings):
+                    results[position] = embedding
+        return results
+
+    def embed_into_collection(self, collection, ids: Sequence[str], texts: Sequence[str],
+                              metadatas: Sequence[Dict[str, Any]]) -> Tuple[int, int]:
+        """Embed texts and bulk-upsert each finished request into a Chroma collection.
+
+        Upserts happen on the calling thread as requests complete. Returns (stored, failed).
+        """
+        stored = failed = 0
+        for batch, embeddings in self.iter_embedded(texts):
+            if embeddings is None:
+                failed += len(batch)
+                continue
+            collection.upsert(
+                ids=[ids[i] for i in batch],
+                embeddings=embeddings,
+                documents=[texts[i] for i in batch],
+                metadatas=[metadatas[i] for i in batch],
+            )
+            stored += len(batch)
+        return stored, failed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failed_batches": self.failed_batches,
+                "batch_size": self.batch_size,
+                "max_concurrency": self.max_concurrency,
+            }
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Two-tier cache of query embeddings: in-memory LRU backed by a sqlite table of float32 vectors
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from utils.ttl_cache import TTLCache
+
+
+def normalize_text(text: str) -> str:
+    """Case, Unicode form and whitespace variants of a query share one cache entry"""
+    return " ".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+class EmbeddingCache:
+    """Embeddings keyed by (model, normalized text).
+
+    Lookups try the process-local LRU first, then the sqlite file, which survives
+    restarts and is shared by every worker on the host (WAL mode lets readers run
+    while another process writes). Vectors are stored as float32 blobs, 6 KB for a
+    1536-dimension embedding. If the database can't be opened the cache keeps working
+    in memory only.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, max_disk_entries: int = 200000):
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.memory = TTLCache(max_entries=max_entries, ttl=None)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_errors = 0
+        self._writes_since_prune = 0
+        # Running row count: counted once at startup, then adjusted by this process's inserts
+        # and prunes (rows written by other workers show up after a restart)
+        self._disk_entries = 0
+        self.disk_available = self._init_db()
+
+    # ---- sqlite ----
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _init_db(self) -> bool:
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with self._connect() as connection:
+                connection.execute(
+                    """CREATE TABLE IF NOT EXISTS embeddings (
+                        key TEXT PRIMARY KEY,
+                        model TEXT NOT NULL,
+                        dims INTEGER NOT NULL,
+                        vector BLOB NOT NULL,
+                        created_at REAL NOT NULL
+                    )"""
+                )
+                connection.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+                self._disk_entries = connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return True
+        except sqlite3.Error as e:
+            print(f"Error opening embedding cache at {self.path}, using memory only: {e}")
+            return False
+
+    @staticmethod
+    def _key(text: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        try:
+            row = self._connect().execute("SELECT dims, vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print(f"Error reading embedding cache: {e}")
+            return None
+        if row is None:
+            return None
+        dims, blob = row
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist() if len(vector) == dims else None
+
+    def _disk_set(self, key: str, model: str, embedding: Sequence[float]) -> None:
+        vector = array("f", embedding)
+        try:
+            with self._connect() as connection:
+                row = (model, len(vector), vector.tobytes(), time.time(), key)
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO embeddings (model, dims, vector, created_at, key) VALUES (?, ?, ?, ?, ?)", row
+                ).rowcount
+                if not inserted:
+                    connection.execute(
+                        "UPDATE embeddings SET model = ?, dims = ?, vector = ?, created_at = ? WHERE key = ?", row
+                    )
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print(f"Error writing embedding cache: {e}")
+            return
+        with self._lock:
+            self._disk_entries += inserted
+            self._writes_since_prune += 1
+            prune = self._writes_since_prune >= 1000
+            if prune:
+                self._writes_since_prune = 0
+        if prune:
+            self._prune()
+
+    def _prune(self) -> None:
+        """Keep the newest `max_disk_entries` vectors"""
+        try:
+            with self._connect() as connection:
+                deleted = connection.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                ).rowcount
+        except sqlite3.Error as e:
+            self.disk_errors += 1
+            print(f"Error pruning embedding cache: {e}")
+            return
+        with self._lock:
+            self._disk_entries = max(self._disk_entries - deleted, 0)
+
+    # ---- public API ----
+
+    def _record_disk_lookup(self, key: str, embedding: Optional[List[float]]) -> None:
+        with self._lock:
+            if embedding is None:
+                self.disk_misses += 1
+            else:
+                self.disk_hits += 1
+        if embedding is not None:
+            self.memory.set(key, embedding)
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        key = self._key(text, model)
+        embedding = self.memory.get(key)
+        if embedding is not None or not self.disk_available:
+            return embedding
+        embedding = self._disk_get(key)
+        self._record_disk_lookup(key, embedding)
+        return embedding
+
+    async def get_async(self, text: str, model: str) -> Optional[List[float]]:
+        """get() for the event loop: memory hits return inline, sqlite reads run in a thread"""
+        key = self._key(text, model)
+        embedding = self.memory.get(key)
+        if embedding is not None or not self.disk_available:
+            return embedding
+        embedding = await asyncio.to_thread(self._disk_get, key)
+        self._record_disk_lookup(key, embedding)
+        return embedding
+
+    def set(self, text: str, model: str, embedding: Sequence[float]) -> None:
+        if not embedding:
+            return
+        key = self._key(text, model)
+        self.memory.set(key, list(embedding))
+        if self.disk_available:
+            self._disk_set(key, model, embedding)
+
+    async def set_async(self, text: str, model: str, embedding: Sequence[float]) -> None:
+        if not embedding:
+            return
+        key = self._key(text, model)
+        self.memory.set(key, list(embedding))
+        if self.disk_available:
+            await asyncio.to_thread(self._disk_set, key, model, embedding)
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        with self._lock:
+            disk_hits, disk_misses = self.disk_hits, self.disk_misses
+            disk_entries = self._disk_entries if self.disk_available else None
+        lookups = memory["hits"] + memory["misses"]
+        return {
+            "lookups": lookups,
+            "hit_rate": round((memory["hits"] + disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory": memory,
+            "disk": {
+                "path": self.path if self.disk_available else None,
+                "entries": disk_entries,
+                "hits": disk_hits,
+                "misses": disk_misses,
+                "errors": self.disk_errors,
+            },
+        }
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Background worker that batches product write notifications into incremental embedding updates
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+
+class EmbeddingRefresher:
+    """Collects (action, product_id) events and applies them in batches on a daemon thread.
+
+    After the first event arrives the worker waits up to `batch_window` seconds (or until
+    `max_batch` distinct products are pending) before flushing. Repeated events for one
+    product collapse to the latest action, so a burst of edits costs a single re-embed.
+    """
+
+    def __init__(self, upsert_fn: Callable[[List[Any]], None], delete_fn: Callable[[List[Any]], None],
+                 batch_window: float = 2.0, max_batch: int = 100):
+        self.upsert_fn = upsert_fn
+        self.delete_fn = delete_fn
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Tuple[str, Any, float]]" = queue.Queue()
+        self._thread = None
+        self._stop = threading.Event()
+        self.batches = 0
+        self.upserted = 0
+        self.deleted = 0
+        self.errors = 0
+        self.last_lag = None  # seconds from the oldest event of a batch to its completion
+
+    def enqueue(self, action: str, product_ids: List[Any]) -> None:
+        now = time.monotonic()
+        for product_id in product_ids:
+            self._queue.put((action, product_id, now))
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="embedding-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _collect(self) -> Dict[Any, Tuple[str, float]]:
+        """Block for the first event, then gather more until the window closes"""
+        pending: Dict[Any, Tuple[str, float]] = {}
+        try:
+            action, product_id, queued_at = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return pending
+        pending[product_id] = (action, queued_at)
+
+        deadline = time.monotonic() + self.batch_window
+        while len(pending) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                action, product_id, queued_at = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            first_seen = pending[product_id][1] if product_id in pending else queued_at
+            pending[product_id] = (action, first_seen)
+        return pending
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            pending = self._collect()
+            if pending:
+                self.flush(pending)
+
+    def flush(self, pending: Dict[Any, Tuple[str, float]]) -> None:
+        upserts = [pid for pid, (action, _) in pending.items() if action == UPSERT]
+        deletes = [pid for pid, (action, _) in pending.items() if action == DELETE]
+        try:
+            if deletes:
+                self.delete_fn(deletes)
+                self.deleted += len(deletes)
+            if upserts:
+                self.upsert_fn(upserts)
+                self.upserted += len(upserts)
+            self.batches += 1
+            self.last_lag = time.monotonic() - min(queued_at for _, queued_at in pending.values())
+        except Exception as e:
+            self.errors += 1
+            print(f"Error refreshing product embeddings: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "upserted": self.upserted,
+            "deleted": self.deleted,
+            "errors": self.errors,
+            "last_lag_seconds": round(self.last_lag, 3) if self.last_lag is not None else None,
+        }
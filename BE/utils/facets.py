@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Materialized category/brand/price-bucket counts, maintained incrementally on product writes
+"""
+
+import bisect
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+# Lower bounds of the price buckets; the last bucket is open-ended
+PRICE_BUCKET_EDGES = [0, 50, 100, 250, 500, 1000, 2000]
+
+
+def _bucket_of(product: Dict[str, Any]) -> Optional[int]:
+    try:
+        price = float(product.get('price'))
+    except (TypeError, ValueError):
+        return None
+    return max(bisect.bisect_right(PRICE_BUCKET_EDGES, price) - 1, 0)
+
+
+class CatalogFacets:
+    """Per-category, per-brand and per-price-bucket product counts with memoized reads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._categories: Counter = Counter()
+        self._brands: Counter = Counter()
+        self._price_buckets: Counter = Counter()
+        self._total = 0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._category_names: Optional[List[str]] = None
+        self._brand_names: Optional[List[str]] = None
+
+    def _apply(self, product: Dict[str, Any], delta: int) -> None:
+        # Caller must hold self._lock
+        self._total += delta
+        for field, counter in (('category', self._categories), ('brand', self._brands)):
+            key = product.get(field)
+            if not key:
+                continue
+            counter[key] += delta
+            if counter[key] <= 0:
+                del counter[key]
+                self._invalidate_names(field)
+            elif counter[key] == delta:
+                self._invalidate_names(field)
+        bucket = _bucket_of(product)
+        if bucket is not None:
+            self._price_buckets[bucket] += delta
+            if self._price_buckets[bucket] <= 0:
+                del self._price_buckets[bucket]
+        self._snapshot = None
+
+    def _invalidate_names(self, field: str) -> None:
+        if field == 'category':
+            self._category_names = None
+        else:
+            self._brand_names = None
+
+    def build(self, products: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._categories.clear()
+            self._brands.clear()
+            self._price_buckets.clear()
+            self._total = 0
+            self._snapshot = None
+            self._category_names = self._brand_names = None
+            for product in products:
+                self._apply(product, 1)
+
+    def add(self, product: Dict[str, Any]) -> None:
+        with self._lock:
+            self._apply(product, 1)
+
+    def remove(self, product: Dict[str, Any]) -> None:
+        with self._lock:
+            self._apply(product, -1)
+
+    def categories(self) -> List[str]:
+        """Sorted category names"""
+        with self._lock:
+            if self._category_names is None:
+                self._category_names = sorted(self._categories)
+            return self._category_names
+
+    def brands(self) -> List[str]:
+        """Sorted brand names"""
+        with self._lock:
+            if self._brand_names is None:
+                self._brand_names = sorted(self._brands)
+            return self._brand_names
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Category, brand and price-bucket counts in one structure"""
+        with self._lock:
+            if self._snapshot is None:
+                buckets = []
+                for i, low in enumerate(PRICE_BUCKET_EDGES):
+                    high = PRICE_BUCKET_EDGES[i + 1] if i + 1 < len(PRICE_BUCKET_EDGES) else None
+                    buckets.append({
+                        "label": f"{low}-{high}" if high is not None else f"{low}+",
+                        "min": low,
+                        "max": high,
+                        "count": self._price_buckets.get(i, 0),
+                    })
+                self._snapshot = {
+                    "categories": dict(sorted(self._categories.items())),
+                    "brands": dict(sorted(self._brands.items())),
+                    "price_buckets": buckets,
+                    "total_products": self._total,
+                }
+            return self._snapshot
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Sequential ID allocation backed by a transactional Firestore counter document
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from google.cloud import firestore
+
+
+class IdAllocator:
+    """Hands out integer IDs from blocks reserved atomically on a counter document.
+
+    Each process reserves `block_size` IDs per transaction and serves them from memory,
+    so most allocations need no round-trip. IDs are unique across processes but only
+    monotonic within one; unused IDs of a block are skipped when the process exits.
+    """
+
+    def __init__(self, db, counter_collection: str = 'counters', counter_doc: str = 'products',
+                 block_size: int = 20, seed_fn: Optional[Callable[[], int]] = None):
+        self.db = db
+        self.counter_ref = db.collection(counter_collection).document(counter_doc)
+        self.block_size = max(1, block_size)
+        self.seed_fn = seed_fn
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0  # exclusive
+        self.reservations = 0
+
+    def _reserve(self, count: int) -> int:
+        """Atomically advance the counter by `count`; returns the first reserved ID"""
+        @firestore.transactional
+        def reserve_in_transaction(transaction):
+            snapshot = self.counter_ref.get(transaction=transaction)
+            if snapshot.exists:
+                start = int(snapshot.get('next_id'))
+            else:
+                # Only the very first reservation needs the seed (e.g. max existing ID + 1)
+                start = self.seed_fn() if self.seed_fn is not None else 1
+            transaction.set(self.counter_ref, {'next_id': start + count, 'updated_at': time.time()})
+            return start
+
+        start = reserve_in_transaction(self.db.transaction())
+        self.reservations += 1
+        return start
+
+    def allocate(self, count: int = 1) -> List[int]:
+        """Allocate `count` unique IDs, reserving a new block only when the held one runs out"""
+        if count < 1:
+            return []
+        with self._lock:
+            ids = list(range(self._next, min(self._end, self._next + count)))
+            self._next += len(ids)
+            missing = count - len(ids)
+            if missing:
+                block = max(self.block_size, missing)
+                start = self._reserve(block)
+                ids.extend(range(start, start + missing))
+                self._next = start + missing
+                self._end = start + block
+            return ids
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "held": self._end - self._next,
+                "block_size": self.block_size,
+                "reservations": self.reservations,
+            }
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Rule-based router that sends plain product queries straight to search, bypassing the LLM agent
+"""
+
+import re
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+FAST_PATH = "fast"
+AGENT_PATH = "agent"
+
+# Category keywords across the supported languages; single words match whole tokens,
+# phrases and CJK terms match as substrings
+CATEGORY_KEYWORDS: Dict[str, tuple] = {
+    "phone": ("phone", "phones", "smartphone", "smartphones", "iphone", "cellphone", "mobile", "galaxy",
+              "pixel", "điện thoại", "dien thoai", "teléfono", "telefono", "celular", "móvil", "movil",
+              "téléphone", "handy", "スマホ", "携帯", "휴대폰", "핸드폰", "폰", "手机"),
+    "camera": ("camera", "cameras", "dslr", "mirrorless", "gopro", "canon", "nikon", "máy ảnh", "may anh",
+               "cámara", "câmera", "appareil photo", "kamera", "fotocamera", "カメラ", "카메라", "相机"),
+    "laptop": ("laptop", "laptops", "notebook", "macbook", "ultrabook", "chromebook", "máy tính xách tay",
+               "portátil", "portatil", "ordinateur portable", "portatile", "ノートパソコン", "노트북",
+               "笔记本电脑", "笔记本"),
+    "watch": ("watch", "watches", "smartwatch", "garmin", "đồng hồ", "dong ho", "reloj", "montre", "uhr",
+              "orologio", "relógio", "relogio", "腕時計", "時計", "시계", "手表"),
+    "camping gear": ("camping", "tent", "tents", "sleeping bag", "hiking", "backpack", "lều", "cắm trại",
+                     "acampada", "zelt", "tenda", "barraca", "キャンプ", "テント", "캠핑", "텐트", "露营", "帐篷"),
+}
+
+# Anything that smells like a gift request goes to the agent (find_gifts asks follow-ups)
+GIFT_KEYWORDS = ("gift", "gifts", "present", "presents", "birthday", "anniversary", "for my", "quà", "qua tang",
+                 "tặng", "sinh nhật", "regalo", "cadeau", "geschenk", "presente", "プレゼント", "贈り物",
+                 "선물", "礼物", "送给")
+
+# Not product searches even when a category is mentioned
+NON_SEARCH_KEYWORDS = ("return", "refund", "shipping", "delivery", "order status", "my order", "warranty",
+                       "cancel", "track")
+
+# Questions about a product ("is this phone waterproof?") need the agent, not a search.
+# Latin-script languages: leading interrogative or auxiliary; others: markers anywhere
+QUESTION_LEADING_WORDS = frozenset("""
+    what which how why when where who whose is are does do did can could should will would
+    qué cuál cuáles cómo cuánto tiene
+    quel quelle quels quelles comment pourquoi combien est
+    welche welcher welches wie warum wieviel ist hat kann
+    qual quais quanto
+    quale quali perché
+    """.split())
+QUESTION_MARKERS = ("bao nhiêu", "thế nào", "tại sao", "có phải", "ですか", "ますか", "でしょうか",
+                    "나요", "습니까", "까요", "吗", "什么", "怎么", "为什么", "多少", "哪")
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+def _contains(text: str, tokens: set, keyword: str) -> bool:
+    if " " in keyword or not keyword.isascii():
+        return keyword in text
+    return keyword in tokens
+
+
+def _matches_any(text: str, tokens: set, keywords) -> bool:
+    return any(_contains(text, tokens, keyword) for keyword in keywords)
+
+
+def is_question(text: str) -> bool:
+    normalized = _normalize(text)
+    if normalized.endswith(("?", "？")):
+        return True
+    tokens = _TOKEN_RE.findall(normalized)
+    if tokens and tokens[0] in QUESTION_LEADING_WORDS:
+        return True
+    return any(marker in normalized for marker in QUESTION_MARKERS)
+
+
+def match_categories(text: str) -> List[str]:
+    normalized = _normalize(text)
+    tokens = set(_TOKEN_RE.findall(normalized))
+    return [category for category, keywords in CATEGORY_KEYWORDS.items()
+            if _matches_any(normalized, tokens, keywords)]
+
+
+def route_search(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """{"path": "fast" | "agent", "category", "reason"} for a conversation ending in a user turn.
+
+    Only a single-turn conversation can take the fast path: the search sees the last user
+    message alone, so constraints from earlier turns would be lost.
+    """
+    user_turns = [m.get("content", "") for m in messages if m.get("role") == "user"]
+    if not user_turns or not user_turns[-1].strip():
+        return {"path": AGENT_PATH, "category": None, "reason": "no user input"}
+    if len(user_turns) > 1:
+        return {"path": AGENT_PATH, "category": None, "reason": "multi-turn conversation"}
+    text = _normalize(user_turns[-1])
+    tokens = set(_TOKEN_RE.findall(text))
+
+    if _matches_any(text, tokens, GIFT_KEYWORDS):
+        return {"path": AGENT_PATH, "category": None, "reason": "gift context"}
+    if _matches_any(text, tokens, NON_SEARCH_KEYWORDS):
+        return {"path": AGENT_PATH, "category": None, "reason": "not a product search"}
+    if is_question(text):
+        return {"path": AGENT_PATH, "category": None, "reason": "question"}
+
+    categories = match_categories(text)
+    if len(categories) != 1:
+        return {"path": AGENT_PATH, "category": None, "reason": "no category" if not categories else "several categories"}
+    return {"path": FAST_PATH, "category": categories[0], "reason": "plain product query"}
+
+
+class RouteStats:
+    """Counts per path and a moving average of the agent's own overhead.
+
+    The overhead is the agent stage minus the search its tool ran, i.e. what a fast-path
+    request saves; it is measured on agent-path requests only.
+    """
+
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self.counts = {FAST_PATH: 0, AGENT_PATH: 0}
+        self.agent_overhead_ms: Optional[float] = None
+
+    def record(self, path: str, agent_overhead_ms: Optional[float] = None) -> None:
+        with self._lock:
+            self.counts[path] = self.counts.get(path, 0) + 1
+            if agent_overhead_ms is not None and agent_overhead_ms >= 0:
+                if self.agent_overhead_ms is None:
+                    self.agent_overhead_ms = agent_overhead_ms
+                else:
+                    self.agent_overhead_ms += self.smoothing * (agent_overhead_ms - self.agent_overhead_ms)
+
+    def estimated_saving_ms(self) -> Optional[float]:
+        with self._lock:
+            return round(self.agent_overhead_ms, 1) if self.agent_overhead_ms is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                "requests": dict(self.counts),
+                "fast_path_share": round(self.counts[FAST_PATH] / total, 4) if total else 0.0,
+                "avg_agent_overhead_ms": round(self.agent_overhead_ms, 1) if self.agent_overhead_ms is not None else None,
+            }
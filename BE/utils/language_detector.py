@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Offline language identification for search queries (script detection plus word and diacritic profiles)
+"""
+
+import re
+import unicodedata
+from typing import Dict, Optional, Tuple
+
+SUPPORTED_LANGUAGES = ("en", "vi", "es", "fr", "de", "pt", "it", "ja", "ko", "zh")
+
+# Function words and everyday shopping vocabulary; queries are short, so these carry most
+# of the signal. Words shared by several languages count fractionally for each.
+LANGUAGE_WORDS: Dict[str, frozenset] = {
+    "en": frozenset("""
+        the a an i im want need looking for find show me my with without under below over above
+        and or of to in on is are it this that some any best good cheap new buy price gift gifts
+        please can you what which who something around less than budget birthday mom dad wife
+        husband friend recommend suggest get""".split()),
+    "vi": frozenset("""
+        tôi toi muốn muon mua cho của cua điện dien thoại thoai máy ảnh anh giá gia rẻ tìm tim
+        không khong nào nao cái cai những nhung và là có một mot mình minh bạn ban giúp giup xem
+        dưới duoi trên tren triệu trieu đồng dong hồ quà tặng tang mẹ bố bo vợ chồng chong sinh
+        nhật nhat tốt tot""".split()),
+    "es": frozenset("""
+        el la los las un una unos unas de del que y para por con quiero busco necesito barato
+        barata baratos precio regalo mi mis menos más mas cámara teléfono telefono móvil movil
+        portátil portatil reloj muéstrame muestrame algo bueno buena mejor mamá papá cumpleaños
+        favor hay""".split()),
+    "fr": frozenset("""
+        le la les un une des du de je veux cherche pour avec pas cher chère moins prix cadeau
+        mon ma mes est et appareil photo téléphone ordinateur montre vous moi quel
+        quelle bon bonne meilleur maman papa anniversaire voudrais il plaît""".split()),
+    "de": frozenset("""
+        der die das den dem ein eine einen einem ich suche möchte will brauche für mit unter
+        günstig günstige billig preis geschenk meine meinen meiner und ist nicht kamera handy
+        uhr zeig zeige mir bitte gute guten guter beste mutter vater geburtstag""".split()),
+    "pt": frozenset("""
+        o a os as um uma de do da dos das que e para com quero procuro preciso barato barata
+        preço preco presente minha meu por favor menos câmera celular relógio relogio
+        não nao você voce mostre algum alguma bom boa melhor mãe pai aniversário""".split()),
+    "it": frozenset("""
+        il lo la gli le un una di del della dei che e per con voglio cerco economico economica
+        prezzo regalo mia mio meno fotocamera telefono cellulare orologio portatile non
+        mostrami vorrei qualcosa buono buona migliore mamma papà compleanno""".split()),
+}
+
+# Loanwords and product nouns written the same way in English and elsewhere ("mini camera",
+# "portable speaker"); they say nothing about the language of the query
+_SHARED_TERMS = frozenset("""
+    portable mini camera gaming laptop smartphone tablet notebook phone smartwatch
+    wifi bluetooth usb pro max ultra plus""".split())
+
+# Letters that only (or mostly) occur in some of the Latin-script languages
+_DIACRITICS: Dict[str, Tuple[str, ...]] = {}
+for _chars, _langs in (
+    ("ñ¿¡", ("es",)),
+    ("ëîïœûÿ", ("fr",)),
+    ("äöüß", ("de",)),
+    ("õ", ("pt",)),
+    ("ç", ("fr", "pt")),
+    ("ã", ("pt", "vi")),
+    ("âêô", ("fr", "pt", "vi")),
+    ("èù", ("fr", "it", "vi")),
+    ("ìò", ("it", "vi")),
+    ("ăđơư", ("vi",)),
+):
+    for _char in _chars:
+        _DIACRITICS[_char] = _langs
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _script_of(char: str) -> Optional[str]:
+    code = ord(char)
+    if 0xAC00 <= code <= 0xD7A3 or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+        return "hangul"
+    if 0x3040 <= code <= 0x30FF or 0x31F0 <= code <= 0x31FF:
+        return "kana"
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF:
+        return "han"
+    if code < 0x250 or 0x1E00 <= code <= 0x1EFF:
+        return "latin"
+    return "other"
+
+
+def _script_language(text: str) -> Optional[Tuple[Optional[str], float]]:
+    """Decide from the writing system alone when it is unambiguous"""
+    counts: Dict[str, int] = {}
+    for char in text:
+        if char.isalpha():
+            script = _script_of(char)
+            counts[script] = counts.get(script, 0) + 1
+    letters = sum(counts.values())
+    if not letters:
+        return None
+    if counts.get("hangul", 0) / letters >= 0.3:
+        return "ko", 0.99
+    if counts.get("kana", 0):
+        # Japanese mixes kana into kanji text; Chinese never uses kana
+        return "ja", 0.97
+    if counts.get("han", 0) / letters >= 0.3:
+        return "zh", 0.9
+    if counts.get("other", 0) / letters >= 0.3:
+        # Cyrillic, Thai, Arabic, ...: not a language we profile
+        return None, 0.0
+    return None
+
+
+def detect_language(text: str) -> Tuple[Optional[str], float]:
+    """(language code or None, confidence in [0, 1]) for a short piece of user text"""
+    if not text or not text.strip():
+        return None, 0.0
+    by_script = _script_language(text)
+    if by_script is not None:
+        return by_script
+
+    lowered = unicodedata.normalize("NFC", text.lower())
+    scores = {lang: 0.0 for lang in LANGUAGE_WORDS}
+
+    # Vietnamese tone marks stacked on vowels (U+1EA0-U+1EF9) are unique to it
+    for char in lowered:
+        if 0x1EA0 <= ord(char) <= 0x1EF9:
+            scores["vi"] += 2.0
+        elif char in _DIACRITICS:
+            langs = _DIACRITICS[char]
+            for lang in langs:
+                scores[lang] += 1.0 / len(langs)
+
+    words = [word for word in _WORD_RE.findall(lowered) if word not in _SHARED_TERMS]
+    # Plain ASCII without a single word that only a foreign profile knows ("sony a7 iv",
+    # "camera with wifi"): brand and model names are English, shared words like "a" are too
+    english_only = lowered.isascii() and not any(
+        word not in LANGUAGE_WORDS["en"]
+        and any(word in profile for profile in LANGUAGE_WORDS.values())
+        for word in words
+    )
+    for word in words:
+        if english_only:
+            langs = ["en"] if word in LANGUAGE_WORDS["en"] else []
+        else:
+            langs = [lang for lang, profile in LANGUAGE_WORDS.items() if word in profile]
+        for lang in langs:
+            scores[lang] += 1.0 / len(langs)
+
+    total = sum(scores.values())
+    if total == 0:
+        # Plain ASCII with no function words ("iphone 15 pro", "laptop"): product names are English
+        return ("en", 0.7) if lowered.isascii() else (None, 0.0)
+
+    best = max(scores, key=scores.get)
+    share = scores[best] / total
+    strength = min(1.0, scores[best] / 2.0)
+    return best, round(share * (0.5 + 0.5 * strength), 3)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+In-memory secondary indexes over the product catalog (category, brand, price)
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _price_of(product: Dict[str, Any]) -> Optional[float]:
+    try:
+        price = product.get('price')
+        return float(price) if price is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def id_sort_key(product_id: Any) -> Tuple[int, Any]:
+    """Total order over mixed int/str product IDs: ints, then numeric strings, then other strings"""
+    if isinstance(product_id, (int, float)) and not isinstance(product_id, bool):
+        return (0, product_id)
+    text = str(product_id)
+    if text.isdigit():
+        return (1, int(text))
+    return (2, text)
+
+
+class ProductIndex:
+    """Hash indexes on category/brand plus a sorted price array, maintained incrementally."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.by_id: Dict[Any, Dict[str, Any]] = {}
+        self.by_category: Dict[str, Set[Any]] = defaultdict(set)
+        self.by_brand: Dict[str, Set[Any]] = defaultdict(set)
+        self._prices: List[Tuple[float, Tuple[int, Any], Any]] = []  # sorted (price, id key, id)
+        self._sorted_ids: Optional[List[Any]] = None  # memoized, dropped when IDs are added/removed
+        self._sorted_keys: Optional[List[Tuple[int, Any]]] = None
+        self.ready = False
+        self.built_at: Optional[float] = None
+
+    def is_fresh(self, max_age: float) -> bool:
+        """True if the index was built from a full load less than max_age seconds ago"""
+        return self.ready and self.built_at is not None and (time.monotonic() - self.built_at) < max_age
+
+    def age(self) -> float:
+        """Seconds since the last full build"""
+        return time.monotonic() - self.built_at if self.built_at is not None else float('inf')
+
+    def build(self, products: Iterable[Dict[str, Any]]) -> None:
+        """Replace the index contents with a full catalog snapshot"""
+        by_id = {}
+        by_category = defaultdict(set)
+        by_brand = defaultdict(set)
+        prices = []
+        for product in products:
+            product_id = product.get('id')
+            if product_id is None:
+                continue
+            by_id[product_id] = product
+            if product.get('category'):
+                by_category[product['category']].add(product_id)
+            if product.get('brand'):
+                by_brand[product['brand']].add(product_id)
+            price = _price_of(product)
+            if price is not None:
+                prices.append((price, id_sort_key(product_id), product_id))
+        prices.sort()
+
+        with self._lock:
+            self.by_id = by_id
+            self.by_category = by_category
+            self.by_brand = by_brand
+            self._prices = prices
+            self._sorted_ids = self._sorted_keys = None
+            self.ready = True
+            self.built_at = time.monotonic()
+
+    def _unlink(self, product: Dict[str, Any]) -> None:
+        # Caller must hold self._lock
+        product_id = product.get('id')
+        for field, index in (('category', self.by_category), ('brand', self.by_brand)):
+            key = product.get(field)
+            if key and key in index:
+                index[key].discard(product_id)
+                if not index[key]:
+                    del index[key]
+        price = _price_of(product)
+        if price is not None:
+            entry = (price, id_sort_key(product_id), product_id)
+            pos = bisect.bisect_left(self._prices, entry)
+            if pos < len(self._prices) and self._prices[pos] == entry:
+                del self._prices[pos]
+
+    def upsert(self, product: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Insert or replace one product; returns the previous version if any"""
+        product_id = product.get('id')
+        if product_id is None:
+            return None
+        with self._lock:
+            previous = self.by_id.get(product_id)
+            if previous is not None:
+                self._unlink(previous)
+            else:
+                self._sorted_ids = self._sorted_keys = None
+            self.by_id[product_id] = product
+            if product.get('category'):
+                self.by_category[product['category']].add(product_id)
+            if product.get('brand'):
+                self.by_brand[product['brand']].add(product_id)
+            price = _price_of(product)
+            if price is not None:
+                bisect.insort(self._prices, (price, id_sort_key(product_id), product_id))
+            return previous
+
+    def remove(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        """Remove one product; returns the removed version if any"""
+        with self._lock:
+            previous = self.by_id.pop(product_id, None)
+            if previous is not None:
+                self._unlink(previous)
+                self._sorted_ids = self._sorted_keys = None
+            return previous
+
+    def get(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(product_id)
+
+    def _ids_in_order(self) -> List[Any]:
+        # Caller must hold self._lock
+        if self._sorted_ids is None:
+            self._sorted_ids = sorted(self.by_id, key=id_sort_key)
+            self._sorted_keys = [id_sort_key(pid) for pid in self._sorted_ids]
+        return self._sorted_ids
+
+    def all_products(self) -> List[Dict[str, Any]]:
+        """All indexed products sorted by ID"""
+        with self._lock:
+            return [self.by_id[pid] for pid in self._ids_in_order()]
+
+    def page(self, after_id: Optional[Any] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Keyset page: up to `limit` products with ID greater than `after_id`, sorted by ID"""
+        with self._lock:
+            ids = self._ids_in_order()
+            start = 0 if after_id is None else bisect.bisect_right(self._sorted_keys, id_sort_key(after_id))
+            return [self.by_id[pid] for pid in ids[start:start + limit]]
+
+    def _price_range_ids(self, min_price: Optional[float], max_price: Optional[float]) -> Set[Any]:
+        # (p,) sorts before and (p, (inf,)) after every (p, id key, id) entry
+        lo = 0 if min_price is None else bisect.bisect_left(self._prices, (min_price,))
+        hi = len(self._prices) if max_price is None else bisect.bisect_right(self._prices, (max_price, (float('inf'),)))
+        return {product_id for _, _, product_id in self._prices[lo:hi]}
+
+    def query_ids(self, category: Optional[str] = None, brand: Optional[str] = None,
+                  min_price: Optional[float] = None, max_price: Optional[float] = None) -> Optional[Set[Any]]:
+        """IDs matching every given filter, or None when no filter was given"""
+        with self._lock:
+            candidate_sets = []
+            if category is not None:
+                candidate_sets.append(self.by_category.get(category, set()))
+            if brand is not None:
+                candidate_sets.append(self.by_brand.get(brand, set()))
+
+            if candidate_sets:
+                # Intersect smallest-first, then check price on the survivors directly
+                candidate_sets.sort(key=len)
+                ids = set(candidate_sets[0])
+                for other in candidate_sets[1:]:
+                    ids &= other
+                if min_price is not None or max_price is not None:
+                    ids = {
+                        pid for pid in ids
+                        if (price := _price_of(self.by_id[pid])) is not None
+                        and (min_price is None or price >= min_price)
+                        and (max_price is None or price <= max_price)
+                    }
+                return ids
+
+            if min_price is not None or max_price is not None:
+                return self._price_range_ids(min_price, max_price)
+            return None
+
+    def query(self, category: Optional[str] = None, brand: Optional[str] = None,
+              min_price: Optional[float] = None, max_price: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Products matching every given filter, sorted by ID"""
+        ids = self.query_ids(category, brand, min_price, max_price)
+        if ids is None:
+            return self.all_products()
+        with self._lock:
+            return [self.by_id[pid] for pid in sorted(ids, key=id_sort_key) if pid in self.by_id]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "products": len(self.by_id),
+                "categories": len(self.by_category),
+                "brands": len(self.by_brand),
+                "age_seconds": round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+            }
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained product leaderboards (featured, top this week) with heap-based top-k
+"""
+
+import heapq
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def featured_score(product: Dict[str, Any]) -> Optional[float]:
+    """Rating of products flagged as featured; None excludes the product"""
+    if not product.get('featured', False):
+        return None
+    try:
+        return float(product.get('rating', 0))
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def popularity_score(product: Dict[str, Any]) -> Optional[float]:
+    """Weekly sales + weekly views + rating * 10; None when the fields are not numeric"""
+    try:
+        weekly_sales = int(product.get('weeklySales', 0))
+        weekly_views = int(product.get('weeklyViews', 0))
+        rating = float(product.get('rating', 0))
+    except (ValueError, TypeError):
+        return None
+    return weekly_sales + weekly_views + (rating * 10)
+
+
+class Leaderboard:
+    """Keeps a score per product and a cached top-`capacity` list of (id, score).
+
+    Writes that leave the ranking fields untouched are ignored, and a changed score only
+    drops the cached list when it can affect it (the product was in it, or now beats its
+    last entry). Ties keep catalog (ID) order, matching a stable sort of the full list.
+    """
+
+    def __init__(self, score_fn: Callable[[Dict[str, Any]], Optional[float]],
+                 fields: Sequence[str], capacity: int = 50):
+        self.score_fn = score_fn
+        self.fields = tuple(fields)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._scores: Dict[Any, float] = {}
+        self._signatures: Dict[Any, Tuple] = {}
+        self._top: Optional[List[Tuple[Any, float]]] = None
+        self.recomputes = 0
+
+    def _signature(self, product: Dict[str, Any]) -> Tuple:
+        return tuple(product.get(field) for field in self.fields)
+
+    def build(self, products: Iterable[Dict[str, Any]]) -> None:
+        """Replace all scores; `products` should be in ID order"""
+        scores, signatures = {}, {}
+        for product in products:
+            product_id = product.get('id')
+            if product_id is None:
+                continue
+            signatures[product_id] = self._signature(product)
+            score = self.score_fn(product)
+            if score is not None:
+                scores[product_id] = score
+        with self._lock:
+            self._scores = scores
+            self._signatures = signatures
+            self._top = None
+
+    def upsert(self, product: Dict[str, Any]) -> None:
+        product_id = product.get('id')
+        if product_id is None:
+            return
+        signature = self._signature(product)
+        with self._lock:
+            if product_id in self._signatures and self._signatures[product_id] == signature:
+                return
+            self._signatures[product_id] = signature
+            score = self.score_fn(product)
+            if score is None:
+                self._discard_locked(product_id)
+                return
+            self._scores[product_id] = score
+            if self._top is not None and self._affects_top(product_id, score):
+                self._top = None
+
+    def remove(self, product_id: Any) -> None:
+        with self._lock:
+            self._signatures.pop(product_id, None)
+            self._discard_locked(product_id)
+
+    def _discard_locked(self, product_id: Any) -> None:
+        if self._scores.pop(product_id, None) is not None and self._top is not None:
+            if any(pid == product_id for pid, _ in self._top):
+                self._top = None
+
+    def _affects_top(self, product_id: Any, score: float) -> bool:
+        # Caller must hold self._lock
+        if any(pid == product_id for pid, _ in self._top):
+            return True
+        return len(self._top) < self.capacity or score >= self._top[-1][1]
+
+    def top(self, k: int) -> List[Tuple[Any, float]]:
+        """Highest-scoring (id, score) pairs, best first"""
+        with self._lock:
+            if k > self.capacity:
+                return heapq.nlargest(k, self._scores.items(), key=lambda item: item[1])
+            if self._top is None:
+                self._top = heapq.nlargest(self.capacity, self._scores.items(), key=lambda item: item[1])
+                self.recomputes += 1
+            return self._top[:k]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"ranked": len(self._scores), "cached": self._top is not None, "recomputes": self.recomputes}
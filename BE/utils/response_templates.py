@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Localized phrase banks for the intro, header and show-all copy of AI search results
+"""
+
+import re
+import threading
+from typing import Dict, Optional
+
+# Plural product nouns per category; "products" is used when the category is unknown
+ITEM_NAMES: Dict[str, Dict[str, str]] = {
+    "en": {"phone": "phones", "camera": "cameras", "laptop": "laptops", "watch": "watches",
+           "camping gear": "camping essentials", "products": "products"},
+    "vi": {"phone": "điện thoại", "camera": "máy ảnh", "laptop": "laptop", "watch": "đồng hồ",
+           "camping gear": "đồ cắm trại", "products": "sản phẩm"},
+    "es": {"phone": "teléfonos", "camera": "cámaras", "laptop": "portátiles", "watch": "relojes",
+           "camping gear": "artículos de camping", "products": "productos"},
+    "fr": {"phone": "téléphones", "camera": "appareils photo", "laptop": "ordinateurs portables", "watch": "montres",
+           "camping gear": "articles de camping", "products": "produits"},
+    "de": {"phone": "Handys", "camera": "Kameras", "laptop": "Laptops", "watch": "Uhren",
+           "camping gear": "Campingartikel", "products": "Produkte"},
+    "pt": {"phone": "celulares", "camera": "câmeras", "laptop": "notebooks", "watch": "relógios",
+           "camping gear": "itens de camping", "products": "produtos"},
+    "it": {"phone": "telefoni", "camera": "fotocamere", "laptop": "portatili", "watch": "orologi",
+           "camping gear": "articoli da campeggio", "products": "prodotti"},
+    "ja": {"phone": "スマートフォン", "camera": "カメラ", "laptop": "ノートパソコン", "watch": "腕時計",
+           "camping gear": "キャンプ用品", "products": "商品"},
+    "ko": {"phone": "휴대폰", "camera": "카메라", "laptop": "노트북", "watch": "시계",
+           "camping gear": "캠핑 용품", "products": "제품"},
+    "zh": {"phone": "手机", "camera": "相机", "laptop": "笔记本电脑", "watch": "手表",
+           "camping gear": "露营装备", "products": "商品"},
+}
+
+# intro is keyed by result-count bucket: "none", "one" or "some"; {count} and {items} are filled in
+PHRASES: Dict[str, Dict[str, object]] = {
+    "en": {
+        "intro": {
+            "some": ["I found {count} {items} that match your search!",
+                     "Great news: {count} {items} fit what you're looking for!",
+                     "Here we go: {count} {items} picked just for you!"],
+            "one": ["I found one great match for your search!",
+                    "Good news: there's a perfect match for you!"],
+            "none": ["Sorry, I couldn't find anything for that search. Try different words or a wider price range!",
+                     "No matches yet. Try adjusting your search and I'll look again!"],
+        },
+        "header": ["Here are your product suggestions:", "Top picks for you:", "Take a look at these:"],
+        "show_all": ["I found {count} total results. Would you like to see all of them?",
+                     "Want to browse all {count} results on the products page?"],
+    },
+    "vi": {
+        "intro": {
+            "some": ["Tôi tìm thấy {count} {items} phù hợp cho bạn!",
+                     "Tin vui: có {count} {items} đúng ý bạn!",
+                     "Đây là {count} {items} được chọn riêng cho bạn!"],
+            "one": ["Tôi tìm thấy một sản phẩm rất phù hợp cho bạn!",
+                    "Tin vui: có một sản phẩm đúng ý bạn!"],
+            "none": ["Xin lỗi, không tìm thấy sản phẩm nào. Bạn thử từ khóa khác hoặc mức giá rộng hơn nhé!",
+                     "Chưa có kết quả phù hợp, bạn thử điều chỉnh tìm kiếm nhé!"],
+        },
+        "header": ["Đây là những sản phẩm gợi ý cho bạn:", "Lựa chọn hàng đầu cho bạn:", "Mời bạn xem qua:"],
+        "show_all": ["Tôi tìm thấy {count} kết quả. Bạn có muốn xem tất cả không?",
+                     "Bạn có muốn xem cả {count} kết quả trên trang sản phẩm không?"],
+    },
+    "es": {
+        "intro": {
+            "some": ["¡Encontré {count} {items} que coinciden con tu búsqueda!",
+                     "¡Buenas noticias! {count} {items} encajan con lo que buscas.",
+                     "¡Aquí tienes {count} {items} para ti!"],
+            "one": ["¡Encontré una opción ideal para tu búsqueda!",
+                    "¡Buenas noticias! Hay un producto perfecto para ti."],
+            "none": ["Lo siento, no encontré productos para esa búsqueda. ¡Prueba con otras palabras o un rango de precio más amplio!",
+                     "Aún no hay resultados. ¡Ajusta tu búsqueda y vuelvo a buscar!"],
+        },
+        "header": ["Estas son algunas sugerencias de productos para ti:", "Nuestras mejores opciones para ti:",
+                   "Echa un vistazo:"],
+        "show_all": ["Encontré {count} resultados en total. ¿Quieres verlos todos?",
+                     "¿Quieres ver los {count} resultados en la página de productos?"],
+    },
+    "fr": {
+        "intro": {
+            "some": ["J'ai trouvé {count} {items} qui correspondent à votre recherche !",
+                     "Bonne nouvelle : {count} {items} répondent à vos attentes !",
+                     "Voici {count} {items} pour vous !"],
+            "one": ["J'ai trouvé un produit idéal pour votre recherche !",
+                    "Bonne nouvelle : un produit correspond parfaitement à votre recherche !"],
+            "none": ["Désolé, aucun produit ne correspond à cette recherche. Essayez d'autres mots ou une fourchette de prix plus large !",
+                     "Aucun résultat pour l'instant : modifiez votre recherche et je chercherai à nouveau !"],
+        },
+        "header": ["Voici quelques suggestions de produits pour vous :", "Notre sélection pour vous :",
+                   "Jetez un œil à ceci :"],
+        "show_all": ["J'ai trouvé {count} résultats au total. Voulez-vous tous les voir ?",
+                     "Voulez-vous parcourir les {count} résultats sur la page produits ?"],
+    },
+    "de": {
+        "intro": {
+            "some": ["Ich habe {count} {items} gefunden, die zu deiner Suche passen!",
+                     "Gute Nachrichten: {count} {items} passen zu deinen Wünschen!",
+                     "Hier sind {count} {items} für dich!"],
+            "one": ["Ich habe einen perfekten Treffer für deine Suche gefunden!",
+                    "Gute Nachrichten: Ein Produkt passt genau zu deiner Suche!"],
+            "none": ["Leider habe ich zu dieser Suche nichts gefunden. Versuche andere Begriffe oder einen größeren Preisrahmen!",
+                     "Noch keine Treffer. Passe deine Suche an und ich schaue noch einmal!"],
+        },
+        "header": ["Hier sind einige Produktempfehlungen für dich:", "Unsere Top-Auswahl für dich:",
+                   "Schau dir diese an:"],
+        "show_all": ["Ich habe insgesamt {count} Ergebnisse gefunden. Möchtest du alle sehen?",
+                     "Möchtest du alle {count} Ergebnisse auf der Produktseite ansehen?"],
+    },
+    "pt": {
+        "intro": {
+            "some": ["Encontrei {count} {items} que combinam com a sua busca!",
+                     "Boa notícia: {count} {items} têm tudo a ver com o que você procura!",
+                     "Aqui estão {count} {items} para você!"],
+            "one": ["Encontrei uma opção perfeita para a sua busca!",
+                    "Boa notícia: há um produto ideal para você!"],
+            "none": ["Desculpe, não encontrei produtos para essa busca. Tente outras palavras ou uma faixa de preço maior!",
+                     "Ainda sem resultados. Ajuste sua busca que eu procuro de novo!"],
+        },
+        "header": ["Aqui estão algumas sugestões de produtos para você:", "Nossas melhores escolhas para você:",
+                   "Dê uma olhada:"],
+        "show_all": ["Encontrei {count} resultados no total. Quer ver todos?",
+                     "Quer ver todos os {count} resultados na página de produtos?"],
+    },
+    "it": {
+        "intro": {
+            "some": ["Ho trovato {count} {items} in linea con la tua ricerca!",
+                     "Buone notizie: {count} {items} fanno al caso tuo!",
+                     "Ecco {count} {items} per te!"],
+            "one": ["Ho trovato un prodotto perfetto per la tua ricerca!",
+                    "Buone notizie: c'è un prodotto ideale per te!"],
+            "none": ["Mi dispiace, non ho trovato prodotti per questa ricerca. Prova con altre parole o una fascia di prezzo più ampia!",
+                     "Ancora nessun risultato. Modifica la ricerca e cercherò di nuovo!"],
+        },
+        "header": ["Ecco alcuni suggerimenti di prodotti per te:", "Le nostre migliori scelte per te:",
+                   "Dai un'occhiata:"],
+        "show_all": ["Ho trovato {count} risultati in totale. Vuoi vederli tutti?",
+                     "Vuoi vedere tutti i {count} risultati nella pagina dei prodotti?"],
+    },
+    "ja": {
+        "intro": {
+            "some": ["検索で{items}が{count}件見つかりました！",
+                     "ぴったりの{items}を{count}件ご用意しました！",
+                     "あなたにおすすめの{items}が{count}件あります！"],
+            "one": ["検索にぴったりの商品が見つかりました！",
+                    "おすすめの商品が1件見つかりました！"],
+            "none": ["申し訳ございませんが、商品が見つかりませんでした。別のキーワードや価格帯でお試しください！",
+                     "まだ該当する商品がありません。検索条件を変えてもう一度お試しください！"],
+        },
+        "header": ["おすすめ商品一覧：", "あなたへの厳選アイテム：", "こちらをご覧ください："],
+        "show_all": ["{count}個の結果が見つかりました。すべて見ますか？",
+                     "商品ページで{count}件すべての結果を見ますか？"],
+    },
+    "ko": {
+        "intro": {
+            "some": ["검색에서 {items} {count}개를 찾았습니다!",
+                     "좋은 소식이에요! 찾으시는 {items} {count}개가 있어요!",
+                     "당신을 위한 {items} {count}개를 골랐어요!"],
+            "one": ["검색에 딱 맞는 제품을 찾았습니다!",
+                    "좋은 소식이에요! 딱 맞는 제품이 하나 있어요!"],
+            "none": ["죄송합니다. 제품을 찾을 수 없습니다. 다른 검색어나 더 넓은 가격대로 시도해 보세요!",
+                     "아직 결과가 없어요. 검색 조건을 바꿔서 다시 시도해 보세요!"],
+        },
+        "header": ["제품 추천 목록입니다:", "당신을 위한 추천 상품:", "이 제품들을 확인해 보세요:"],
+        "show_all": ["{count}개의 결과를 찾았습니다. 모두 보시겠습니까?",
+                     "제품 페이지에서 {count}개 결과를 모두 보시겠어요?"],
+    },
+    "zh": {
+        "intro": {
+            "some": ["为你找到{count}款{items}！",
+                     "好消息！有{count}款{items}符合你的需求！",
+                     "这里有{count}款为你精选的{items}！"],
+            "one": ["为你找到一款非常合适的商品！",
+                    "好消息！有一款商品完全符合你的需求！"],
+            "none": ["抱歉，没有找到相关商品。试试其他关键词或更宽的价格范围吧！",
+                     "暂时没有结果，调整一下搜索条件再试试吧！"],
+        },
+        "header": ["以下是给你的产品建议：", "为你精选的商品：", "看看这些吧："],
+        "show_all": ["共找到{count}个结果，要查看全部吗？",
+                     "要在商品页面查看全部{count}个结果吗？"],
+    },
+}
+
+
+def normalize_language(lang_code: Optional[str]) -> str:
+    """Base language of a code as detected or sent by a client ("pt-BR" and "PT." both give "pt")"""
+    code = re.sub(r"[^\w-]", "", (lang_code or "").lower())
+    return re.split(r"[-_]", code)[0]
+
+
+def _count_bucket(product_count: int) -> str:
+    if product_count <= 0:
+        return "none"
+    return "one" if product_count == 1 else "some"
+
+
+class ResponseTemplates:
+    """Renders intro/header/show_all_product from the phrase banks without an LLM call.
+
+    Variants rotate per language, field and count bucket, so repeated searches do not
+    read the same sentence every time.
+    """
+
+    def __init__(self, phrases: Optional[Dict[str, Dict[str, object]]] = None,
+                 item_names: Optional[Dict[str, Dict[str, str]]] = None, default_language: str = "en"):
+        self.phrases = phrases or PHRASES
+        self.item_names = item_names or ITEM_NAMES
+        self.default_language = default_language
+        self._lock = threading.Lock()
+        self._rotation: Dict[tuple, int] = {}
+
+    def _pick(self, lang_code: str, field: str, variants) -> str:
+        with self._lock:
+            turn = self._rotation.get((lang_code, field), 0)
+            self._rotation[(lang_code, field)] = turn + 1
+        return variants[turn % len(variants)]
+
+    def render(self, lang_code: str, product_count: int, category: Optional[str] = None) -> Dict[str, str]:
+        """Copy for a result list of `product_count` products (show_all_product only above 3)"""
+        lang_code = normalize_language(lang_code)
+        lang_code = lang_code if lang_code in self.phrases else self.default_language
+        bank = self.phrases[lang_code]
+        names = self.item_names[lang_code]
+        items = names.get((category or "").strip().lower(), names["products"])
+        bucket = _count_bucket(product_count)
+
+        intro = self._pick(lang_code, f"intro:{bucket}", bank["intro"][bucket])
+        header = self._pick(lang_code, "header", bank["header"])
+        show_all = self._pick(lang_code, "show_all", bank["show_all"]) if product_count > 3 else ""
+        return {
+            "intro": intro.format(count=product_count, items=items),
+            "header": header,
+            "show_all_product": show_all.format(count=product_count, items=items),
+        }
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Request-scoped state of an AI search, carried through the agent run config into its tools
+"""
+
+import inspect
+from typing import Any, Dict, Optional
+
+from utils.stage_timer import StageTimings
+
+
+class SearchContext:
+    """Language, result limit, copy mode, tool source and stage timings of one search request.
+
+    The shared AIService keeps no per-request attributes; the context travels in
+    config["configurable"]["search_context"], which LangGraph hands to every tool call
+    of that run, so concurrent searches in one worker never see each other's state.
+    """
+
+    def __init__(self, limit: int = 10, language: Any = "en", llm_copy: bool = False):
+        self.limit = limit
+        self.language = language  # language code, or a pending detect_language task
+        self.llm_copy = llm_copy  # generate intro/header with the LLM instead of the templates
+        self.tool_source: Optional[str] = None
+        self.timings = StageTimings()
+
+    async def resolve_language(self) -> str:
+        if inspect.isawaitable(self.language):
+            self.language = await self.language
+        return self.language or "en"
+
+    def as_config(self, **config: Any) -> Dict[str, Any]:
+        """Run config for agent.ainvoke carrying this context"""
+        return {**config, "configurable": {"search_context": self}}
+
+    @staticmethod
+    def from_config(config: Optional[Dict[str, Any]]) -> "SearchContext":
+        context = ((config or {}).get("configurable") or {}).get("search_context")
+        return context if context is not None else SearchContext()
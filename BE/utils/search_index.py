@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Tokenized inverted index with BM25 ranking for product keyword search
+"""
+
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.product_keywords import get_product_keywords
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'i', 'in', 'is', 'it',
+    'me', 'my', 'of', 'on', 'or', 'some', 'the', 'to', 'want', 'with', 'need', 'show', 'find',
+}
+
+# Term-frequency weight per field (a cheap BM25F approximation)
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'tags': 2.0,
+    'category': 2.0,
+    'brand': 2.0,
+    'keywords': 1.0,
+    'description': 1.0,
+}
+
+# Query terms also match indexed terms containing them ("phone" -> "smartphone"), as the old
+# substring scan did, with this share of an exact match's score
+SUBSTRING_MIN_LENGTH = 3
+SUBSTRING_WEIGHT = 0.5
+NGRAM_SIZE = 3
+
+
+def trigrams(term: str) -> Set[str]:
+    """Character trigrams of a term; a substring's trigrams are a subset of its superstring's"""
+    return {term[i:i + NGRAM_SIZE] for i in range(len(term) - NGRAM_SIZE + 1)}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed"""
+    if not text:
+        return []
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def product_fields(product: Dict[str, Any]) -> Dict[str, str]:
+    """Searchable text per field, including the generated product keywords"""
+    name = product.get('name') or ''
+    category = product.get('category') or ''
+    tags = product.get('tags') or []
+    return {
+        'name': name,
+        'category': category,
+        'brand': product.get('brand') or '',
+        'tags': ' '.join(str(tag) for tag in tags),
+        'keywords': ' '.join(get_product_keywords(name, category)) if name else '',
+        'description': product.get('description') or '',
+    }
+
+
+class InvertedIndex:
+    """Posting lists of term -> {doc_id: weighted tf}, scored with Okapi BM25."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[Any, float]] = defaultdict(dict)
+        self._doc_terms: Dict[Any, Dict[str, float]] = {}
+        self._doc_len: Dict[Any, float] = {}
+        self._total_len = 0.0
+        # trigram -> indexed terms containing it, for substring expansion without a vocabulary scan
+        self._ngrams: Dict[str, Set[str]] = defaultdict(set)
+
+    def _analyze(self, product: Dict[str, Any]) -> Dict[str, float]:
+        term_freqs: Dict[str, float] = defaultdict(float)
+        for field, text in product_fields(product).items():
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for token in tokenize(text):
+                term_freqs[token] += weight
+        return term_freqs
+
+    def _remove_locked(self, doc_id: Any) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+                    self._unlink_term_locked(term)
+        self._total_len -= self._doc_len.pop(doc_id, 0.0)
+
+    def _link_term_locked(self, term: str) -> None:
+        for gram in trigrams(term):
+            self._ngrams[gram].add(term)
+
+    def _unlink_term_locked(self, term: str) -> None:
+        for gram in trigrams(term):
+            terms = self._ngrams.get(gram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._ngrams[gram]
+
+    def _add_locked(self, doc_id: Any, term_freqs: Dict[str, float]) -> None:
+        for term, tf in term_freqs.items():
+            if term not in self._postings:
+                self._link_term_locked(term)
+            self._postings[term][doc_id] = tf
+        self._doc_terms[doc_id] = term_freqs
+        self._doc_len[doc_id] = sum(term_freqs.values())
+        self._total_len += self._doc_len[doc_id]
+
+    def build(self, products: Iterable[Dict[str, Any]]) -> None:
+        """Replace the index with a full catalog snapshot"""
+        postings: Dict[str, Dict[Any, float]] = defaultdict(dict)
+        doc_terms, doc_len, total_len = {}, {}, 0.0
+        for product in products:
+            doc_id = product.get('id')
+            if doc_id is None:
+                continue
+            term_freqs = self._analyze(product)
+            for term, tf in term_freqs.items():
+                postings[term][doc_id] = tf
+            doc_terms[doc_id] = term_freqs
+            doc_len[doc_id] = sum(term_freqs.values())
+            total_len += doc_len[doc_id]
+        ngrams: Dict[str, Set[str]] = defaultdict(set)
+        for term in postings:
+            for gram in trigrams(term):
+                ngrams[gram].add(term)
+
+        with self._lock:
+            self._postings = postings
+            self._doc_terms = doc_terms
+            self._doc_len = doc_len
+            self._total_len = total_len
+            self._ngrams = ngrams
+
+    def upsert(self, product: Dict[str, Any]) -> None:
+        doc_id = product.get('id')
+        if doc_id is None:
+            return
+        term_freqs = self._analyze(product)
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._add_locked(doc_id, term_freqs)
+
+    def remove(self, doc_id: Any) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _expand_locked(self, terms: Set[str]) -> Dict[str, float]:
+        """Indexed terms to score for the query terms, with their weight"""
+        expanded = {term: 1.0 for term in terms if term in self._postings}
+        for term in terms:
+            if len(term) < SUBSTRING_MIN_LENGTH:
+                continue
+            # Terms sharing every trigram of the query term, smallest posting first
+            buckets = sorted((self._ngrams.get(gram, ()) for gram in trigrams(term)), key=len)
+            if not buckets[0]:
+                continue
+            candidates = set(buckets[0]).intersection(*buckets[1:])
+            for indexed in candidates:
+                if indexed not in expanded and term in indexed:
+                    expanded[indexed] = SUBSTRING_WEIGHT
+        return expanded
+
+    def search(self, query: str, candidate_ids: Optional[Set[Any]] = None,
+               limit: Optional[int] = None) -> List[Tuple[Any, float]]:
+        """Rank documents matching any query term, exactly or as part of a longer indexed term"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_len)
+            if doc_count == 0:
+                return []
+            avg_len = self._total_len / doc_count
+            scores: Dict[Any, float] = defaultdict(float)
+
+            for term, weight in self._expand_locked(terms).items():
+                posting = self._postings[term]
+                idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                if candidate_ids is not None and len(candidate_ids) < len(posting):
+                    entries = ((d, posting[d]) for d in candidate_ids if d in posting)
+                else:
+                    entries = posting.items()
+                for doc_id, tf in entries:
+                    if candidate_ids is not None and doc_id not in candidate_ids:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] += weight * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        # Ids may mix ints and strings across imports; compare them as strings on ties
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], str(item[0])))
+        return ranked[:limit] if limit else ranked
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"documents": len(self._doc_len), "terms": len(self._postings)}
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Single-flight request coalescing: concurrent callers for the same key share one in-flight call
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+
+class SingleFlight:
+    """Deduplicate concurrent loads of the same key across threads and event loops."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def _join_or_lead(self, key: Hashable) -> Tuple[_Call, bool]:
+        # Caller must hold self._lock
+        call = self._calls.get(key)
+        if call is not None:
+            self.coalesced += 1
+            return call, False
+        call = _Call()
+        self._calls[key] = call
+        self.executions += 1
+        return call, True
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> None:
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                async_waiters = list(call.async_waiters)
+            call.done.set()
+            for loop, future in async_waiters:
+                loop.call_soon_threadsafe(self._resolve, future, call)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, call: _Call) -> None:
+        if future.done():
+            return
+        if call.error is not None:
+            future.set_exception(call.error)
+        else:
+            future.set_result(call.result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn() once for all callers that arrive while it is in flight"""
+        with self._lock:
+            call, leader = self._join_or_lead(key)
+
+        if leader:
+            self._run(key, call, fn)
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Awaitable variant: the blocking fn() runs in a worker thread, followers just await it"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            call, leader = self._join_or_lead(key)
+            if not leader and not call.done.is_set():
+                future = loop.create_future()
+                call.async_waiters.append((loop, future))
+            else:
+                future = None
+
+        if leader:
+            await asyncio.to_thread(self._run, key, call, fn)
+        elif future is not None:
+            return await future
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+            }
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Per-request stage timings for the AI search pipeline, including stages that overlap
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class StageTimings:
+    """Records start offset and duration of each named stage relative to the request start.
+
+    Concurrent stages show up with overlapping [start, start + duration) windows, and
+    stages may nest (the agent stage contains the tool's stages).
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def _record(self, name: str, start: float) -> None:
+        end = time.perf_counter()
+        self.stages[name] = {
+            "start_ms": round((start - self._started) * 1000, 1),
+            "duration_ms": round((end - start) * 1000, 1),
+        }
+
+    async def timed(self, name: str, awaitable: Awaitable[T]) -> T:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self._record(name, start)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Times a block that is not a single awaitable, e.g. consuming a token stream"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stages": dict(self.stages),
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 1),
+        }
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Warm the AI search-intent cache of a running backend from query logs
+
+Reads one or more logs, counts queries by normalized text and sends the most frequent
+ones to POST /api/ai/intent-cache/warm. Accepted log formats:
+- JSONL as written by the server when INTENT_QUERY_LOG is set ({"ts": ..., "query": "..."})
+- JSONL search requests ({"messages": [{"role": "user", "content": "..."}]})
+- plain text, one query per line
+
+Usage:
+    python warm_intent_cache.py intent_queries.jsonl --top 500 --url http://localhost:8000
+"""
+
+import argparse
+import json
+import sys
+import urllib.request
+from collections import Counter
+from typing import Dict, Iterator, List
+
+from utils.embedding_cache import normalize_text
+
+
+def read_queries(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith("{"):
+                yield line
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("query"):
+                yield record["query"]
+            else:
+                # Last user message of a logged search request
+                users = [m.get("content") for m in record.get("messages", []) if m.get("role") == "user"]
+                if users and users[-1]:
+                    yield users[-1]
+
+
+def top_queries(paths: List[str], top: int) -> List[str]:
+    """Most frequent queries, one representative spelling per normalized form"""
+    counts: Counter = Counter()
+    spelling: Dict[str, str] = {}
+    for path in paths:
+        for query in read_queries(path):
+            key = normalize_text(query)
+            if key:
+                counts[key] += 1
+                spelling.setdefault(key, query)
+    return [spelling[key] for key, _ in counts.most_common(top)]
+
+
+def warm(url: str, queries: List[str], chunk_size: int, max_workers: int) -> Dict[str, int]:
+    totals = Counter()
+    endpoint = url.rstrip("/") + "/api/ai/intent-cache/warm"
+    for i in range(0, len(queries), chunk_size):
+        chunk = queries[i:i + chunk_size]
+        body = json.dumps({"queries": chunk, "max_workers": max_workers}).encode("utf-8")
+        request = urllib.request.Request(endpoint, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=600) as response:
+            result = json.loads(response.read().decode("utf-8"))
+        if result.get("status") != "success":
+            raise RuntimeError(result.get("message", "warm-up failed"))
+        for field in ("already_cached", "warmed", "failed"):
+            totals[field] += result.get(field, 0)
+        print(f"[INFO] {min(i + chunk_size, len(queries))}/{len(queries)} queries sent")
+    return dict(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-populate the search-intent cache from query logs")
+    parser.add_argument("logs", nargs="+", help="query log files (JSONL or one query per line)")
+    parser.add_argument("--top", type=int, default=500, help="number of most frequent queries to warm")
+    parser.add_argument("--url", default="http://localhost:8000", help="backend base URL")
+    parser.add_argument("--chunk-size", type=int, default=50, help="queries per request")
+    parser.add_argument("--max-workers", type=int, default=4, help="concurrent LLM calls on the server")
+    args = parser.parse_args()
+
+    queries = top_queries(args.logs, args.top)
+    if not queries:
+        print("[ERROR] No queries found in the given logs")
+        sys.exit(1)
+    print(f"[START] Warming intent cache with {len(queries)} queries at {args.url}")
+    try:
+        totals = warm(args.url, queries, args.chunk_size, args.max_workers)
+    except Exception as e:
+        print(f"[ERROR] Warm-up failed: {e}")
+        sys.exit(1)
+    print(f"[SUCCESS] Warmed {totals.get('warmed', 0)}, already cached {totals.get('already_cached', 0)}, "
+          f"failed {totals.get('failed', 0)}")
+
+
+if __name__ == "__main__":
+    main()